@@ -12,10 +12,18 @@ FILES_DIR = os.path.join(BASE_DIR, "files")
 NER_MODEL_PATH = os.path.join(MODELS_DIR, "ner_model")
 RERANKING_MODEL_PATH = os.path.join(MODELS_DIR, "reranking_model")
 EMBEDDING_MODEL_PATH = os.path.join(MODELS_DIR, "embedding_model")
+EMBEDDING_CACHE_DIR = os.path.join(MODELS_DIR, "embedding_cache")
+FAISS_INDEX_PATH = os.path.join(MODELS_DIR, "faiss_index")
+SKILL_VOCABULARY_DIR = os.path.join(MODELS_DIR, "skill_vocabulary")
+ONNX_MODELS_DIR = os.path.join(MODELS_DIR, "onnx")
 
 # Data paths
 SKILLS_ONTOLOGY_PATH = os.path.join(DATA_DIR, "skills_ontology.json")
 JOB_TITLE_MAPPING_PATH = os.path.join(DATA_DIR, "job_title_mapping.json")
+LOCATION_GAZETTEER_PATH = os.path.join(DATA_DIR, "location_gazetteer.json")
+JD_CATALOG_DIR = os.path.join(DATA_DIR, "jd_catalog")
+FEATURE_STORE_DIR = os.path.join(DATA_DIR, "feature_store")
+JOBS_DB_PATH = os.path.join(DATA_DIR, "jobs", "jobs.sqlite3")
 
 # File paths
 RESUME_PATH = os.path.join(RESUMES_DIR, "Ravi_Sharma_Resume.pdf")
@@ -26,15 +34,19 @@ OUTPUT_PATH = os.path.join(BASE_DIR, "output", "match_results.json")
 MODEL_CONFIG = {
     "sentence_transformer": {
         "model_name": "sentence-transformers/all-MiniLM-L6-v2",
-        "max_seq_length": 128
+        "max_seq_length": 128,
+        "backend": "torch"  # torch, torch_int8 or onnx
     },
     "reranking_model": {
         "model_name": "cross-encoder/ms-marco-MiniLM-L-6-v2",
-        "max_seq_length": 512
+        "max_seq_length": 512,
+        "batch_size": 32,
+        "backend": "torch"  # torch, torch_int8 or onnx
     },
     "ner_model": {
         "model_name": "flair/ner-english",
-        "max_seq_length": 256
+        "max_seq_length": 256,
+        "batch_size": 32  # Sentences per batched NER predict
     }
 }
 
@@ -43,7 +55,93 @@ MATCHING_CONFIG = {
     "skill_match_threshold": 0.7,
     "education_match_threshold": 0.8,
     "experience_match_threshold": 0.8,
-    "embedding_similarity_threshold": 0.6
+    "embedding_similarity_threshold": 0.6,
+    # Resumes fully scored per batch by top-k ranking with upper-bound pruning
+    "pruning_batch_size": 32,
+    # Resumes of one /api/match request are extracted, parsed and scored in chunks of this size
+    "resumes_per_task": 4,
+    # Chunks of one request processed concurrently; None uses the inference executor's max_workers
+    "max_concurrent_tasks": None
+}
+
+# Embedding cache configuration
+EMBEDDING_CACHE_CONFIG = {
+    "cache_dir": EMBEDDING_CACHE_DIR,
+    "memory_max_items": 50000,
+    "disk_enabled": True,
+    # Above this many vectors per model the disk tier is compacted to its newest half; None for no limit
+    "disk_max_items": 500000
+}
+
+# Document chunking for embeddings; chunks are measured with the sentence transformer's tokenizer and,
+# unless max_tokens is set, hold at most MODEL_CONFIG["sentence_transformer"]["max_seq_length"] (or the
+# model's own limit, if lower) less the [CLS] and [SEP] tokens
+EMBEDDING_CHUNK_CONFIG = {
+    "enabled": True,
+    "max_tokens": None,
+    "max_chunks": 64
+}
+
+# Contact extraction cascade: regexes, capitalization and the location gazetteer run first,
+# and Flair NER only sees header lines whose name or location stays below min_confidence
+CONTACT_CASCADE_CONFIG = {
+    "enabled": True,
+    "min_confidence": 0.75
+}
+
+# Web serving configuration
+SERVING_CONFIG = {
+    # Models loaded and exercised by the background warm-up before /readyz reports ready
+    "warmup_models": ["embedding_model", "ner_model", "reranking_model", "reranking_tokenizer"],
+    "retry_after_seconds": 10,
+    # Pre-fork serving with web/gunicorn_conf.py (WEB_CONCURRENCY overrides workers). Keep one worker
+    # while the resume index, feature store and JD catalog are per-process and unsafe to write from several
+    "workers": 1,
+    "preload_models": True  # Load the models once in the master and share them with forked workers
+}
+
+# Inference executor of the web app; the container's CPU quota is split across the worker processes
+INFERENCE_CONFIG = {
+    "max_workers": None,  # Concurrent CPU-bound stages per process; None uses the process's CPU budget
+    "torch_threads": None,  # Intra-op threads per stage; None divides the CPU budget by max_workers
+    # Models that are not thread-safe get a pool of replicas; None means min(max_workers, 2)
+    "replicas": {"ner_model": None}
+}
+
+# Batch matching jobs of the web app (/api/jobs)
+JOBS_CONFIG = {
+    "db_path": JOBS_DB_PATH,
+    # A running job whose worker has not saved results for this long is picked up by another worker
+    "lease_seconds": 300,
+    "poll_seconds": 5,  # How often an idle worker checks the store for jobs queued by other processes
+    "page_size": 50,
+    "max_page_size": 500,
+    "preview_size": 10  # Best results so far included in the job status
+}
+
+# Resume vector index configuration
+RESUME_INDEX_CONFIG = {
+    "mode": "auto",  # auto, flat, ivf or hnsw
+    "flat_max_vectors": 50000,
+    "nprobe": 16,
+    "hnsw_m": 32,
+    "quantization": "none",  # none, int8 (4x smaller) or binary (32x smaller)
+    "rescore_factor": 4  # Shortlist size per result rescored with float32 vectors when quantized
+}
+
+# Two-stage retrieve-then-rerank configuration
+RETRIEVAL_CONFIG = {
+    "strategy": "hybrid",  # vector, lexical or hybrid
+    "rerank_top_n": 50,
+    "top_k": 10
+}
+
+# CLI cold-start budget checked by scripts/bench_startup.py
+STARTUP_BUDGET_CONFIG = {
+    "import_seconds": 1.5,  # python -X importtime cumulative time of "import main"
+    "first_result_seconds": 30.0,  # wall time of one end-to-end main.py run, model loading included
+    "runs": 3,
+    "history_path": os.path.join(BASE_DIR, "output", "startup_benchmark.jsonl")
 }
 
 # Configuration dictionary
@@ -56,11 +154,26 @@ config = {
     "ner_model_path": NER_MODEL_PATH,
     "reranking_model_path": RERANKING_MODEL_PATH,
     "embedding_model_path": EMBEDDING_MODEL_PATH,
+    "faiss_index_path": FAISS_INDEX_PATH,
+    "skill_vocabulary_dir": SKILL_VOCABULARY_DIR,
+    "onnx_models_dir": ONNX_MODELS_DIR,
     "skills_ontology_path": SKILLS_ONTOLOGY_PATH,
     "job_title_mapping_path": JOB_TITLE_MAPPING_PATH,
+    "location_gazetteer_path": LOCATION_GAZETTEER_PATH,
+    "jd_catalog_dir": JD_CATALOG_DIR,
+    "feature_store_dir": FEATURE_STORE_DIR,
     "resume_path": RESUME_PATH,
     "job_description_path": JOB_DESCRIPTION_PATH,
     "output_path": OUTPUT_PATH,
     "model_config": MODEL_CONFIG,
-    "matching_config": MATCHING_CONFIG
+    "matching_config": MATCHING_CONFIG,
+    "embedding_cache_config": EMBEDDING_CACHE_CONFIG,
+    "embedding_chunk_config": EMBEDDING_CHUNK_CONFIG,
+    "contact_cascade_config": CONTACT_CASCADE_CONFIG,
+    "serving_config": SERVING_CONFIG,
+    "inference_config": INFERENCE_CONFIG,
+    "jobs_config": JOBS_CONFIG,
+    "startup_budget_config": STARTUP_BUDGET_CONFIG,
+    "resume_index_config": RESUME_INDEX_CONFIG,
+    "retrieval_config": RETRIEVAL_CONFIG
 } 
\ No newline at end of file
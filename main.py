@@ -5,32 +5,20 @@ logging.basicConfig(level=logging.DEBUG)
 import os
 import json
 import argparse
-import torch
 from config.config import config
 from utils.file_handler import read_file, load_resume, load_job_description, save_match_results
 from utils.preprocessing import preprocess_text, extract_sections
-from utils.section_entity_extraction import extract_section_entities, normalize_section_entities
-from utils.embedding_matching import load_embedding_model, load_faiss_index, match_resume_to_jd, calculate_embedding_similarity
-from utils.feedback_learning import capture_feedback, update_model_with_feedback
-from transformers import pipeline
-from sentence_transformers import SentenceTransformer
-from utils.reranking import load_reranking_model, rerank_matches
+from utils.section_entity_extraction import extract_section_entities, extract_section_entities_batch, normalize_section_entities
 from typing import Dict, Any, List
-from utils.llm_entity_extraction import extract_entities_with_llm
 from utils.pdf_processor import extract_text_from_pdf
 from utils.job_description_parser import parse_job_description
 from utils.match_scoring import calculate_match_score
 from utils.models import load_models
 from utils.resume_parser import parse_resume
-
-# Initialize the NER pipeline
-ner_pipeline = pipeline("ner", model="dslim/bert-base-NER", tokenizer="dslim/bert-base-NER")
-
-# Initialize the embedding model
-embedding_model = SentenceTransformer("BAAI/bge-small-en-v1.5")
-
-# Initialize the reranking model
-reranking_model, reranking_tokenizer = load_reranking_model()
+from utils.jd_catalog import get_jd_catalog
+from utils.resume_index import get_resume_index, candidate_id_for
+from utils.retrieval import retrieve_and_rerank
+from utils.feature_store import get_feature_store
 
 logger = logging.getLogger(__name__)
 
@@ -52,16 +40,166 @@ def parse_resume(resume_text: str, ner_model) -> Dict[str, Any]:
     
     return normalized_entities
 
+def add_jobs_to_catalog(jd_paths: List[str], models: Dict[str, Any]) -> None:
+    """Parse job description files and store them in the JD catalog."""
+    job_texts = {}
+    for jd_path in jd_paths:
+        jd_text = load_job_description(jd_path)
+        if not jd_text:
+            print(f"Error: Could not load job description: {jd_path}")
+            continue
+        job_texts[os.path.splitext(os.path.basename(jd_path))[0]] = jd_text
+    
+    catalog = get_jd_catalog()
+    added = catalog.add_jobs(job_texts, models["embedding_model"])
+    print(f"Added {len(added)} job descriptions to the catalog ({len(catalog)} total)")
+
+def match_catalog(resume_path: str, top_k: int, models: Dict[str, Any]) -> None:
+    """Rank the JD catalog for one resume and print the top-k jobs."""
+    resume_text = extract_text_from_pdf(resume_path)
+    if not resume_text:
+        print("Error: Could not extract text from resume PDF")
+        return
+    
+    parsed_resume = extract_section_entities(resume_text, models["ner_model"])
+    catalog = get_jd_catalog()
+    if not len(catalog):
+        print("Error: The JD catalog is empty. Add jobs with --catalog-add first")
+        return
+    
+    ranked_jobs = catalog.match(parsed_resume, models["embedding_model"], top_k=top_k)
+    
+    output_dir = "output"
+    os.makedirs(output_dir, exist_ok=True)
+    resume_name = os.path.splitext(os.path.basename(resume_path))[0]
+    output_file = os.path.join(output_dir, f"{resume_name}_vs_catalog_match.json")
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump({"resume": parsed_resume, "jobs": ranked_jobs}, f, indent=2)
+    logger.info(f"Results saved to: {output_file}")
+    
+    print(f"\nTop {len(ranked_jobs)} of {len(catalog)} jobs:")
+    for job in ranked_jobs:
+        print(f"{job['rank']:>3}. {job['match_score']['overall_score']:.2f}  {job['jd_id']}  {job['title']}")
+
+def add_resumes_to_index(resume_paths: List[str], models: Dict[str, Any]) -> None:
+    """Parse resume PDFs and upsert them into the resume vector index."""
+    resume_texts = {}
+    for resume_path in resume_paths:
+        resume_text = extract_text_from_pdf(resume_path)
+        if not resume_text:
+            print(f"Error: Could not extract text from resume PDF: {resume_path}")
+            continue
+        resume_texts[resume_path] = resume_text
+    
+    parsed_resumes = {}
+    for resume_path, parsed_resume in zip(resume_texts, extract_section_entities_batch(list(resume_texts.values()), models["ner_model"])):
+        parsed_resumes[candidate_id_for(parsed_resume, resume_path)] = parsed_resume
+    
+    resume_index = get_resume_index()
+    indexed = resume_index.index_resumes(parsed_resumes, models["embedding_model"])
+    resume_index.save()
+    print(f"Indexed {len(indexed)} resumes ({len(resume_index)} candidates total)")
+
+def search_index(jd_path: str, top_k: int, rerank_top_n: int, models: Dict[str, Any]) -> None:
+    """Print the top-k indexed candidates for a job description, reranking the first-stage top-n."""
+    jd_text = load_job_description(jd_path)
+    if not jd_text:
+        print("Error: Could not load job description")
+        return
+    
+    resume_index = get_resume_index()
+    search_results = retrieve_and_rerank(parse_job_description(jd_text), resume_index, models, top_k=top_k, rerank_top_n=rerank_top_n)
+    stats = search_results["stats"]
+    print(f"\nTop {len(search_results['candidates'])} of {stats['pool_size']} indexed candidates:")
+    for rank, candidate in enumerate(search_results["candidates"], start=1):
+        score = candidate.get("rerank_score", candidate["retrieval_score"])
+        print(f"{rank:>3}. {score:.2f}  {candidate['candidate_id']}  {candidate['name']}")
+    print(f"\nRetrieval: {stats['retrieval']['candidates']} candidates in {stats['retrieval']['latency_ms']:.1f} ms")
+    print(f"Rerank: {stats['rerank']['candidates']} candidates in {stats['rerank']['latency_ms']:.1f} ms")
+
+def add_resumes_to_store(resume_paths: List[str], models: Dict[str, Any]) -> None:
+    """Parse resume PDFs into the feature store, skipping files already stored."""
+    feature_store = get_feature_store()
+    ingested = feature_store.ingest_pdfs(resume_paths, models["ner_model"], models["embedding_model"])
+    for resume_path in ingested["failed"]:
+        print(f"Error: Could not extract text from resume PDF: {resume_path}")
+    print(f"Stored {len(ingested['stored'])} resumes, skipped {len(ingested['skipped'])} unchanged ({len(feature_store)} candidates total)")
+
+def rank_store(jd_path: str, top_k: int, models: Dict[str, Any]) -> None:
+    """Print the top-k feature store candidates for a job description."""
+    jd_text = load_job_description(jd_path)
+    if not jd_text:
+        print("Error: Could not load job description")
+        return
+    
+    feature_store = get_feature_store()
+    ranked = feature_store.rank_jd(parse_job_description(jd_text), models["embedding_model"], top_k=top_k)
+    stats = ranked["stats"]
+    print(f"\nTop {len(ranked['candidates'])} of {stats['pool_size']} stored candidates:")
+    for candidate in ranked["candidates"]:
+        print(f"{candidate['rank']:>3}. {candidate['match_score']['overall_score']:.2f}  {candidate['candidate_id']}  {candidate['name']}")
+    print(f"\nScored {stats['scored']} candidates, pruned {stats['pruned']} by upper bound")
+
+def required_models(args: argparse.Namespace) -> List[str]:
+    """Models the requested CLI actions use."""
+    names = ["embedding_model"]
+    if args.index_add or args.store_add or (args.resume and not (args.search_index or args.rank_store)):
+        names.append("ner_model")
+    if args.search_index and args.rerank_top_n != 0:
+        names.extend(["reranking_model", "reranking_tokenizer"])
+    return names
+
 def main():
     """Main function to run the resume matching pipeline."""
     # Parse command line arguments
     parser = argparse.ArgumentParser(description='Resume Matching Pipeline')
-    parser.add_argument('--resume', required=True, help='Path to resume PDF file')
-    parser.add_argument('--jd', required=True, help='Path to job description text file')
+    parser.add_argument('--resume', help='Path to resume PDF file')
+    parser.add_argument('--jd', help='Path to job description text file')
+    parser.add_argument('--catalog-add', nargs='+', metavar='JD_FILE', help='Add job description text files to the JD catalog')
+    parser.add_argument('--match-catalog', action='store_true', help='Rank the JD catalog for the resume instead of matching a single JD')
+    parser.add_argument('--index-add', nargs='+', metavar='RESUME_FILE', help='Add resume PDF files to the resume vector index')
+    parser.add_argument('--search-index', action='store_true', help='Return the top-k indexed candidates for --jd')
+    parser.add_argument('--store-add', nargs='+', metavar='RESUME_FILE', help='Add resume PDF files to the resume feature store')
+    parser.add_argument('--rank-store', action='store_true', help='Score every stored candidate against --jd and return the top-k')
+    parser.add_argument('--top-k', type=int, default=10, help='Number of results to return with --match-catalog, --search-index or --rank-store')
+    parser.add_argument('--rerank-top-n', type=int, default=None, help='Number of first-stage candidates to rerank with --search-index (0 disables reranking)')
     args = parser.parse_args()
     
-    # Load models
-    models = load_models()
+    if args.search_index and not args.jd:
+        parser.error('--search-index requires --jd')
+    if args.rank_store and not args.jd:
+        parser.error('--rank-store requires --jd')
+    if not (args.catalog_add or args.index_add or args.search_index or args.store_add or args.rank_store) and not args.resume:
+        parser.error('--resume is required')
+    if args.resume and not args.match_catalog and not args.jd:
+        parser.error('--jd is required unless --match-catalog is given')
+    
+    # Load only the models this run needs
+    models = load_models(required_models(args))
+    
+    if args.catalog_add:
+        add_jobs_to_catalog(args.catalog_add, models)
+    
+    if args.index_add:
+        add_resumes_to_index(args.index_add, models)
+    
+    if args.store_add:
+        add_resumes_to_store(args.store_add, models)
+    
+    if args.search_index:
+        search_index(args.jd, args.top_k, args.rerank_top_n, models)
+        return
+    
+    if args.rank_store:
+        rank_store(args.jd, args.top_k, models)
+        return
+    
+    if not args.resume:
+        return
+    
+    if args.match_catalog:
+        match_catalog(args.resume, args.top_k, models)
+        return
     
     # Process resume
     resume_text = extract_text_from_pdf(args.resume)
@@ -178,4 +316,5 @@ def calculate_skill_match(resume_skills, jd_skills, model):
 def calculate_semantic_similarity(text1, text2, model):
     embedding1 = model.encode([text1])[0]
     embedding2 = model.encode([text2])[0]
+    import torch
     return torch.dot(torch.tensor(embedding1), torch.tensor(embedding2)).item()
\ No newline at end of file
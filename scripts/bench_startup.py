@@ -0,0 +1,120 @@
+"""Cold-start benchmark for the CLI: import time and wall time to first result.
+
+Each run is a fresh interpreter. Import time comes from ``python -X importtime``,
+the time to first result from running main.py end to end. The medians are
+compared with STARTUP_BUDGET_CONFIG, appended to the benchmark history, and the
+script exits with status 1 when either exceeds its budget.
+
+Usage:
+    python scripts/bench_startup.py
+    python scripts/bench_startup.py --imports-only
+    python scripts/bench_startup.py --runs 5 -- --resume cv.pdf --jd jd.txt
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Any, List
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from config.config import config
+
+def parse_importtime(stderr: str) -> List[Dict[str, Any]]:
+    """Parse ``-X importtime`` output into (module, self_us, cumulative_us, depth) records."""
+    records = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        except ValueError:
+            continue
+        depth = (len(name) - len(name.lstrip())) // 2
+        records.append({"module": name.strip(), "self_us": int(self_us), "cumulative_us": int(cumulative_us), "depth": depth})
+    return records
+
+def profile_import(module: str) -> Dict[str, Any]:
+    """Import a module in a fresh interpreter and report its import time by top-level package."""
+    start = time.perf_counter()
+    completed = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                               cwd=config["base_dir"], capture_output=True, text=True)
+    wall_seconds = time.perf_counter() - start
+    if completed.returncode != 0:
+        raise SystemExit(f"Importing {module} failed:\n{completed.stderr[-2000:]}")
+    records = parse_importtime(completed.stderr)
+    by_package = defaultdict(int)
+    for record in records:
+        by_package[record["module"].split(".")[0]] += record["self_us"]
+    top_level = next((r for r in reversed(records) if r["module"] == module), None)
+    return {
+        "import_seconds": (top_level["cumulative_us"] if top_level else sum(by_package.values())) / 1e6,
+        "wall_seconds": wall_seconds,
+        "modules": len(records),
+        "packages": dict(sorted(by_package.items(), key=lambda item: item[1], reverse=True)),
+    }
+
+def time_first_result(main_args: List[str]) -> float:
+    """Wall time of one end-to-end CLI run in a fresh interpreter."""
+    start = time.perf_counter()
+    completed = subprocess.run([sys.executable, "main.py", *main_args], cwd=config["base_dir"],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    elapsed = time.perf_counter() - start
+    if completed.returncode != 0:
+        raise SystemExit(f"main.py {' '.join(main_args)} failed:\n{completed.stderr[-2000:]}")
+    return elapsed
+
+def main():
+    budget = config["startup_budget_config"]
+    parser = argparse.ArgumentParser(description="Benchmark CLI cold-start time against the configured budget")
+    parser.add_argument("--runs", type=int, default=budget["runs"], help="Fresh interpreters per measurement; the median is reported")
+    parser.add_argument("--module", default="main", help="Module whose import time is measured")
+    parser.add_argument("--imports-only", action="store_true", help="Skip the end-to-end run (no models needed)")
+    parser.add_argument("--top", type=int, default=10, help="Slowest top-level packages to list")
+    parser.add_argument("main_args", nargs="*", help="Arguments for main.py, after --; defaults to the configured resume and JD")
+    args = parser.parse_args()
+
+    profiles = [profile_import(args.module) for _ in range(args.runs)]
+    result: Dict[str, Any] = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "module": args.module,
+        "import_seconds": round(statistics.median(p["import_seconds"] for p in profiles), 4),
+        "import_wall_seconds": round(statistics.median(p["wall_seconds"] for p in profiles), 4),
+        "modules_imported": profiles[-1]["modules"],
+    }
+    print(f"Import of {args.module}: {result['import_seconds']:.3f}s (interpreter wall {result['import_wall_seconds']:.3f}s, "
+          f"{result['modules_imported']} modules), budget {budget['import_seconds']}s")
+    for package, self_us in list(profiles[-1]["packages"].items())[:args.top]:
+        print(f"  {self_us / 1e3:>9.1f} ms  {package}")
+
+    failures = []
+    if result["import_seconds"] > budget["import_seconds"]:
+        failures.append(f"import {result['import_seconds']:.3f}s > {budget['import_seconds']}s")
+
+    if not args.imports_only:
+        main_args = args.main_args or ["--resume", config["resume_path"], "--jd", config["job_description_path"]]
+        runs = [time_first_result(main_args) for _ in range(args.runs)]
+        result["main_args"] = main_args
+        result["first_result_seconds"] = round(statistics.median(runs), 4)
+        print(f"First result: {result['first_result_seconds']:.3f}s (median of {len(runs)}), budget {budget['first_result_seconds']}s")
+        if result["first_result_seconds"] > budget["first_result_seconds"]:
+            failures.append(f"first result {result['first_result_seconds']:.3f}s > {budget['first_result_seconds']}s")
+
+    result["passed"] = not failures
+    os.makedirs(os.path.dirname(budget["history_path"]), exist_ok=True)
+    with open(budget["history_path"], "a", encoding="utf-8") as f:
+        f.write(json.dumps(result) + "\n")
+
+    if failures:
+        print("Startup budget exceeded: " + "; ".join(failures))
+        sys.exit(1)
+    print("Startup within budget")
+
+if __name__ == "__main__":
+    main()
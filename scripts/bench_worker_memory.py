@@ -0,0 +1,178 @@
+"""Per-worker memory of the web app, pre-fork serving versus independent workers.
+
+Starts the server in each mode, waits until it is ready and its memory has
+settled, optionally sends some /api/match requests, and then reads RSS, PSS
+(RSS with shared pages split between the processes sharing them) and USS
+(private pages only) of every worker from /proc. With pre-forking, the model
+weights show up as shared pages, so the PSS and USS per worker drop well below
+the RSS. Linux only.
+
+Modes:
+    prefork      gunicorn -c web/gunicorn_conf.py web.app:app (models loaded once in the master)
+    independent  uvicorn web.app:app --workers N (every worker loads its own models)
+
+Usage:
+    python scripts/bench_worker_memory.py --workers 4
+    python scripts/bench_worker_memory.py --modes prefork --requests 20 --json
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+import subprocess
+import urllib.parse
+import urllib.request
+import urllib.error
+from typing import Dict, Any, List, Optional
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from config.config import config
+
+MODES = ("prefork", "independent")
+
+def server_command(mode: str, workers: int, port: int) -> List[str]:
+    if mode == "prefork":
+        return [sys.executable, "-m", "gunicorn", "-c", "web/gunicorn_conf.py", "--workers", str(workers),
+                "--bind", f"127.0.0.1:{port}", "web.app:app"]
+    return [sys.executable, "-m", "uvicorn", "web.app:app", "--workers", str(workers), "--host", "127.0.0.1", "--port", str(port)]
+
+def memory_kb(pid: int) -> Optional[Dict[str, int]]:
+    """Rss, Pss and USS (private clean + private dirty) of a process in KiB."""
+    try:
+        with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+            fields = {line.split(":")[0]: int(line.split()[1]) for line in f if line.split()[-1:] == ["kB"]}
+    except OSError:
+        return None
+    return {"rss": fields.get("Rss", 0), "pss": fields.get("Pss", 0),
+            "uss": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0)}
+
+def child_pids(pid: int) -> List[int]:
+    pids = []
+    try:
+        for task in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{task}/children", "r") as f:
+                pids.extend(int(child) for child in f.read().split())
+    except OSError:
+        pass
+    return pids
+
+def worker_pids(pid: int) -> List[int]:
+    """Server worker processes, leaving out multiprocessing helper processes."""
+    workers = []
+    for child in child_pids(pid):
+        try:
+            with open(f"/proc/{child}/cmdline", "rb") as f:
+                cmdline = f.read().replace(b"\0", b" ").decode(errors="replace")
+        except OSError:
+            continue
+        if "resource_tracker" not in cmdline:
+            workers.append(child)
+    return workers
+
+def wait_until_ready(port: int, server: subprocess.Popen, timeout: float) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if server.poll() is not None:
+            raise SystemExit(f"Server exited with status {server.returncode} before becoming ready")
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/readyz", timeout=5) as response:
+                if response.status == 200:
+                    return
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(1)
+    raise SystemExit(f"Server not ready after {timeout}s")
+
+def wait_until_settled(pid: int, workers: int, settle: float, timeout: float) -> None:
+    """Wait until all workers exist and their total RSS has not grown for `settle` seconds.
+
+    /readyz answers from whichever worker accepts the request, so independent
+    workers may still be loading their models when it first returns 200.
+    """
+    deadline = time.time() + timeout
+    last_total, stable_since = -1, time.time()
+    while time.time() < deadline:
+        pids = worker_pids(pid)
+        total = sum((memory_kb(p) or {"rss": 0})["rss"] for p in pids)
+        if len(pids) < workers or total > last_total * 1.01:
+            last_total, stable_since = total, time.time()
+        elif time.time() - stable_since >= settle:
+            return
+        time.sleep(1)
+
+def send_match_requests(port: int, count: int, resume_path: str, jd_path: str) -> None:
+    """POST one resume and JD to /api/match `count` times, so inference has run in the workers."""
+    with open(resume_path, "rb") as f:
+        resume = f.read()
+    with open(jd_path, "r", encoding="utf-8") as f:
+        jd_text = f.read()
+    boundary = uuid.uuid4().hex
+    body = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"resumes\"; filename=\"{os.path.basename(resume_path)}\"\r\n"
+            f"Content-Type: application/pdf\r\n\r\n").encode() + resume + f"\r\n--{boundary}--\r\n".encode()
+    url = f"http://127.0.0.1:{port}/api/match?" + urllib.parse.urlencode({"jd_text": jd_text})
+    for _ in range(count):
+        request = urllib.request.Request(url, data=body, headers={"Content-Type": f"multipart/form-data; boundary={boundary}"})
+        with urllib.request.urlopen(request, timeout=120) as response:
+            response.read()
+
+def measure(mode: str, args: argparse.Namespace) -> Dict[str, Any]:
+    env = dict(os.environ, WEB_CONCURRENCY=str(args.workers))
+    server = subprocess.Popen(server_command(mode, args.workers, args.port), cwd=config["base_dir"], env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        start = time.time()
+        wait_until_ready(args.port, server, args.timeout)
+        wait_until_settled(server.pid, args.workers, args.settle, args.timeout)
+        ready_seconds = time.time() - start
+        if args.requests:
+            send_match_requests(args.port, args.requests, args.resume, args.jd)
+        workers = {pid: memory_kb(pid) for pid in worker_pids(server.pid)}
+        workers = {pid: usage for pid, usage in workers.items() if usage}
+        parent = memory_kb(server.pid) or {"rss": 0, "pss": 0, "uss": 0}
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+    count = max(len(workers), 1)
+    return {
+        "mode": mode,
+        "workers": len(workers),
+        "ready_seconds": round(ready_seconds, 1),
+        "parent_mb": {key: round(value / 1024, 1) for key, value in parent.items()},
+        "per_worker_mb": {pid: {key: round(value / 1024, 1) for key, value in usage.items()} for pid, usage in workers.items()},
+        "mean_worker_mb": {key: round(sum(u[key] for u in workers.values()) / count / 1024, 1) for key in ("rss", "pss", "uss")},
+        # PSS adds up to the real footprint; summing RSS would count shared pages once per process
+        "total_pss_mb": round((parent["pss"] + sum(u["pss"] for u in workers.values())) / 1024, 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-worker memory of pre-fork and independent workers")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    parser.add_argument("--workers", type=int, default=config["serving_config"]["workers"])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--requests", type=int, default=0, help="/api/match requests to send before measuring")
+    parser.add_argument("--resume", default=config["resume_path"], help="Resume PDF used for --requests")
+    parser.add_argument("--jd", default=config["job_description_path"], help="Job description used for --requests")
+    parser.add_argument("--settle", type=float, default=5.0, help="Seconds without RSS growth before measuring")
+    parser.add_argument("--timeout", type=float, default=600.0)
+    parser.add_argument("--json", action="store_true", help="Print the full results as JSON")
+    args = parser.parse_args()
+
+    results = [measure(mode, args) for mode in args.modes]
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{'mode':<12} {'workers':>7} {'worker RSS':>11} {'worker PSS':>11} {'worker USS':>11} {'parent RSS':>11} {'total PSS':>10}")
+    for result in results:
+        mean = result["mean_worker_mb"]
+        print(f"{result['mode']:<12} {result['workers']:>7} {mean['rss']:>9.1f}MB {mean['pss']:>9.1f}MB {mean['uss']:>9.1f}MB "
+              f"{result['parent_mb']['rss']:>9.1f}MB {result['total_pss_mb']:>8.1f}MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""Recall@k and memory of quantized resume index storage versus float32.
+
+Vectors come from the existing resume index (or are generated with --synthetic).
+A held-out sample is used as queries, the remaining vectors form the pool, and
+every quantization mode is searched at each rescore factor and compared with
+exact float32 search.
+
+Usage:
+    python scripts/eval_quantization.py --k 10 --rescore-factors 1 4 10
+    python scripts/eval_quantization.py --synthetic 20000 --dim 384
+"""
+import os
+import sys
+import argparse
+import tempfile
+import logging
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from config.config import config
+from utils.resume_index import ResumeIndex, QUANTIZATION_MODES, code_size
+
+def load_vectors(index_path: str) -> np.ndarray:
+    resume_index = ResumeIndex(index_path)
+    if resume_index.index is None:
+        raise SystemExit(f"No resume index at {index_path}; ingest resumes first or use --synthetic")
+    _, vectors = resume_index._live_vectors()
+    return vectors
+
+def synthetic_vectors(count: int, dim: int, seed: int) -> np.ndarray:
+    """Clustered random unit vectors, a rough stand-in for document embeddings."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(1, count // 200), dim))
+    vectors = centers[rng.integers(0, len(centers), count)] + 0.7 * rng.normal(size=(count, dim))
+    return vectors.astype(np.float32)
+
+def recall_at_k(resume_index: ResumeIndex, queries: np.ndarray, truth: np.ndarray, k: int) -> float:
+    hits = 0
+    for query, expected in zip(queries, truth):
+        found = {int(candidate_id) for candidate_id, _ in resume_index.search(query, k)}
+        hits += len(found.intersection(expected.tolist()))
+    return hits / truth.size
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate quantized resume index storage")
+    parser.add_argument("--index", default=config["faiss_index_path"], help="Resume index to take vectors from")
+    parser.add_argument("--synthetic", type=int, default=0, help="Use this many synthetic vectors instead of the index")
+    parser.add_argument("--dim", type=int, default=384, help="Dimension of synthetic vectors")
+    parser.add_argument("--queries", type=int, default=100, help="Number of held-out query vectors")
+    parser.add_argument("--k", type=int, default=10, help="Recall cut-off")
+    parser.add_argument("--mode", default="flat", help="Index mode (flat, ivf or hnsw)")
+    parser.add_argument("--rescore-factors", type=int, nargs="+", default=[1, config["resume_index_config"]["rescore_factor"], 10])
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    vectors = synthetic_vectors(args.synthetic, args.dim, args.seed) if args.synthetic else load_vectors(args.index)
+    vectors /= np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-8)
+    rng = np.random.default_rng(args.seed)
+    order = rng.permutation(len(vectors))
+    queries, pool = vectors[order[:args.queries]], vectors[order[args.queries:]]
+    if len(pool) < args.k:
+        raise SystemExit(f"Need more than {args.queries + args.k} vectors, found {len(vectors)}")
+    truth = np.argsort(-(queries @ pool.T), axis=1)[:, :args.k]
+    dim = pool.shape[1]
+
+    print(f"{len(pool)} vectors x {dim} dims, {len(queries)} queries, recall@{args.k}, {args.mode} index\n")
+    print(f"{'storage':<8} {'rescore':>7} {'recall':>7} {'bytes/vec':>9} {'codes MB':>9} {'saving':>7}")
+    for quantization in QUANTIZATION_MODES:
+        factors = [1] if quantization == "none" else args.rescore_factors
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            resume_index = ResumeIndex(os.path.join(tmp_dir, "index"), mode=args.mode, quantization=quantization)
+            resume_index.upsert([str(i) for i in range(len(pool))], pool)
+            resume_index.save()
+            bytes_per_vector = code_size(quantization, dim)
+            for factor in factors:
+                resume_index.rescore_factor = factor
+                recall = recall_at_k(resume_index, queries, truth, args.k)
+                print(f"{quantization:<8} {factor:>7} {recall:>7.3f} {bytes_per_vector:>9} "
+                      f"{bytes_per_vector * len(pool) / 2**20:>9.1f} {code_size('none', dim) / bytes_per_vector:>6.0f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+from utils.chunking import split_chunks
+
+def fake_tokenizer(words, add_special_tokens=False):
+    """One token per three characters of a word, at least one."""
+    return {"input_ids": [[0] * max(1, len(word) // 3) for word in words]}
+
+def token_count(text):
+    return sum(len(ids) for ids in fake_tokenizer(text.split())["input_ids"])
+
+def test_document_within_budget_is_one_unchanged_chunk():
+    text = "Backend Engineer\n\nRequired skills: Python, SQL\n\nRemote"
+    assert split_chunks(text, fake_tokenizer, 32) == [text]
+
+def test_long_document_splits_at_paragraphs_within_budget():
+    first = "Python developer with Kubernetes experience"
+    second = " ".join(["microservices"] * 12)
+    chunks = split_chunks(f"{first}\n\n{second}", fake_tokenizer, 16)
+
+    assert chunks[0] == first
+    assert " ".join(chunks[1:]) == second
+    assert all(token_count(chunk) <= 16 for chunk in chunks)
+
+def test_empty_document_has_no_chunks():
+    assert split_chunks("  \n\n ", fake_tokenizer, 16) == []
@@ -0,0 +1,16 @@
+import pytest
+
+extraction = pytest.importorskip("utils.section_entity_extraction")
+
+HEADER = ["Jane Doe | San Francisco", "jane@example.com"]
+
+def test_heuristic_name_uses_first_segment_inside_cascade():
+    field = extraction._heuristic_name(HEADER, None, segmented=True)
+    assert field["value"] == "Jane Doe"
+    assert field["stage"] == "heuristic"
+
+def test_heuristic_name_uses_whole_line_without_cascade():
+    # Same rule as before the cascade: a capitalized 2-3 word line, separators included
+    assert extraction._heuristic_name(["Jane Doe Smith"], None, segmented=False)["value"] == "Jane Doe Smith"
+    assert extraction._heuristic_name(HEADER, None, segmented=False)["value"] == ""
+    assert extraction._heuristic_name(["Jane Doe | Austin", "John Smith"], None, segmented=False)["value"] == "John Smith"
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+import utils.jd_catalog as jd_catalog
+from utils.jd_catalog import JDCatalog
+
+DIM = 4
+
+@pytest.fixture
+def catalog(tmp_path, monkeypatch):
+    """Catalog with deterministic fake embeddings instead of a sentence transformer."""
+    def fake_document_embeddings(texts, model):
+        vectors = np.array([[len(text) % 7 + 1.0, 1.0, 0.0, 0.0] for text in texts], dtype=np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    encoded = []
+    def fake_skill_vectors(skills, model):
+        encoded.extend(skills)
+        return {skill: np.full(DIM, 0.5, dtype=np.float32) for skill in skills}
+
+    monkeypatch.setattr(jd_catalog, "_document_embeddings", fake_document_embeddings)
+    monkeypatch.setattr(jd_catalog, "_encode_skill_vectors", fake_skill_vectors)
+    monkeypatch.setattr(jd_catalog, "model_identity", lambda model: ("fake-model", "1"))
+    monkeypatch.setattr(jd_catalog, "calculate_match_score", lambda resume, jd, model: {"overall_score": 0.0, "title": jd.get("title", "")})
+    catalog = JDCatalog(str(tmp_path / "catalog"))
+    catalog.encoded_skills = encoded
+    return catalog
+
+RESUME = {"skills": [{"name": "Python"}], "work": [], "education": [], "summary": "Python developer"}
+
+def test_add_jobs_encodes_only_new_skills(catalog):
+    catalog.add_jobs({"backend": "Backend Engineer\nRequired skills: Python, SQL"}, None)
+    encoded_before = list(catalog.encoded_skills)
+    catalog.add_jobs({"frontend": "Frontend Engineer\nRequired skills: Python, React"}, None)
+
+    new_encodes = catalog.encoded_skills[len(encoded_before):]
+    assert new_encodes == ["React"]
+    assert catalog.skill_matrix.shape == (2, len(catalog.skill_vocab))
+    assert catalog.jd_embeddings.shape == (2, DIM)
+
+def test_match_uses_jobs_it_scored_when_a_job_is_added_meanwhile(catalog, monkeypatch):
+    catalog.add_jobs({"backend": "Backend Engineer\nRequired skills: Python, SQL"}, None)
+    real_experience = jd_catalog.calculate_total_experience
+    added = []
+
+    def add_during_scoring(work):
+        # Runs after the catalog snapshot is taken and before the scores are ranked
+        if not added:
+            added.append(True)
+            catalog.add_jobs({"data": "Data Engineer\nRequired skills: Docker"}, None)
+        return real_experience(work)
+
+    monkeypatch.setattr(jd_catalog, "calculate_total_experience", add_during_scoring)
+    results = catalog.match(RESUME, None, top_k=5)
+
+    assert added
+    assert [result["jd_id"] for result in results] == ["backend"]
+    assert len(catalog) == 2
+    assert [result["jd_id"] for result in catalog.match(RESUME, None, top_k=5)].count("data") == 1
+
+def test_match_rejects_non_positive_top_k(catalog):
+    catalog.add_jobs({"backend": "Backend Engineer\nRequired skills: Python"}, None)
+    with pytest.raises(ValueError):
+        catalog.match(RESUME, None, top_k=0)
@@ -0,0 +1,131 @@
+import re
+import copy
+import logging
+import threading
+from typing import List
+import numpy as np
+from config.config import config
+from utils.embedding_cache import encode_texts
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Blank lines separate paragraphs; resume and JD sections always start a new paragraph
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+
+def chunk_token_budget(model) -> int:
+    """Tokens a chunk may hold: the configured max_seq_length (or the model's, if lower) less [CLS] and [SEP]."""
+    max_tokens = config["embedding_chunk_config"]["max_tokens"]
+    if max_tokens:
+        return max_tokens
+    max_seq_length = config["model_config"]["sentence_transformer"]["max_seq_length"]
+    max_seq_length = min(max_seq_length, getattr(model, "max_seq_length", None) or max_seq_length)
+    return max(1, max_seq_length - 2)
+
+# Per-thread copies of the model tokenizer used to count tokens
+_thread_tokenizers = threading.local()
+
+def _counting_tokenizer(tokenizer):
+    """This thread's own copy of the model tokenizer.
+
+    A fast tokenizer changes its truncation and padding state on every call, so
+    sharing the model's instance with a concurrent model.encode can fail with
+    "Already borrowed".
+    """
+    copies = getattr(_thread_tokenizers, "copies", None)
+    if copies is None:
+        copies = _thread_tokenizers.copies = {}
+    source, own = copies.get(id(tokenizer), (None, None))
+    if source is not tokenizer:
+        source, own = tokenizer, copy.deepcopy(tokenizer)
+        copies[id(tokenizer)] = (source, own)
+    return own
+
+def _token_lengths(words: List[str], tokenizer) -> List[int]:
+    """Subword tokens of each word, tokenizing every distinct word once."""
+    distinct = list(dict.fromkeys(words))
+    token_ids = _counting_tokenizer(tokenizer)(distinct, add_special_tokens=False)["input_ids"]
+    lengths = dict(zip(distinct, (len(ids) for ids in token_ids)))
+    return [max(lengths[word], 1) for word in words]
+
+def _split_long(paragraph: str, max_tokens: int, tokenizer) -> List[str]:
+    """Split a paragraph over max_tokens at line boundaries, and lines over max_tokens into word windows."""
+    pieces: List[str] = []
+    current: List[str] = []
+    current_tokens = 0
+    for line in paragraph.splitlines():
+        words = line.split()
+        lengths = _token_lengths(words, tokenizer) if words else []
+        line_tokens = sum(lengths)
+        if current and current_tokens + line_tokens > max_tokens:
+            pieces.append(" ".join(current))
+            current, current_tokens = [], 0
+        if line_tokens <= max_tokens:
+            current.extend(words)
+            current_tokens += line_tokens
+            continue
+        # A line that alone exceeds the budget is cut into windows of whole words
+        for word, length in zip(words, lengths):
+            if current and current_tokens + length > max_tokens:
+                pieces.append(" ".join(current))
+                current, current_tokens = [], 0
+            current.append(word)
+            current_tokens += length
+    if current:
+        pieces.append(" ".join(current))
+    return pieces
+
+def split_chunks(text: str, tokenizer, max_tokens: int) -> List[str]:
+    """Split a document into stable chunks of at most max_tokens subword tokens.
+
+    Lengths are counted with the embedding model's own tokenizer, so chunks are
+    never truncated by the model, however many subword tokens skills, acronyms,
+    URLs or numbers turn into. A document that fits in max_tokens stays one
+    chunk of its unchanged text, so it keeps its unchunked embedding. Longer
+    documents are split so that chunk boundaries only depend on the paragraph a
+    chunk comes from, and editing one paragraph changes only that paragraph's
+    chunks.
+    """
+    words = (text or "").split()
+    if words and sum(_token_lengths(words, tokenizer)) <= max_tokens:
+        return [text]
+    chunks: List[str] = []
+    for paragraph in PARAGRAPH_BREAK.split(text or ""):
+        words = paragraph.split()
+        if not words:
+            continue
+        if sum(_token_lengths(words, tokenizer)) <= max_tokens:
+            chunks.append(" ".join(words))
+        else:
+            chunks.extend(_split_long(paragraph, max_tokens, tokenizer))
+    return chunks
+
+def chunked_document_embeddings(texts: List[str], model) -> np.ndarray:
+    """Document vectors pooled from per-chunk embeddings, one unnormalized row per text.
+
+    Every chunk goes through the shared embedding cache, so only chunks that
+    were never seen before are encoded. Chunk vectors are L2-normalized and
+    averaged with their word counts as weights. Documents beyond max_chunks
+    chunks are truncated to bound the cost of pathological inputs.
+    """
+    chunk_config = config["embedding_chunk_config"]
+    max_tokens = chunk_token_budget(model)
+    doc_chunks = []
+    for text in texts:
+        chunks = split_chunks(text, model.tokenizer, max_tokens)[:chunk_config["max_chunks"]]
+        # Empty documents keep their single empty-string embedding
+        doc_chunks.append(chunks or [text or ""])
+
+    flat_chunks = [chunk for chunks in doc_chunks for chunk in chunks]
+    vectors = encode_texts(model, flat_chunks)
+    vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-8)
+    weights = np.array([max(len(chunk.split()), 1) for chunk in flat_chunks], dtype=np.float32)
+
+    pooled = np.zeros((len(texts), vectors.shape[1]), dtype=np.float32)
+    start = 0
+    for row, chunks in enumerate(doc_chunks):
+        end = start + len(chunks)
+        pooled[row] = weights[start:end] @ vectors[start:end] / weights[start:end].sum()
+        start = end
+    return pooled
@@ -0,0 +1,316 @@
+import os
+import fcntl
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+from config.config import config
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def normalize_cache_text(text: str) -> str:
+    """Collapse whitespace so trivially different strings share one cache entry."""
+    return " ".join(str(text).split())
+
+def model_identity(model) -> Tuple[str, str]:
+    """Return a (model name, model version) pair identifying an embedding model.
+
+    The name and version are read from the underlying transformers config when
+    available, so vectors from different checkpoints never share a cache entry.
+    Models on a non-default inference backend get the backend appended to their
+    version, since quantized vectors differ slightly from float32 ones.
+    """
+    name = getattr(model, "cache_model_name", None)
+    version = getattr(model, "cache_model_version", None)
+    try:
+        auto_config = model._first_module().auto_model.config
+        name = name or getattr(auto_config, "_name_or_path", None)
+        version = version or getattr(auto_config, "_commit_hash", None) or getattr(auto_config, "transformers_version", None)
+    except Exception:
+        pass
+    version = version or "unversioned"
+    backend = getattr(model, "inference_backend", "torch")
+    if backend != "torch":
+        version = f"{version}+{backend}"
+    return name or type(model).__name__, version
+
+class EmbeddingCache:
+    """Two-tier embedding cache for a single model.
+
+    The first tier is a bounded in-memory LRU. The second tier lives on disk as a
+    float32 vector file read through ``np.memmap`` plus an append-only key log
+    mapping text hashes to vector rows, so entries survive restarts and are shared
+    by every process pointed at the same directory.
+
+    Once the disk tier holds more than disk_max_items vectors, the newest half
+    is copied into a new generation of files and the older entries are dropped.
+    meta.json names the current generation, and processes switch to it on their
+    next lookup. Writes and compactions hold an exclusive lock on a lock file.
+    """
+
+    def __init__(self, model_name: str, model_version: str, cache_dir: Optional[str] = None,
+                 memory_max_items: int = 50000, disk_enabled: bool = True, disk_max_items: Optional[int] = None):
+        self.model_name = model_name
+        self.model_version = model_version
+        self.memory_max_items = memory_max_items
+        self.disk_enabled = disk_enabled
+        self.disk_max_items = disk_max_items
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._disk_index: Dict[str, int] = {}
+        self._keys_offset = 0
+        self._dim: Optional[int] = None
+        self._vectors: Optional[np.memmap] = None
+        self._generation = 0
+        self._meta_stamp: Optional[Tuple[int, int]] = None
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0, "disk_writes": 0, "disk_evictions": 0}
+
+        self._dir = None
+        if disk_enabled:
+            model_key = hashlib.sha1(f"{model_name}\0{model_version}".encode("utf-8")).hexdigest()[:16]
+            self._dir = os.path.join(cache_dir or config["embedding_cache_config"]["cache_dir"], model_key)
+            os.makedirs(self._dir, exist_ok=True)
+            self._meta_path = os.path.join(self._dir, "meta.json")
+            self._lock_path = os.path.join(self._dir, "lock")
+            self._use_generation(0)
+            self._sync_disk_index()
+
+    def key(self, text: str) -> str:
+        """Cache key for a text: hash of model name, model version and normalized text."""
+        raw = f"{self.model_name}\0{self.model_version}\0{normalize_cache_text(text)}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def get_many(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """Look texts up in memory, then on disk. Missing entries are returned as None."""
+        results: List[Optional[np.ndarray]] = []
+        with self._lock:
+            if self.disk_enabled:
+                self._sync_disk_index()
+            for text in texts:
+                key = self.key(text)
+                vector = self._memory.get(key)
+                if vector is not None:
+                    self._memory.move_to_end(key)
+                    self._counters["memory_hits"] += 1
+                    results.append(vector)
+                    continue
+                vector = self._disk_get(key)
+                if vector is not None:
+                    self._counters["disk_hits"] += 1
+                    self._memory_put(key, vector)
+                    results.append(vector)
+                    continue
+                self._counters["misses"] += 1
+                results.append(None)
+        return results
+
+    def put_many(self, texts: List[str], vectors: np.ndarray) -> None:
+        """Store freshly computed vectors in both tiers."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        keys = [self.key(text) for text in texts]
+        with self._lock:
+            for key, vector in zip(keys, vectors):
+                self._memory_put(key, vector)
+            if self.disk_enabled:
+                try:
+                    self._disk_put_many(keys, vectors)
+                except OSError as e:
+                    logger.warning(f"Could not write embedding cache to disk: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit, miss and eviction counters plus tier sizes."""
+        with self._lock:
+            lookups = self._counters["memory_hits"] + self._counters["disk_hits"] + self._counters["misses"]
+            hits = self._counters["memory_hits"] + self._counters["disk_hits"]
+            return {
+                "model_name": self.model_name,
+                "model_version": self.model_version,
+                **self._counters,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "memory_items": len(self._memory),
+                "memory_max_items": self.memory_max_items,
+                "disk_items": len(self._disk_index),
+                "disk_max_items": self.disk_max_items,
+            }
+
+    def _memory_put(self, key: str, vector: np.ndarray) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_max_items:
+            self._memory.popitem(last=False)
+            self._counters["evictions"] += 1
+
+    def _generation_paths(self, generation: int) -> Tuple[str, str]:
+        """Vector file and key log of a generation; generation 0 keeps the original file names."""
+        suffix = f".{generation}" if generation else ""
+        return os.path.join(self._dir, f"vectors{suffix}.f32"), os.path.join(self._dir, f"keys{suffix}.log")
+
+    def _use_generation(self, generation: int) -> None:
+        """Switch to a generation's files and forget the index of the previous one."""
+        self._generation = generation
+        self._vectors_path, self._keys_path = self._generation_paths(generation)
+        self._disk_index = {}
+        self._keys_offset = 0
+        self._vectors = None
+
+    def _sync_meta(self) -> None:
+        """Re-read meta.json when another process has replaced it, switching to its generation."""
+        try:
+            stat = os.stat(self._meta_path)
+        except FileNotFoundError:
+            return
+        stamp = (stat.st_ino, stat.st_mtime_ns)
+        if stamp == self._meta_stamp:
+            return
+        with open(self._meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self._meta_stamp = stamp
+        self._dim = meta["dim"]
+        generation = meta.get("generation", 0)
+        if generation != self._generation:
+            self._use_generation(generation)
+
+    def _write_meta(self, generation: int) -> None:
+        """Atomically replace meta.json; callers hold the file lock."""
+        tmp_path = self._meta_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"model_name": self.model_name, "model_version": self.model_version, "dim": self._dim, "generation": generation}, f)
+        os.replace(tmp_path, self._meta_path)
+        self._sync_meta()
+
+    def _sync_disk_index(self) -> None:
+        """Read key log entries appended since the last sync, including those from other processes."""
+        self._sync_meta()
+        if not os.path.exists(self._keys_path) or os.path.getsize(self._keys_path) == self._keys_offset:
+            return
+        with open(self._keys_path, "r", encoding="utf-8") as f:
+            f.seek(self._keys_offset)
+            for line in f:
+                if not line.endswith("\n"):
+                    break  # Partially written line, picked up on the next sync
+                key, row = line.rstrip("\n").split("\t")
+                self._disk_index[key] = int(row)
+                self._keys_offset += len(line.encode("utf-8"))
+
+    def _disk_get(self, key: str) -> Optional[np.ndarray]:
+        row = self._disk_index.get(key)
+        if row is None or self._dim is None:
+            return None
+        if self._vectors is None or row >= self._vectors.shape[0]:
+            rows = os.path.getsize(self._vectors_path) // (self._dim * 4)
+            if row >= rows:
+                return None
+            self._vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(rows, self._dim))
+        return np.array(self._vectors[row])
+
+    def _disk_put_many(self, keys: List[str], vectors: np.ndarray) -> None:
+        with open(self._lock_path, "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                self._sync_disk_index()
+                if self._dim is None:
+                    self._dim = int(vectors.shape[1])
+                    self._write_meta(self._generation)
+                lines = []
+                next_row = len(self._disk_index)
+                fd = os.open(self._vectors_path, os.O_WRONLY | os.O_CREAT, 0o644)
+                try:
+                    for key, vector in zip(keys, vectors):
+                        if key in self._disk_index:
+                            continue
+                        os.pwrite(fd, vector.tobytes(), next_row * self._dim * 4)
+                        self._disk_index[key] = next_row
+                        lines.append(f"{key}\t{next_row}\n")
+                        next_row += 1
+                finally:
+                    os.close(fd)
+                if lines:
+                    with open(self._keys_path, "a", encoding="utf-8") as keys_file:
+                        keys_file.write("".join(lines))
+                    self._keys_offset = os.path.getsize(self._keys_path)
+                    self._counters["disk_writes"] += len(lines)
+                if self.disk_max_items and len(self._disk_index) > self.disk_max_items:
+                    self._compact()
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _compact(self) -> None:
+        """Copy the newest disk_max_items // 2 vectors into a new generation; callers hold the file lock."""
+        keep = sorted(self._disk_index.items(), key=lambda item: item[1])[-max(1, self.disk_max_items // 2):]
+        rows = np.array([row for _, row in keep], dtype=np.int64)
+        total_rows = os.path.getsize(self._vectors_path) // (self._dim * 4)
+        old_vectors = np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(total_rows, self._dim))
+        generation = self._generation + 1
+        vectors_path, keys_path = self._generation_paths(generation)
+        with open(vectors_path, "wb") as f:
+            for start in range(0, len(rows), 65536):
+                f.write(np.ascontiguousarray(old_vectors[rows[start:start + 65536]]).tobytes())
+        with open(keys_path, "w", encoding="utf-8") as f:
+            f.write("".join(f"{key}\t{row}\n" for row, (key, _) in enumerate(keep)))
+        del old_vectors
+        evicted = len(self._disk_index) - len(keep)
+        self._write_meta(generation)
+        self._sync_disk_index()
+        # Processes still reading the previous generation get one more compaction to switch
+        for path in self._generation_paths(generation - 2) if generation >= 2 else ():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+        self._counters["disk_evictions"] += evicted
+        logger.info(f"Compacted embedding cache {self._dir}: kept {len(keep)} vectors, evicted {evicted}")
+
+_caches: Dict[Tuple[str, str], EmbeddingCache] = {}
+_caches_lock = threading.Lock()
+
+def get_embedding_cache(model) -> EmbeddingCache:
+    """Return the shared cache for a model, creating it on first use."""
+    identity = model_identity(model)
+    with _caches_lock:
+        cache = _caches.get(identity)
+        if cache is None:
+            cache_config = config["embedding_cache_config"]
+            cache = EmbeddingCache(
+                identity[0],
+                identity[1],
+                cache_dir=cache_config["cache_dir"],
+                memory_max_items=cache_config["memory_max_items"],
+                disk_enabled=cache_config["disk_enabled"],
+                disk_max_items=cache_config["disk_max_items"],
+            )
+            _caches[identity] = cache
+        return cache
+
+def encode_texts(model, texts: List[str]) -> np.ndarray:
+    """Encode texts through the shared embedding cache.
+
+    Only texts missing from both cache tiers are sent to ``model.encode``, in a
+    single batched call. Returns a float32 array with one row per input text.
+    """
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+
+    cache = get_embedding_cache(model)
+    cached = cache.get_many(texts)
+
+    missing = list(dict.fromkeys(normalize_cache_text(text) for text, vector in zip(texts, cached) if vector is None))
+    if missing:
+        computed = np.asarray(model.encode(missing), dtype=np.float32)
+        cache.put_many(missing, computed)
+        computed_by_text = dict(zip(missing, computed))
+        cached = [vector if vector is not None else computed_by_text[normalize_cache_text(text)]
+                  for text, vector in zip(texts, cached)]
+
+    return np.stack(cached).astype(np.float32, copy=False)
+
+def embedding_cache_stats() -> List[Dict[str, Any]]:
+    """Counters for every embedding cache created in this process."""
+    with _caches_lock:
+        caches = list(_caches.values())
+    return [cache.stats() for cache in caches]
@@ -1,17 +1,20 @@
-import torch
 import numpy as np
-from sentence_transformers import SentenceTransformer
-from faiss import read_index
 from config.config import config
-from typing import Dict, Any, List, Tuple
+from utils.embedding_cache import encode_texts
+from typing import TYPE_CHECKING, Dict, Any, List, Tuple
 import os
 
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
 def load_embedding_model():
+    from sentence_transformers import SentenceTransformer
     return SentenceTransformer(config['embedding_model_path'])
 
-def load_faiss_index():
+def load_faiss_index(index_path=None):
     try:
-        index_path = os.path.join(config["models_dir"], "faiss_index.bin")
+        from faiss import read_index
+        index_path = index_path or config["faiss_index_path"]
         if os.path.exists(index_path):
             return read_index(index_path)
         return None
@@ -20,7 +23,7 @@ def load_faiss_index():
         return None
 
 def embed_text(text, model):
-    return model.encode([text])[0]
+    return encode_texts(model, [text])[0]
 
 def search_similar_texts(query_embedding, faiss_index, top_k=5):
     D, I = faiss_index.search(query_embedding.reshape(1, -1), top_k)
@@ -29,6 +32,7 @@ def search_similar_texts(query_embedding, faiss_index, top_k=5):
 def calculate_semantic_similarity(text1, text2, model):
     embedding1 = embed_text(text1, model)
     embedding2 = embed_text(text2, model)
+    import torch
     return torch.dot(torch.tensor(embedding1), torch.tensor(embedding2)).item()
 
 def hybrid_scoring(semantic_score, skill_score, experience_score, education_score, weights):
@@ -37,7 +41,7 @@ def hybrid_scoring(semantic_score, skill_score, experience_score, education_scor
             experience_score * weights['experience'] +
             education_score * weights['education'])
 
-def calculate_embedding_similarity(resume: Dict[str, Any], job_description: Dict[str, Any], model: SentenceTransformer) -> float:
+def calculate_embedding_similarity(resume: Dict[str, Any], job_description: Dict[str, Any], model: "SentenceTransformer") -> float:
     """Calculate semantic similarity between resume and job description using embeddings."""
     # Extract relevant text from resume
     resume_text = []
@@ -64,8 +68,7 @@ def calculate_embedding_similarity(resume: Dict[str, Any], job_description: Dict
     jd_combined = " ".join(jd_text)
     
     # Calculate embeddings
-    resume_embedding = model.encode([resume_combined])[0]
-    jd_embedding = model.encode([jd_combined])[0]
+    resume_embedding, jd_embedding = encode_texts(model, [resume_combined, jd_combined])
     
     # Calculate cosine similarity
     similarity = np.dot(resume_embedding, jd_embedding) / (
@@ -74,11 +77,10 @@ def calculate_embedding_similarity(resume: Dict[str, Any], job_description: Dict
     
     return float(similarity)
 
-def match_resume_to_jd(resume_text: str, jd_text: str, model: SentenceTransformer) -> float:
+def match_resume_to_jd(resume_text: str, jd_text: str, model: "SentenceTransformer") -> float:
     """Calculate semantic similarity between resume and job description texts."""
     # Calculate embeddings
-    resume_embedding = model.encode([resume_text])[0]
-    jd_embedding = model.encode([jd_text])[0]
+    resume_embedding, jd_embedding = encode_texts(model, [resume_text, jd_text])
     
     # Calculate cosine similarity
     similarity = np.dot(resume_embedding, jd_embedding) / (
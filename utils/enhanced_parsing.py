@@ -1,29 +1,33 @@
 import re
-from typing import List, Dict, Any, Tuple
-from sentence_transformers import SentenceTransformer
+from typing import TYPE_CHECKING, List, Dict, Any, Tuple
 import numpy as np
+from utils.embedding_cache import encode_texts
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
+# Common programming languages and technologies
+TECH_KEYWORDS = [
+    # Programming Languages
+    "python", "java", "javascript", "typescript", "c#", "c++", "ruby", "php", "go", "rust",
+    # Web Technologies
+    "html", "css", "react", "angular", "vue", "node.js", "express", "django", "flask", "spring",
+    # Databases
+    "sql", "nosql", "mongodb", "postgresql", "mysql", "oracle", "redis", "cassandra",
+    # Cloud & DevOps
+    "aws", "azure", "gcp", "docker", "kubernetes", "jenkins", "git", "ci/cd", "terraform",
+    # Frameworks & Tools
+    "spring boot", "hibernate", "junit", "maven", "gradle", "npm", "yarn", "webpack",
+    # Methodologies
+    "agile", "scrum", "devops", "tdd", "bdd", "microservices", "rest", "graphql",
+    # Other
+    "linux", "unix", "shell scripting", "bash", "powershell"
+]
 
 def extract_skills(text: str) -> List[Dict[str, str]]:
     """Extract skills using keyword matching, regex patterns, and spaCy."""
     skills = []
-    
-    # Common programming languages and technologies
-    tech_keywords = [
-        # Programming Languages
-        "python", "java", "javascript", "typescript", "c#", "c++", "ruby", "php", "go", "rust",
-        # Web Technologies
-        "html", "css", "react", "angular", "vue", "node.js", "express", "django", "flask", "spring",
-        # Databases
-        "sql", "nosql", "mongodb", "postgresql", "mysql", "oracle", "redis", "cassandra",
-        # Cloud & DevOps
-        "aws", "azure", "gcp", "docker", "kubernetes", "jenkins", "git", "ci/cd", "terraform",
-        # Frameworks & Tools
-        "spring boot", "hibernate", "junit", "maven", "gradle", "npm", "yarn", "webpack",
-        # Methodologies
-        "agile", "scrum", "devops", "tdd", "bdd", "microservices", "rest", "graphql",
-        # Other
-        "linux", "unix", "shell scripting", "bash", "powershell"
-    ]
+    tech_keywords = TECH_KEYWORDS
     
     # Normalize text
     text_lower = text.lower()
@@ -217,7 +221,7 @@ def extract_work_experience(text: str) -> List[Dict[str, Any]]:
     
     return work_experiences
 
-def calculate_skill_match(resume_skills: List[Dict[str, str]], jd_skills: List[str], model: SentenceTransformer) -> Tuple[List[str], List[str], List[str]]:
+def calculate_skill_match(resume_skills: List[Dict[str, str]], jd_skills: List[str], model: "SentenceTransformer") -> Tuple[List[str], List[str], List[str]]:
     """Calculate skill matches between resume and job description with improved handling."""
     matched_skills = []
     missing_skills = []
@@ -244,8 +248,8 @@ def calculate_skill_match(resume_skills: List[Dict[str, str]], jd_skills: List[s
     
     return matched_skills, missing_skills, semantically_matched_skills
 
-def calculate_semantic_similarity(text1: str, text2: str, model: SentenceTransformer) -> float:
+def calculate_semantic_similarity(text1: str, text2: str, model: "SentenceTransformer") -> float:
     """Calculate semantic similarity between two texts using sentence transformers."""
-    embeddings = model.encode([text1, text2])
+    embeddings = encode_texts(model, [text1, text2])
     similarity = np.dot(embeddings[0], embeddings[1]) / (np.linalg.norm(embeddings[0]) * np.linalg.norm(embeddings[1]))
     return float(similarity) 
\ No newline at end of file
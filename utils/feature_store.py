@@ -0,0 +1,483 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from typing import Callable, Dict, Any, Iterable, Iterator, List, Optional, Tuple
+import numpy as np
+from config.config import config
+from utils.embedding_cache import model_identity
+from utils.pdf_processor import extract_text_from_pdf
+from utils.section_entity_extraction import extract_section_entities_batch
+from utils.skill_bitsets import (
+    bitset_width,
+    lookup_skill_ids,
+    matched_and_missing,
+    ontology_skill_names,
+    pack_skill_ids,
+    skill_membership,
+    skill_overlap_counts,
+)
+from utils.match_scoring import (
+    EDUCATION_KEYWORDS,
+    _document_embeddings,
+    _encode_skill_vectors,
+    _overall_scores,
+    calculate_match_score,
+    calculate_total_experience,
+    prune_top_k,
+    resume_document_text,
+    resume_skill_names,
+    upper_bound_scores,
+)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Ordinal education levels, checked from highest to lowest
+EDUCATION_LEVELS = [("phd", 4), ("doctor", 4), ("master", 3), ("m.tech", 3), ("bachelor", 2), ("b.tech", 2), ("associate", 1)]
+
+# Per-candidate scalar columns and their dtypes. A candidate's skill IDs are the
+# skill_lengths[row] entries of skill_indices starting at skill_starts[row]
+SCALAR_COLUMNS = {
+    "experience_years": np.float64,
+    "education_mask": np.uint8,
+    "education_level": np.int8,
+    "parsed_offsets": np.int64,
+    "skill_starts": np.int64,
+    "skill_lengths": np.int64,
+}
+
+# Per-candidate columns of fixed width: the document embedding and the packed skill bitset
+MATRIX_COLUMNS = {"doc_embeddings": np.float32, "skill_bitsets": np.uint8}
+
+def education_keyword_mask(education_entries: List[Dict[str, Any]]) -> int:
+    """Bitmask of the EDUCATION_KEYWORDS found in any study type."""
+    mask = 0
+    for edu in education_entries:
+        study_type_lower = edu.get("studyType", "").lower()
+        for bit, keyword in enumerate(EDUCATION_KEYWORDS):
+            if keyword in study_type_lower:
+                mask |= 1 << bit
+    return mask
+
+def highest_education_level(education_entries: List[Dict[str, Any]]) -> int:
+    """Highest ordinal education level (0 = none, 4 = PhD) across study types."""
+    level = 0
+    for edu in education_entries:
+        study_type_lower = edu.get("studyType", "").lower()
+        level = max([level] + [value for keyword, value in EDUCATION_LEVELS if keyword in study_type_lower])
+    return level
+
+def content_digest(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
+
+def _read_pdfs(pdf_paths: List[str]) -> Iterator[Tuple[str, bytes]]:
+    """(path, content) pairs, reading one file at a time."""
+    for pdf_path in pdf_paths:
+        with open(pdf_path, "rb") as f:
+            yield pdf_path, f.read()
+
+class ResumeFeatureStore:
+    """Persistent columnar store of parsed resumes and their precomputed scoring features.
+
+    Per candidate it keeps the parsed resume (in an append-only JSON lines file)
+    plus NumPy columns for total experience, education keyword mask and level,
+    the document embedding and the resume skills as skill IDs. Skill IDs start
+    with the ontology skills and are extended with unseen skill names. Scoring a new JD against the pool reads only these columns, so PDFs are
+    never extracted or parsed again.
+
+    Columns are raw binary files memory-mapped for reading. Ingesting writes
+    only the new or replaced rows at their offsets and appends their skill IDs,
+    row records and new skill names; a replaced candidate's old skill IDs stay
+    unreferenced in skill_indices. The manifest holds only counts and is
+    replaced last, so rows written after it are ignored on load. Skill bitset
+    rows are padded to a capacity that doubles when the vocabulary outgrows it,
+    the only time the whole bitset file is rewritten.
+    """
+
+    def __init__(self, store_dir: Optional[str] = None):
+        self.store_dir = store_dir or config["feature_store_dir"]
+        self._lock = threading.RLock()
+        self.candidate_ids: List[str] = []
+        self.content_hashes: List[str] = []
+        self.skill_names: List[str] = []
+        self.skill_positions: Dict[str, int] = {}
+        self.model_id: Optional[List[str]] = None
+        self.columns: Dict[str, np.ndarray] = {}
+        self.skill_embeddings: Optional[np.ndarray] = None
+        self.dim: Optional[int] = None
+        self.bitset_capacity = 0
+        self.skill_index_count = 0
+        self._persisted_skill_names = 0
+        self.load()
+
+    def __len__(self) -> int:
+        return len(self.candidate_ids)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.store_dir, name)
+
+    def _row_width(self, name: str) -> int:
+        """Values per row of a column."""
+        return {"doc_embeddings": self.dim or 0, "skill_bitsets": self.bitset_capacity}.get(name, 1)
+
+    def _open_column(self, name: str, dtype, rows: int, width: int = 1) -> np.ndarray:
+        """Read-only memory map of the first rows of a column file."""
+        shape = (rows, width) if name in MATRIX_COLUMNS or name == "skill_embeddings" else (rows,)
+        if not rows:
+            return np.zeros(shape, dtype=dtype)
+        return np.memmap(self._path(f"{name}.bin"), dtype=dtype, mode="r", shape=shape)
+
+    def _open_columns(self) -> None:
+        rows = len(self.candidate_ids)
+        self.columns = {name: self._open_column(name, dtype, rows) for name, dtype in SCALAR_COLUMNS.items()}
+        self.columns.update({name: self._open_column(name, dtype, rows, self._row_width(name)) for name, dtype in MATRIX_COLUMNS.items()})
+        self.columns["skill_indices"] = self._open_column("skill_indices", np.int32, self.skill_index_count)
+        self.skill_embeddings = self._open_column("skill_embeddings", np.float32, self._persisted_skill_names, self.dim or 1)
+
+    def load(self) -> None:
+        """Memory-map the columns of an existing store, up to the counts of its manifest."""
+        if not os.path.exists(self._path("manifest.json")):
+            return
+        with open(self._path("manifest.json"), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        self.model_id = manifest["model_id"]
+        self.dim = manifest["dim"]
+        self.bitset_capacity = manifest["bitset_capacity"]
+        self.skill_index_count = manifest["skill_index_count"]
+
+        with open(self._path("rows.jsonl"), "rb") as f:
+            row_records = f.read(manifest["rows_bytes"]).splitlines()
+        self.candidate_ids = [""] * manifest["rows"]
+        self.content_hashes = [""] * manifest["rows"]
+        # Replaced candidates append a new record for their row; the last one wins
+        for line in row_records:
+            record = json.loads(line)
+            self.candidate_ids[record["row"]] = record["candidate_id"]
+            self.content_hashes[record["row"]] = record["content_hash"]
+
+        with open(self._path("skill_names.jsonl"), "rb") as f:
+            self.skill_names = [json.loads(line) for line in f.read(manifest["skill_names_bytes"]).splitlines()]
+        self.skill_positions = {name: i for i, name in enumerate(self.skill_names)}
+        self._persisted_skill_names = len(self.skill_names)
+        self._open_columns()
+        logger.info(f"Loaded resume feature store with {len(self.candidate_ids)} candidates from {self.store_dir}")
+
+    def _write_rows(self, name: str, dtype, rows: List[int], values: np.ndarray) -> None:
+        """Write the values of the given rows of a column at their offsets."""
+        values = np.ascontiguousarray(values, dtype=dtype).reshape(len(rows), -1)
+        row_bytes = values.shape[1] * np.dtype(dtype).itemsize
+        fd = os.open(self._path(f"{name}.bin"), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            for row, value in zip(rows, values):
+                os.pwrite(fd, value.tobytes(), row * row_bytes)
+        finally:
+            os.close(fd)
+
+    def _append(self, name: str, data: bytes) -> int:
+        """Append bytes to a store file and return the file size afterwards."""
+        with open(self._path(name), "ab") as f:
+            f.write(data)
+            return f.tell()
+
+    def _grow_bitsets(self, n_skills: int) -> None:
+        """Widen the bitset rows once the vocabulary outgrows their capacity, doubling it."""
+        needed = bitset_width(n_skills)
+        if needed <= self.bitset_capacity:
+            return
+        capacity = max(needed, 2 * self.bitset_capacity, 8)
+        rows = len(self.candidate_ids)
+        if rows:
+            bitsets = np.zeros((rows, capacity), dtype=np.uint8)
+            bitsets[:, :self.bitset_capacity] = self.columns["skill_bitsets"]
+            with open(self._path("skill_bitsets.bin.tmp"), "wb") as f:
+                f.write(bitsets.tobytes())
+            os.replace(self._path("skill_bitsets.bin.tmp"), self._path("skill_bitsets.bin"))
+        self.bitset_capacity = capacity
+
+    def _write_manifest(self, rows_bytes: int, skill_names_bytes: int) -> None:
+        manifest = {
+            "model_id": self.model_id,
+            "dim": self.dim,
+            "rows": len(self.candidate_ids),
+            "rows_bytes": rows_bytes,
+            "skill_names_bytes": skill_names_bytes,
+            "skill_index_count": self.skill_index_count,
+            "bitset_capacity": self.bitset_capacity,
+        }
+        with open(self._path("manifest.json.tmp"), "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(self._path("manifest.json.tmp"), self._path("manifest.json"))
+
+    def get_parsed_resume(self, row: int) -> Dict[str, Any]:
+        """Read one stored parsed resume by row."""
+        with open(self._path("parsed.jsonl"), "r", encoding="utf-8") as f:
+            f.seek(int(self.columns["parsed_offsets"][row]))
+            return json.loads(f.readline())
+
+    def _skill_ids(self, names: List[str]) -> List[int]:
+        """Map lowercased skill names to IDs, extending the skill vocabulary as needed."""
+        if not self.skill_names:
+            self.skill_names = ontology_skill_names()
+            self.skill_positions = {name: i for i, name in enumerate(self.skill_names)}
+        ids = []
+        for name in dict.fromkeys(names):
+            if name not in self.skill_positions:
+                self.skill_positions[name] = len(self.skill_names)
+                self.skill_names.append(name)
+            ids.append(self.skill_positions[name])
+        return ids
+
+    def add_resumes(self, resumes: List[Tuple[str, str, Dict[str, Any]]], embedding_model) -> List[str]:
+        """Add or replace parsed resumes and compute their features.
+
+        Only the rows of these resumes are written; the rest of the store is untouched.
+
+        Args:
+            resumes: (candidate ID, content hash, parsed resume) tuples
+            embedding_model: SentenceTransformer for document and skill embeddings
+
+        Returns:
+            Candidate IDs that were stored
+        """
+        if not resumes:
+            return []
+        with self._lock:
+            if self.candidate_ids and self.model_id != list(model_identity(embedding_model)):
+                raise ValueError("Feature store was built with a different embedding model; rebuild it before adding resumes")
+            self.model_id = list(model_identity(embedding_model))
+
+            doc_embeddings = _document_embeddings([resume_document_text(parsed) for _, _, parsed in resumes], embedding_model)
+            self.dim = doc_embeddings.shape[1]
+            os.makedirs(self.store_dir, exist_ok=True)
+
+            # The last of several resumes with the same candidate ID wins
+            latest = {candidate_id: i for i, (candidate_id, _, _) in enumerate(resumes)}
+            row_of = {candidate_id: row for row, candidate_id in enumerate(self.candidate_ids)}
+            next_row = len(self.candidate_ids)
+            rows, features, skill_lists, row_records = [], {name: [] for name in SCALAR_COLUMNS}, [], []
+            skill_start = self.skill_index_count
+            with open(self._path("parsed.jsonl"), "a", encoding="utf-8") as parsed_file:
+                for i, (candidate_id, content_hash, parsed) in enumerate(resumes):
+                    if latest[candidate_id] != i:
+                        continue
+                    row = row_of.get(candidate_id)
+                    if row is None:
+                        row, next_row = next_row, next_row + 1
+                    skill_ids = self._skill_ids(resume_skill_names(parsed))
+                    features["experience_years"].append(calculate_total_experience(parsed.get("work", [])))
+                    features["education_mask"].append(education_keyword_mask(parsed.get("education", [])))
+                    features["education_level"].append(highest_education_level(parsed.get("education", [])))
+                    features["parsed_offsets"].append(parsed_file.tell())
+                    features["skill_starts"].append(skill_start)
+                    skill_start += len(skill_ids)
+                    features["skill_lengths"].append(len(skill_ids))
+                    parsed_file.write(json.dumps(parsed) + "\n")
+                    rows.append(row)
+                    skill_lists.append(skill_ids)
+                    row_records.append({"row": row, "candidate_id": candidate_id, "content_hash": content_hash})
+            row_embeddings = doc_embeddings[[latest[record["candidate_id"]] for record in row_records]]
+
+            # Column data first; the manifest written last makes it current
+            self._grow_bitsets(len(self.skill_names))
+            skill_indices = np.array([i for ids in skill_lists for i in ids], dtype=np.int32)
+            skill_indptr = np.concatenate([[0], np.cumsum([len(ids) for ids in skill_lists])]).astype(np.int64)
+            self._append("skill_indices.bin", skill_indices.tobytes())
+            self.skill_index_count += len(skill_indices)
+            for name, dtype in SCALAR_COLUMNS.items():
+                self._write_rows(name, dtype, rows, np.array(features[name]))
+            self._write_rows("doc_embeddings", np.float32, rows, row_embeddings)
+            self._write_rows("skill_bitsets", np.uint8, rows, pack_skill_ids(skill_indptr, skill_indices, self.bitset_capacity * 8))
+            rows_bytes = self._append("rows.jsonl", "".join(json.dumps(record) + "\n" for record in row_records).encode("utf-8"))
+            new_names = self.skill_names[self._persisted_skill_names:]
+            skill_names_bytes = self._append("skill_names.jsonl", "".join(json.dumps(name) + "\n" for name in new_names).encode("utf-8"))
+            self._append_skill_embeddings(new_names, embedding_model)
+
+            for record in row_records:
+                if record["row"] == len(self.candidate_ids):
+                    self.candidate_ids.append(record["candidate_id"])
+                    self.content_hashes.append(record["content_hash"])
+                else:
+                    self.content_hashes[record["row"]] = record["content_hash"]
+            self._persisted_skill_names = len(self.skill_names)
+            self._write_manifest(rows_bytes, skill_names_bytes)
+            self._open_columns()
+        return [candidate_id for candidate_id, _, _ in resumes]
+
+    def _append_skill_embeddings(self, new_names: List[str], embedding_model) -> None:
+        """Embed skill names added since the last save and append their vectors."""
+        if not new_names:
+            return
+        vectors = _encode_skill_vectors(new_names, embedding_model)
+        new_embeddings = np.stack([vectors[name] for name in new_names]).astype(np.float32)
+        self._append("skill_embeddings.bin", new_embeddings.tobytes())
+
+    def ingest_pdfs(self, pdf_paths: List[str], ner_model, embedding_model, candidate_ids: Optional[List[str]] = None) -> Dict[str, List[str]]:
+        """Extract, parse and store resume PDFs, skipping files whose content is already stored.
+
+        Returns:
+            Dictionary with the stored, skipped (unchanged) and failed paths
+        """
+        return self.ingest_pdf_contents(_read_pdfs(pdf_paths), ner_model, embedding_model, candidate_ids)
+
+    def ingest_pdf_contents(self, pdfs: Iterable[Tuple[str, bytes]], ner_model, embedding_model,
+                            candidate_ids: Optional[List[str]] = None) -> Dict[str, List[str]]:
+        """Like ingest_pdfs, for (name, PDF bytes) pairs such as uploads, which are extracted in memory.
+
+        Returns:
+            Dictionary with the stored, skipped (unchanged) and failed names
+        """
+        from utils.resume_index import candidate_id_for
+
+        known_hashes = set(self.content_hashes)
+        pending, skipped, failed = [], [], []
+        for i, (pdf_path, content) in enumerate(pdfs):
+            content_hash = content_digest(content)
+            if content_hash in known_hashes:
+                skipped.append(pdf_path)
+                continue
+            resume_text = extract_text_from_pdf(content)
+            if not resume_text:
+                failed.append(pdf_path)
+                continue
+            pending.append((i, pdf_path, content_hash, resume_text))
+            known_hashes.add(content_hash)
+
+        # Contact NER for every new resume runs as one batched predict
+        parsed_resumes = extract_section_entities_batch([resume_text for _, _, _, resume_text in pending], ner_model)
+        resumes = []
+        for (i, pdf_path, content_hash, _), parsed in zip(pending, parsed_resumes):
+            candidate_id = candidate_ids[i] if candidate_ids else candidate_id_for(parsed, pdf_path)
+            resumes.append((candidate_id, content_hash, parsed))
+        stored = self.add_resumes(resumes, embedding_model)
+        return {"stored": stored, "skipped": skipped, "failed": failed}
+
+    def _jd_scorer(self, parsed_jd: Dict[str, Any], embedding_model) -> Tuple[np.ndarray, Callable[[np.ndarray], np.ndarray]]:
+        """Upper bounds for every stored candidate and a function giving the full score of given rows.
+
+        The exact skill, experience and education components come straight from
+        the columns for the whole pool; semantic skill matching and document
+        similarity are only computed for the rows passed to the score function.
+        Uses the same components and weights as calculate_match_score.
+        """
+        with self._lock:
+            n = len(self.candidate_ids)
+            columns, skill_positions, skill_embeddings = self.columns, self.skill_positions, self.skill_embeddings
+        jd_skills = parsed_jd.get("required_skills", [])
+        skill_starts, skill_lengths = np.asarray(columns["skill_starts"]), np.asarray(columns["skill_lengths"])
+        indices = np.asarray(columns["skill_indices"])
+        has_skills = skill_lengths > 0
+
+        # --- 1. Exact Skill Matching ---
+        exact = skill_membership(np.asarray(columns["skill_bitsets"]), lookup_skill_ids(jd_skills, skill_positions))
+        if jd_skills:
+            exact_scores = exact.sum(axis=1) / len(jd_skills)
+            potential_scores = np.where(has_skills, (~exact).sum(axis=1) / len(jd_skills), 0.0)
+        else:
+            exact_scores, potential_scores = np.ones(n), np.zeros(n)
+
+        # --- 2. Experience Matching ---
+        experience_years = np.asarray(columns["experience_years"])
+        required_years = parsed_jd.get("required_experience_years", 0)
+        experience_scores = np.minimum(1.0, experience_years / required_years) if required_years > 0 else np.ones(n)
+
+        # --- 3. Education Matching ---
+        required_education = parsed_jd.get("required_education", "").lower()
+        if required_education:
+            required_mask = education_keyword_mask([{"studyType": required_education}])
+            education_scores = ((np.asarray(columns["education_mask"]) & required_mask) > 0).astype(np.float64)
+        else:
+            education_scores = np.ones(n)
+
+        jd_matrix = None
+        if jd_skills:
+            jd_vectors = _encode_skill_vectors(jd_skills, embedding_model)
+            jd_matrix = np.stack([jd_vectors[s] for s in jd_skills])
+        jd_vector = _document_embeddings([parsed_jd.get("match_text", "")], embedding_model)[0]
+
+        def score_rows(rows: np.ndarray) -> np.ndarray:
+            skill_scores = exact_scores[rows]
+            if jd_matrix is not None:
+                # Semantic skill matches over the CSR skill lists of these rows only
+                starts, lengths = skill_starts[rows], skill_lengths[rows]
+                row_indptr = np.concatenate([[0], np.cumsum(lengths)])
+                entries = np.repeat(starts - row_indptr[:-1], lengths) + np.arange(row_indptr[-1])
+                unique_ids, inverse = np.unique(indices[entries], return_inverse=True)
+                entry_similarity = (np.asarray(skill_embeddings[unique_ids]) @ jd_matrix.T)[inverse]
+                best_similarity = np.full((len(rows), len(jd_skills)), -np.inf, dtype=np.float32)
+                non_empty = lengths > 0
+                if non_empty.any():
+                    best_similarity[non_empty] = np.maximum.reduceat(entry_similarity, row_indptr[:-1][non_empty], axis=0)
+                semantic = ~exact[rows] & (best_similarity > 0.7)
+                skill_scores = skill_scores + semantic.sum(axis=1) / len(jd_skills)
+
+            # --- 4. Semantic Document Score ---
+            semantic_scores = np.asarray(columns["doc_embeddings"][rows]) @ jd_vector
+            return _overall_scores(skill_scores, experience_scores[rows], education_scores[rows], semantic_scores)
+
+        return upper_bound_scores(exact_scores, potential_scores, experience_scores, education_scores), score_rows
+
+    def score_jd(self, parsed_jd: Dict[str, Any], embedding_model) -> np.ndarray:
+        """Overall match score of every stored candidate against a parsed JD, from the columns only."""
+        if not len(self):
+            return np.zeros(0)
+        upper_bounds, score_rows = self._jd_scorer(parsed_jd, embedding_model)
+        return score_rows(np.arange(len(upper_bounds)))
+
+    def skill_matches(self, jd_skills: List[str]) -> List[Dict[str, Any]]:
+        """Exact matched and missing skill IDs of every stored candidate for a JD skill list.
+
+        JD skills that no stored resume has get ID -1 and are always missing.
+        """
+        with self._lock:
+            bitsets = np.asarray(self.columns["skill_bitsets"]) if self.columns else np.zeros((0, 0), dtype=np.uint8)
+            skill_ids = lookup_skill_ids(jd_skills, self.skill_positions)
+            candidate_ids = list(self.candidate_ids)
+        membership = skill_membership(bitsets, skill_ids)
+        counts = skill_overlap_counts(bitsets, skill_ids)
+        results = []
+        for row, candidate_id in enumerate(candidate_ids):
+            matched, missing = matched_and_missing(membership, skill_ids, row)
+            results.append({"candidate_id": candidate_id, "matched": matched, "missing": missing, "overlap": int(counts[row])})
+        return results
+
+    def rank_jd(self, parsed_jd: Dict[str, Any], embedding_model, top_k: int = 10) -> Dict[str, Any]:
+        """Top-k stored candidates for a parsed JD, with full match details for those k only.
+
+        Candidates whose upper bound cannot reach the k-th best score skip the
+        semantic stages entirely.
+
+        Returns:
+            Dictionary with the ranked candidates and the pool, scored and pruned counts
+        """
+        if top_k < 1:
+            raise ValueError(f"top_k must be at least 1, got {top_k}")
+        if not len(self):
+            return {"candidates": [], "stats": {"pool_size": 0, "scored": 0, "pruned": 0}}
+        upper_bounds, score_rows = self._jd_scorer(parsed_jd, embedding_model)
+        top_rows, _, pruned = prune_top_k(upper_bounds, top_k, score_rows, config["matching_config"]["pruning_batch_size"])
+        results = []
+        for rank, row in enumerate(top_rows, start=1):
+            parsed = self.get_parsed_resume(row)
+            results.append({
+                "rank": rank,
+                "candidate_id": self.candidate_ids[row],
+                "name": parsed.get("name", ""),
+                "match_score": calculate_match_score(parsed, parsed_jd, embedding_model),
+            })
+        stats = {"pool_size": len(upper_bounds), "scored": len(upper_bounds) - pruned, "pruned": pruned}
+        logger.info(f"Feature store ranking stats: {stats}")
+        return {"candidates": results, "stats": stats}
+
+_feature_store: Optional[ResumeFeatureStore] = None
+_feature_store_lock = threading.Lock()
+
+def get_feature_store() -> ResumeFeatureStore:
+    """Return the process-wide resume feature store, loading it on first use."""
+    global _feature_store
+    with _feature_store_lock:
+        if _feature_store is None:
+            _feature_store = ResumeFeatureStore()
+        return _feature_store
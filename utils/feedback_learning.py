@@ -1,11 +1,13 @@
 from config.config import config
 from utils.file_handler import load_feedback_data, save_feedback_data
 import json
-from typing import Dict, Any, List
-from sentence_transformers import SentenceTransformer
+from typing import TYPE_CHECKING, Dict, Any, List
 import numpy as np
 from datetime import datetime
 
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
 def capture_feedback(match_results: Dict[str, Any], feedback: Dict[str, Any]) -> None:
     """Capture user feedback on match results."""
     feedback_data = {
@@ -28,7 +30,7 @@ def capture_feedback(match_results: Dict[str, Any], feedback: Dict[str, Any]) ->
     with open(config["feedback_data_path"], 'w') as f:
         json.dump(existing_feedback, f, indent=2)
 
-def update_model_with_feedback(model: SentenceTransformer, feedback_data: List[Dict[str, Any]]) -> SentenceTransformer:
+def update_model_with_feedback(model: "SentenceTransformer", feedback_data: List[Dict[str, Any]]) -> "SentenceTransformer":
     """Update the model based on user feedback."""
     # Prepare training data from feedback
     train_examples = []
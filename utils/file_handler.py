@@ -1,7 +1,7 @@
 import json
 import os
 from config.config import config
-from typing import Dict, Any
+from typing import BinaryIO, Dict, Any, List, Union
 from utils.pdf_processor import extract_text_from_pdf
 
 def read_pdf(file_path):
@@ -39,9 +39,16 @@ def load_resume(resume_path: str) -> str:
     else:
         return read_file(resume_path)
 
-def load_job_description(jd_path: str) -> str:
-    """Load job description text from file."""
-    return read_file(jd_path)
+def load_job_description(jd_path: Union[str, bytes, BinaryIO]) -> str:
+    """Load job description text from a file path, or decode it from bytes or a binary file object."""
+    if isinstance(jd_path, (str, os.PathLike)):
+        return read_file(jd_path)
+    try:
+        content = jd_path if isinstance(jd_path, (bytes, bytearray)) else jd_path.read()
+        return content.decode('utf-8')
+    except Exception as e:
+        print(f"Error reading job description: {str(e)}")
+        return ""
 
 def load_skills_ontology() -> Dict[str, Any]:
     """Load skills ontology from JSON file."""
@@ -61,6 +68,15 @@ def load_job_title_mapping() -> Dict[str, str]:
         print(f"Error loading job title mapping: {str(e)}")
         return {}
 
+def load_location_gazetteer() -> List[str]:
+    """Load the location gazetteer (countries, regions and cities) as one list of names."""
+    try:
+        with open(config["location_gazetteer_path"], 'r', encoding='utf-8') as f:
+            return [name for names in json.load(f).values() for name in names]
+    except Exception as e:
+        print(f"Error loading location gazetteer: {str(e)}")
+        return []
+
 def load_feedback_data():
     with open(config['feedback_data_path'], 'r') as file:
         return json.load(file)
@@ -0,0 +1,285 @@
+import os
+import json
+import logging
+import argparse
+from types import SimpleNamespace
+from typing import Dict, Any, List, Optional, Union
+import numpy as np
+from config.config import config
+from utils.embedding_cache import model_identity
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+INFERENCE_BACKENDS = ("torch", "torch_int8", "onnx")
+
+# Sample texts for the parity check, in addition to skill vocabulary terms
+PARITY_TEXTS = [
+    "Senior Python developer with 6 years of experience building REST APIs in Django and FastAPI.",
+    "Bachelor of Technology in Computer Science",
+    "Data engineer experienced with Spark, Kafka and AWS Glue pipelines",
+    "We are looking for a frontend engineer skilled in React, TypeScript and CSS.",
+    "Machine learning, deep learning, PyTorch, model deployment",
+    "Project manager, Agile, Scrum, stakeholder communication",
+]
+
+def onnx_model_dir(model_name: str) -> str:
+    """Directory of the exported ONNX graph, tokenizer and settings for a model."""
+    return os.path.join(config["onnx_models_dir"], model_name.replace("/", "__"))
+
+def _check_backend(backend: str) -> None:
+    if backend not in INFERENCE_BACKENDS:
+        raise ValueError(f"Unknown inference backend: {backend}. Expected one of {INFERENCE_BACKENDS}")
+
+def quantize_int8(module):
+    """Dynamic int8 quantization of every Linear layer, for CPU inference."""
+    import torch
+    return torch.quantization.quantize_dynamic(module, {torch.nn.Linear}, dtype=torch.qint8)
+
+def _onnx_session(model_dir: str):
+    try:
+        import onnxruntime
+    except ImportError:
+        raise ImportError("The onnx inference backend needs ONNX Runtime. Please install it using: pip install onnxruntime")
+    model_path = os.path.join(model_dir, "model.onnx")
+    if not os.path.exists(model_path):
+        raise FileNotFoundError(f"No exported ONNX model at {model_path}. Run: python -m utils.inference_backends export")
+    options = onnxruntime.SessionOptions()
+    options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+    # Follow the web app's inference thread budget when one is configured
+    from utils.inference_executor import configured_torch_threads
+    threads = configured_torch_threads()
+    if threads:
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+    return onnxruntime.InferenceSession(model_path, options, providers=["CPUExecutionProvider"])
+
+def _read_settings(model_dir: str) -> Dict[str, Any]:
+    with open(os.path.join(model_dir, "settings.json"), "r", encoding="utf-8") as f:
+        return json.load(f)
+
+class OnnxSentenceEncoder:
+    """ONNX Runtime replacement for a SentenceTransformer with the same ``encode`` interface.
+
+    Runs the exported transformer graph and applies the original model's
+    pooling and normalization in NumPy.
+    """
+
+    inference_backend = "onnx"
+
+    def __init__(self, model_dir: str):
+        from transformers import AutoTokenizer
+        self.settings = _read_settings(model_dir)
+        self.session = _onnx_session(model_dir)
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.input_names = [node.name for node in self.session.get_inputs()]
+        self.max_seq_length = self.settings["max_seq_length"]
+        # Identify as the source checkpoint so the embedding cache keys stay meaningful
+        self.cache_model_name = self.settings["source_model"]
+        self.cache_model_version = self.settings["source_version"]
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.settings["dimension"]
+
+    def _pool(self, hidden: np.ndarray, attention_mask: np.ndarray) -> np.ndarray:
+        mode = self.settings["pooling"]
+        if mode == "cls":
+            return hidden[:, 0]
+        mask = attention_mask[:, :, None].astype(hidden.dtype)
+        if mode == "max":
+            return np.where(mask > 0, hidden, -1e9).max(axis=1)
+        return (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+
+    def encode(self, sentences: Union[str, List[str]], batch_size: int = 32, **kwargs) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        embeddings = []
+        for start in range(0, len(texts), batch_size):
+            tokens = self.tokenizer(texts[start:start + batch_size], padding=True, truncation=True,
+                                    max_length=self.max_seq_length, return_tensors="np")
+            feeds = {name: tokens[name].astype(np.int64) for name in self.input_names if name in tokens}
+            hidden = self.session.run(None, feeds)[0]
+            embeddings.append(self._pool(hidden, tokens["attention_mask"]))
+        vectors = np.concatenate(embeddings).astype(np.float32) if embeddings else np.zeros((0, self.settings["dimension"]), dtype=np.float32)
+        if self.settings["normalize"]:
+            vectors = vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12)
+        return vectors[0] if single else vectors
+
+class OnnxSequenceClassifier:
+    """ONNX Runtime replacement for the cross-encoder, callable like the transformers model.
+
+    ``model(**inputs).logits`` returns a torch tensor so score_pairs works unchanged.
+    """
+
+    inference_backend = "onnx"
+
+    def __init__(self, model_dir: str):
+        self.settings = _read_settings(model_dir)
+        self.session = _onnx_session(model_dir)
+        self.input_names = [node.name for node in self.session.get_inputs()]
+
+    def eval(self):
+        return self
+
+    def __call__(self, **inputs) -> SimpleNamespace:
+        import torch
+        feeds = {name: inputs[name].cpu().numpy().astype(np.int64) for name in self.input_names if name in inputs}
+        logits = self.session.run(None, feeds)[0]
+        return SimpleNamespace(logits=torch.from_numpy(logits))
+
+def load_embedding_model(model_name: Optional[str] = None, backend: Optional[str] = None):
+    """Load the sentence embedding model on the configured inference backend."""
+    model_config = config["model_config"]["sentence_transformer"]
+    model_name = model_name or model_config["model_name"]
+    backend = backend or model_config["backend"]
+    _check_backend(backend)
+    if backend == "onnx":
+        return OnnxSentenceEncoder(onnx_model_dir(model_name))
+
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(model_name)
+    if backend == "torch_int8":
+        model[0].auto_model = quantize_int8(model[0].auto_model)
+    model.inference_backend = backend
+    return model
+
+def load_reranking_model(model_name: Optional[str] = None, backend: Optional[str] = None):
+    """Load the cross-encoder on the configured inference backend."""
+    model_config = config["model_config"]["reranking_model"]
+    model_name = model_name or model_config["model_name"]
+    backend = backend or model_config["backend"]
+    _check_backend(backend)
+    if backend == "onnx":
+        return OnnxSequenceClassifier(onnx_model_dir(model_name))
+
+    from transformers import AutoModelForSequenceClassification
+    model = AutoModelForSequenceClassification.from_pretrained(
+        model_name,
+        num_labels=1  # For regression task
+    )
+    model.eval()
+    if backend == "torch_int8":
+        model = quantize_int8(model)
+    model.inference_backend = backend
+    return model
+
+def _export_graph(module, tokenizer, output_name: str, output_dir: str) -> List[str]:
+    """Export a transformers module to output_dir/model.onnx with dynamic batch and sequence axes."""
+    import torch
+
+    class ExportWrapper(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, attention_mask, token_type_ids=None):
+            outputs = self.model(input_ids=input_ids, attention_mask=attention_mask, token_type_ids=token_type_ids)
+            return getattr(outputs, output_name)
+
+    sample = tokenizer(["export sample"], ["export sample"] if output_name == "logits" else None, return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes[output_name] = {0: "batch", 1: "sequence"} if output_name == "last_hidden_state" else {0: "batch"}
+
+    os.makedirs(output_dir, exist_ok=True)
+    module.eval()
+    with torch.inference_mode():
+        torch.onnx.export(
+            ExportWrapper(module),
+            tuple(sample[name] for name in input_names),
+            os.path.join(output_dir, "model.onnx"),
+            input_names=input_names,
+            output_names=[output_name],
+            dynamic_axes=dynamic_axes,
+            opset_version=14,
+        )
+    tokenizer.save_pretrained(output_dir)
+    return input_names
+
+def export_embedding_model(model_name: Optional[str] = None) -> str:
+    """Export the sentence embedding model to ONNX from locally cached weights."""
+    from sentence_transformers import SentenceTransformer
+    model_name = model_name or config["model_config"]["sentence_transformer"]["model_name"]
+    model = SentenceTransformer(model_name)
+    output_dir = onnx_model_dir(model_name)
+    _export_graph(model[0].auto_model, model.tokenizer, "last_hidden_state", output_dir)
+
+    pooling = next((module for module in model if type(module).__name__ == "Pooling"), None)
+    settings = {
+        "source_model": model_identity(model)[0],
+        "source_version": model_identity(model)[1],
+        "max_seq_length": model.max_seq_length,
+        "dimension": model.get_sentence_embedding_dimension(),
+        "pooling": pooling.get_pooling_mode_str() if pooling is not None else "mean",
+        "normalize": any(type(module).__name__ == "Normalize" for module in model),
+    }
+    with open(os.path.join(output_dir, "settings.json"), "w", encoding="utf-8") as f:
+        json.dump(settings, f, indent=2)
+    logger.info(f"Exported {model_name} to {output_dir}")
+    return output_dir
+
+def export_reranking_model(model_name: Optional[str] = None) -> str:
+    """Export the cross-encoder to ONNX from locally cached weights."""
+    from transformers import AutoModelForSequenceClassification, AutoTokenizer
+    model_name = model_name or config["model_config"]["reranking_model"]["model_name"]
+    model = AutoModelForSequenceClassification.from_pretrained(model_name, num_labels=1)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    output_dir = onnx_model_dir(model_name)
+    _export_graph(model, tokenizer, "logits", output_dir)
+    with open(os.path.join(output_dir, "settings.json"), "w", encoding="utf-8") as f:
+        json.dump({"source_model": model_name}, f, indent=2)
+    logger.info(f"Exported {model_name} to {output_dir}")
+    return output_dir
+
+def check_parity(backend: str, texts: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Compare a backend against the torch float32 models.
+
+    Returns:
+        Maximum and mean cosine deviation (1 - cosine) of the embeddings, and the
+        maximum absolute difference of the cross-encoder scores
+    """
+    from utils.reranking import score_pairs
+    from utils.skill_vocabulary import vocabulary_terms
+    from transformers import AutoTokenizer
+
+    texts = texts or PARITY_TEXTS + vocabulary_terms()[:200]
+    reference = load_embedding_model(backend="torch").encode(texts)
+    candidate = load_embedding_model(backend=backend).encode(texts)
+    reference = reference / np.linalg.norm(reference, axis=1, keepdims=True)
+    candidate = candidate / np.linalg.norm(candidate, axis=1, keepdims=True)
+    deviation = 1.0 - (reference * candidate).sum(axis=1)
+
+    tokenizer = AutoTokenizer.from_pretrained(config["model_config"]["reranking_model"]["model_name"])
+    query, passages = PARITY_TEXTS[3], PARITY_TEXTS
+    reference_scores = np.array(score_pairs(query, passages, load_reranking_model(backend="torch"), tokenizer))
+    candidate_scores = np.array(score_pairs(query, passages, load_reranking_model(backend=backend), tokenizer))
+
+    return {
+        "backend": backend,
+        "texts": len(texts),
+        "embedding_max_cosine_deviation": float(deviation.max()),
+        "embedding_mean_cosine_deviation": float(deviation.mean()),
+        "rerank_max_score_difference": float(np.abs(reference_scores - candidate_scores).max()),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export and check inference backends")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export_parser = subparsers.add_parser("export", help="Export the embedding and reranking models to ONNX")
+    export_parser.add_argument("--model", choices=["embedding", "reranking", "all"], default="all")
+    parity_parser = subparsers.add_parser("parity", help="Report the deviation of a backend from torch float32")
+    parity_parser.add_argument("--backend", choices=[b for b in INFERENCE_BACKENDS if b != "torch"], default="onnx")
+    args = parser.parse_args()
+
+    # Only use weights already in the local Hugging Face cache
+    os.environ.setdefault("HF_HUB_OFFLINE", "1")
+    os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+
+    if args.command == "export":
+        if args.model in ("embedding", "all"):
+            print(f"Exported embedding model to {export_embedding_model()}")
+        if args.model in ("reranking", "all"):
+            print(f"Exported reranking model to {export_reranking_model()}")
+    else:
+        print(json.dumps(check_parity(args.backend), indent=2))
@@ -0,0 +1,188 @@
+import os
+import copy
+import queue
+import asyncio
+import logging
+import functools
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Any, Iterator, Optional
+from config.config import config
+from utils.models import get_model_registry
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def cpu_quota() -> int:
+    """CPUs available to this container: the cgroup CPU quota, capped by the CPU affinity mask."""
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else (os.cpu_count() or 1)
+    quota = None
+    try:
+        # cgroup v2: "<quota> <period>" or "max <period>"
+        with open("/sys/fs/cgroup/cpu.max", "r") as f:
+            limit, period = f.read().split()[:2]
+        if limit != "max":
+            quota = int(limit) / int(period)
+    except (OSError, ValueError):
+        try:
+            # cgroup v1: a quota of -1 means unlimited
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us", "r") as f:
+                limit = int(f.read())
+            with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us", "r") as f:
+                period = int(f.read())
+            if limit > 0:
+                quota = limit / period
+        except (OSError, ValueError):
+            pass
+    if quota is not None:
+        # Round down so the container is not throttled; fractional quotas still get one CPU
+        cpus = min(cpus, max(1, int(quota)))
+    return cpus
+
+_settings: Optional[Dict[str, int]] = None
+_settings_lock = threading.Lock()
+
+def configure_inference(processes: int = 1) -> Dict[str, int]:
+    """Derive the inference thread budget for this process and apply it to torch.
+
+    The container's CPUs are split across the server processes. Within a
+    process, at most max_workers inference stages run at once, each with
+    torch_threads intra-op threads, so that together they fit the budget.
+
+    Args:
+        processes: Server worker processes sharing the container's CPUs
+    """
+    global _settings
+    inference_config = config["inference_config"]
+    cpu_budget = max(1, cpu_quota() // max(1, processes))
+    max_workers = inference_config["max_workers"] or cpu_budget
+    torch_threads = inference_config["torch_threads"] or max(1, cpu_budget // max_workers)
+    settings = {"cpu_budget": cpu_budget, "max_workers": max_workers, "torch_threads": torch_threads}
+
+    for variable in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+        # Only effective for libraries not imported yet
+        os.environ.setdefault(variable, str(torch_threads))
+    try:
+        import torch
+        torch.set_num_threads(torch_threads)
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            # Can only be set before the first parallel work in this process
+            pass
+    except ImportError:
+        pass
+
+    with _settings_lock:
+        _settings = settings
+    logger.info(f"Inference budget: {settings}")
+    return settings
+
+def inference_settings() -> Dict[str, int]:
+    """Current inference thread budget, configured for a single process on first use."""
+    with _settings_lock:
+        settings = _settings
+    return settings or configure_inference()
+
+def configured_torch_threads() -> Optional[int]:
+    """Intra-op threads per inference stage, or None when no budget was configured (e.g. the CLI)."""
+    with _settings_lock:
+        return _settings["torch_threads"] if _settings else None
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def get_inference_executor() -> ThreadPoolExecutor:
+    """Return the bounded pool that runs the CPU-bound inference stages of this process."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=inference_settings()["max_workers"], thread_name_prefix="inference")
+        return _executor
+
+async def run_inference(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking, CPU-bound call on the inference executor without blocking the event loop."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_inference_executor(), functools.partial(func, *args, **kwargs))
+
+class ModelReplicaPool:
+    """Replicas of a model that is not thread-safe, each used by one caller at a time.
+
+    The first replica is the shared instance from the model registry; further
+    replicas are deep copies created on demand, up to the pool size. Callers
+    beyond that wait until a replica is returned.
+    """
+
+    def __init__(self, name: str, size: int, factory: Optional[Callable[[], Any]] = None):
+        self.name = name
+        self.size = max(1, size)
+        self._factory = factory or (lambda: copy.deepcopy(get_model_registry()[name]))
+        self._idle: "queue.LifoQueue[Any]" = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _checkout(self, timeout: Optional[float]) -> Any:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            create = self._created < self.size
+            first = self._created == 0
+            if create:
+                self._created += 1
+        if create:
+            try:
+                if first:
+                    return get_model_registry()[self.name]
+                logger.info(f"Creating {self.name} replica {self._created}/{self.size}")
+                return self._factory()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        return self._idle.get(timeout=timeout)
+
+    @contextmanager
+    def acquire(self, timeout: Optional[float] = None) -> Iterator[Any]:
+        """Check out a replica for exclusive use within the with-block."""
+        replica = self._checkout(timeout)
+        try:
+            yield replica
+        finally:
+            self._idle.put(replica)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            created = self._created
+        return {"size": self.size, "created": created, "idle": self._idle.qsize(), "in_use": created - self._idle.qsize()}
+
+_replica_pools: Dict[str, ModelReplicaPool] = {}
+_replica_pools_lock = threading.Lock()
+
+def get_replica_pool(name: str) -> ModelReplicaPool:
+    """Return the replica pool of a model listed in INFERENCE_CONFIG["replicas"]."""
+    with _replica_pools_lock:
+        pool = _replica_pools.get(name)
+        if pool is None:
+            replicas = config["inference_config"]["replicas"]
+            if name not in replicas:
+                raise KeyError(f"No replica pool configured for {name}. Expected one of {list(replicas)}")
+            # Each extra replica is a full private copy of the model, so default to at most two
+            size = replicas[name] or min(inference_settings()["max_workers"], 2)
+            pool = _replica_pools[name] = ModelReplicaPool(name, size)
+        return pool
+
+def inference_stats() -> Dict[str, Any]:
+    """Thread budget, queued inference stages and replica pool usage of this process."""
+    with _executor_lock:
+        executor = _executor
+    with _replica_pools_lock:
+        pools = dict(_replica_pools)
+    return {
+        **inference_settings(),
+        "queued": executor._work_queue.qsize() if executor is not None else 0,
+        "replicas": {name: pool.stats() for name, pool in pools.items()},
+    }
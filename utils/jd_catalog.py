@@ -0,0 +1,266 @@
+import os
+import json
+import logging
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+from config.config import config
+from utils.embedding_cache import model_identity
+from utils.job_description_parser import parse_job_description
+from utils.match_scoring import (
+    _document_embeddings,
+    _encode_skill_vectors,
+    _education_score,
+    _overall_scores,
+    calculate_match_score,
+    calculate_total_experience,
+    resume_document_text,
+    resume_skill_names,
+)
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def _requirement_matrix(jobs: List[Dict[str, Any]], skill_vocab: List[str]) -> np.ndarray:
+    """(jobs x skills) count of each vocabulary skill among each job's required skills."""
+    vocab_index = {skill: i for i, skill in enumerate(skill_vocab)}
+    skill_matrix = np.zeros((len(jobs), len(skill_vocab)), dtype=np.float32)
+    for row, job in enumerate(jobs):
+        for skill in job["parsed"].get("required_skills", []):
+            skill_matrix[row, vocab_index[skill]] += 1
+    return skill_matrix
+
+class JDCatalog:
+    """Persistent catalog of parsed job descriptions with precomputed matrices.
+
+    Each job keeps its ``parse_job_description`` output. The catalog also keeps
+    a normalized document embedding per job, a skill vocabulary with normalized
+    embeddings and a (jobs x skills) requirement matrix, so one resume can be
+    scored against every job with a handful of matrix operations.
+    """
+
+    def __init__(self, catalog_dir: Optional[str] = None):
+        self.catalog_dir = catalog_dir or config["jd_catalog_dir"]
+        self._lock = threading.Lock()
+        self.jobs: List[Dict[str, Any]] = []
+        self.model_id: Optional[List[str]] = None
+        self.jd_embeddings: Optional[np.ndarray] = None
+        self.skill_vocab: List[str] = []
+        self.skill_embeddings: Optional[np.ndarray] = None
+        self.skill_matrix: Optional[np.ndarray] = None
+        self.load()
+
+    def __len__(self) -> int:
+        return len(self.jobs)
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.catalog_dir, name)
+
+    def load(self) -> None:
+        """Load the catalog from disk if it exists."""
+        if not os.path.exists(self._path("jobs.json")):
+            return
+        with open(self._path("jobs.json"), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        self.jobs = manifest["jobs"]
+        self.model_id = manifest.get("model_id")
+        self.skill_vocab = manifest.get("skill_vocab", [])
+        if self.jobs and os.path.exists(self._path("jd_embeddings.npy")):
+            self.jd_embeddings = np.load(self._path("jd_embeddings.npy"))
+            self.skill_embeddings = np.load(self._path("skill_embeddings.npy"))
+            self.skill_matrix = np.load(self._path("skill_matrix.npy"))
+        logger.info(f"Loaded JD catalog with {len(self.jobs)} jobs from {self.catalog_dir}")
+
+    def save(self) -> None:
+        """Write the catalog to disk, replacing files atomically."""
+        os.makedirs(self.catalog_dir, exist_ok=True)
+        arrays = {
+            "jd_embeddings.npy": self.jd_embeddings,
+            "skill_embeddings.npy": self.skill_embeddings,
+            "skill_matrix.npy": self.skill_matrix,
+        }
+        for name, array in arrays.items():
+            if array is None:
+                continue
+            tmp_path = self._path(name + ".tmp")
+            with open(tmp_path, "wb") as f:
+                np.save(f, array)
+            os.replace(tmp_path, self._path(name))
+
+        tmp_path = self._path("jobs.json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"model_id": self.model_id, "skill_vocab": self.skill_vocab, "jobs": self.jobs}, f)
+        os.replace(tmp_path, self._path("jobs.json"))
+
+    def add_jobs(self, job_texts: Dict[str, str], embedding_model) -> List[str]:
+        """Parse and add (or replace) jobs keyed by job ID, embedding only those jobs.
+
+        Args:
+            job_texts: Mapping of job ID to raw job description text
+            embedding_model: SentenceTransformer used for the precomputed embeddings
+
+        Returns:
+            IDs of the jobs that were added or replaced
+        """
+        with self._lock:
+            # Build a new list and rebind it, so scorers holding the old list are unaffected
+            jobs = list(self.jobs)
+            positions = {job["jd_id"]: i for i, job in enumerate(jobs)}
+            changed_rows = []
+            for jd_id, text in job_texts.items():
+                entry = {"jd_id": jd_id, "parsed": parse_job_description(text)}
+                if jd_id in positions:
+                    jobs[positions[jd_id]] = entry
+                else:
+                    positions[jd_id] = len(jobs)
+                    jobs.append(entry)
+                changed_rows.append(positions[jd_id])
+            if self.jd_embeddings is None or self.model_id != list(model_identity(embedding_model)):
+                self.jobs = jobs
+                self._rebuild(embedding_model)
+            else:
+                self._update_rows(jobs, sorted(set(changed_rows)), embedding_model)
+            self.save()
+        return list(job_texts.keys())
+
+    def remove_jobs(self, jd_ids: List[str], embedding_model) -> int:
+        """Remove jobs by ID. Returns the number of jobs removed."""
+        with self._lock:
+            remove = set(jd_ids)
+            before = len(self.jobs)
+            self.jobs = [job for job in self.jobs if job["jd_id"] not in remove]
+            removed = before - len(self.jobs)
+            if removed:
+                self._rebuild(embedding_model)
+                self.save()
+        return removed
+
+    def _rebuild(self, embedding_model) -> None:
+        """Recompute the document, skill and requirement matrices from the parsed jobs."""
+        self.model_id = list(model_identity(embedding_model))
+        if not self.jobs:
+            self.jd_embeddings = self.skill_embeddings = self.skill_matrix = None
+            self.skill_vocab = []
+            return
+
+        jd_embeddings = _document_embeddings([job["parsed"].get("match_text", "") for job in self.jobs], embedding_model)
+
+        skill_vocab = sorted({skill for job in self.jobs for skill in job["parsed"].get("required_skills", [])})
+        skill_vectors = _encode_skill_vectors(skill_vocab, embedding_model)
+        dim = jd_embeddings.shape[1]
+        skill_embeddings = np.stack([skill_vectors[s] for s in skill_vocab]) if skill_vocab else np.zeros((0, dim), dtype=np.float32)
+
+        self.jd_embeddings, self.skill_vocab, self.skill_embeddings = jd_embeddings, skill_vocab, skill_embeddings
+        self.skill_matrix = _requirement_matrix(self.jobs, skill_vocab)
+
+    def _update_rows(self, jobs: List[Dict[str, Any]], rows: List[int], embedding_model) -> None:
+        """Adopt jobs whose given rows are new or replaced, encoding only those jobs and their unseen skills.
+
+        Skills no longer required by any job stay in the vocabulary with an empty
+        column until the next full rebuild.
+        """
+        jd_embeddings = np.zeros((len(jobs), self.jd_embeddings.shape[1]), dtype=self.jd_embeddings.dtype)
+        jd_embeddings[:len(self.jd_embeddings)] = self.jd_embeddings
+        jd_embeddings[rows] = _document_embeddings([jobs[row]["parsed"].get("match_text", "") for row in rows], embedding_model)
+
+        known = set(self.skill_vocab)
+        new_skills = list(dict.fromkeys(
+            skill for row in rows for skill in jobs[row]["parsed"].get("required_skills", []) if skill not in known
+        ))
+        skill_vocab, skill_embeddings = self.skill_vocab, self.skill_embeddings
+        if new_skills:
+            skill_vectors = _encode_skill_vectors(new_skills, embedding_model)
+            skill_vocab = skill_vocab + new_skills
+            skill_embeddings = np.concatenate([skill_embeddings, np.stack([skill_vectors[s] for s in new_skills])])
+
+        self.jobs, self.jd_embeddings, self.skill_vocab, self.skill_embeddings = jobs, jd_embeddings, skill_vocab, skill_embeddings
+        self.skill_matrix = _requirement_matrix(jobs, skill_vocab)
+
+    def _ensure_model(self, embedding_model) -> None:
+        """Re-embed the catalog if it was built with a different embedding model."""
+        if self.jobs and self.model_id != list(model_identity(embedding_model)):
+            logger.info("JD catalog was built with a different embedding model, rebuilding embeddings")
+            self._rebuild(embedding_model)
+            self.save()
+
+    def score_all(self, resume_data: Dict[str, Any], embedding_model) -> np.ndarray:
+        """Overall match score of one parsed resume against every job in the catalog.
+
+        Uses the same components and weights as calculate_match_score, computed
+        against the precomputed JD matrices instead of per-job encodes.
+        """
+        return self._score_jobs(resume_data, embedding_model)[1]
+
+    def _score_jobs(self, resume_data: Dict[str, Any], embedding_model) -> Tuple[List[Dict[str, Any]], np.ndarray]:
+        """The jobs scored and their overall scores, from one snapshot taken under the lock."""
+        with self._lock:
+            self._ensure_model(embedding_model)
+            if not self.jobs:
+                return [], np.zeros(0)
+            jobs, jd_embeddings = list(self.jobs), self.jd_embeddings
+            skill_vocab, skill_embeddings, skill_matrix = self.skill_vocab, self.skill_embeddings, self.skill_matrix
+
+        # --- 1. Skill Matching over the catalog skill vocabulary ---
+        names = resume_skill_names(resume_data)
+        name_set = set(names)
+        exact = np.array([skill.lower() in name_set for skill in skill_vocab], dtype=bool)
+        semantic = np.zeros(len(skill_vocab), dtype=bool)
+        if names and len(skill_vocab):
+            resume_vectors = _encode_skill_vectors(names, embedding_model)
+            resume_matrix = np.stack([resume_vectors[name] for name in names])
+            semantic = ~exact & ((skill_embeddings @ resume_matrix.T).max(axis=1) > 0.7)
+        matched = (exact | semantic).astype(np.float32)
+
+        required_counts = skill_matrix.sum(axis=1)
+        skill_scores = np.where(required_counts > 0, (skill_matrix @ matched) / np.maximum(required_counts, 1), 1.0)
+
+        # --- 2. Experience Matching ---
+        years = calculate_total_experience(resume_data.get("work", []))
+        required_years = np.array([job["parsed"].get("required_experience_years", 0) for job in jobs], dtype=np.float64)
+        experience_scores = np.where(required_years > 0, np.minimum(1.0, years / np.maximum(required_years, 1e-8)), 1.0)
+
+        # --- 3. Education Matching, once per distinct requirement ---
+        required_education = [job["parsed"].get("required_education", "") for job in jobs]
+        education_by_requirement = {req: _education_score(req, resume_data.get("education", [])) for req in set(required_education)}
+        education_scores = np.array([education_by_requirement[req] for req in required_education])
+
+        # --- 4. Semantic Document Score ---
+        resume_vector = _document_embeddings([resume_document_text(resume_data)], embedding_model)[0]
+        semantic_scores = jd_embeddings @ resume_vector
+
+        return jobs, _overall_scores(skill_scores, experience_scores, education_scores, semantic_scores)
+
+    def match(self, resume_data: Dict[str, Any], embedding_model, top_k: int = 10) -> List[Dict[str, Any]]:
+        """Rank catalog jobs for one parsed resume and return the top-k with full match details."""
+        if top_k < 1:
+            raise ValueError(f"top_k must be at least 1, got {top_k}")
+        # Scores are attached to the jobs they were computed for, even if the catalog changes meanwhile
+        jobs, scores = self._score_jobs(resume_data, embedding_model)
+        if not len(scores):
+            return []
+        top_k = min(top_k, len(scores))
+        top_indices = np.argpartition(-scores, top_k - 1)[:top_k]
+        top_indices = top_indices[np.argsort(-scores[top_indices], kind="stable")]
+
+        results = []
+        for rank, index in enumerate(top_indices, start=1):
+            job = jobs[index]
+            results.append({
+                "rank": rank,
+                "jd_id": job["jd_id"],
+                "title": job["parsed"].get("title", ""),
+                "match_score": calculate_match_score(resume_data, job["parsed"], embedding_model),
+            })
+        return results
+
+_catalog: Optional[JDCatalog] = None
+_catalog_lock = threading.Lock()
+
+def get_jd_catalog() -> JDCatalog:
+    """Return the process-wide JD catalog, loading it on first use."""
+    global _catalog
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = JDCatalog()
+        return _catalog
@@ -23,17 +23,18 @@ def load_job_description(file_path: str) -> Optional[str]:
         print(f"Error loading job description: {str(e)}")
         return None
 
+# Common programming languages and technologies
+TECH_KEYWORDS = [
+    "python", "java", "javascript", "typescript", "react", "angular", "vue",
+    "node.js", "express", "django", "flask", "spring", "spring boot", "sql", "nosql",
+    "mongodb", "postgresql", "mysql", "aws", "azure", "gcp", "docker",
+    "kubernetes", "git", "ci/cd", "agile", "scrum", "microservices", "rest", "rest apis"
+]
+
 def extract_required_skills(text: str) -> List[str]:
     """Extract required skills from job description text."""
     skills = []
-    
-    # Common programming languages and technologies
-    tech_keywords = [
-        "python", "java", "javascript", "typescript", "react", "angular", "vue",
-        "node.js", "express", "django", "flask", "spring", "spring boot", "sql", "nosql",
-        "mongodb", "postgresql", "mysql", "aws", "azure", "gcp", "docker",
-        "kubernetes", "git", "ci/cd", "agile", "scrum", "microservices", "rest", "rest apis"
-    ]
+    tech_keywords = TECH_KEYWORDS
     
     text_lower = text.lower()
     logger.debug(f"extract_required_skills - Processing text:\n{text_lower[:500]}...") # Log first 500 chars
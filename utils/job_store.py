@@ -0,0 +1,244 @@
+import os
+import json
+import time
+import uuid
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+from config.config import config
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+JOB_STATUSES = ("queued", "running", "done", "failed")
+RESULT_ORDERS = ("score", "upload")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    jd_name TEXT NOT NULL,
+    jd_text TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    owner TEXT,
+    heartbeat_at REAL,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+CREATE TABLE IF NOT EXISTS job_items (
+    job_id TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    filename TEXT NOT NULL,
+    content BLOB,
+    status TEXT NOT NULL DEFAULT 'pending',
+    overall_score REAL,
+    result TEXT,
+    error TEXT,
+    PRIMARY KEY (job_id, position)
+);
+CREATE INDEX IF NOT EXISTS job_items_score ON job_items (job_id, overall_score DESC);
+"""
+
+class JobStore:
+    """SQLite-backed queue of batch matching jobs.
+
+    A job is one job description and its uploaded resume PDFs, stored as one
+    row per resume with the file content, so a job outlives the request that
+    submitted it and the process that runs it. Results are written per resume
+    as they finish and the file contents are dropped once the job is done.
+
+    A worker claims a job under a lease that each saved chunk of results
+    renews. Jobs whose lease has run out (the worker crashed or was killed) are
+    claimed again and continue with their pending resumes, which also makes the
+    store safe to share between server processes.
+    """
+
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = db_path or config["jobs_config"]["db_path"]
+        self.lease_seconds = config["jobs_config"]["lease_seconds"]
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        """A short-lived connection committing on success, so any thread or process can use the store."""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def create_job(self, jd_text: str, jd_name: str, resumes: List[Tuple[str, bytes]]) -> str:
+        """Queue a job for a job description and (filename, PDF bytes) pairs. Returns the job ID."""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (job_id, status, jd_name, jd_text, total, created_at, updated_at) VALUES (?, 'queued', ?, ?, ?, ?, ?)",
+                (job_id, jd_name, jd_text, len(resumes), now, now),
+            )
+            conn.executemany(
+                "INSERT INTO job_items (job_id, position, filename, content) VALUES (?, ?, ?, ?)",
+                [(job_id, position, filename, sqlite3.Binary(content)) for position, (filename, content) in enumerate(resumes)],
+            )
+        logger.info(f"Queued job {job_id} with {len(resumes)} resumes")
+        return job_id
+
+    def claim_next_job(self, owner: str) -> Optional[Dict[str, Any]]:
+        """Claim the oldest queued job, or a running job whose lease has expired.
+
+        Returns:
+            The claimed job with its JD text, or None when there is nothing to do
+        """
+        now = time.time()
+        with self._connect() as conn:
+            # BEGIN IMMEDIATE takes the write lock, so two workers cannot claim the same job
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT job_id, jd_name, jd_text, total FROM jobs "
+                "WHERE status = 'queued' OR (status = 'running' AND heartbeat_at < ?) ORDER BY created_at LIMIT 1",
+                (now - self.lease_seconds,),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = 'running', owner = ?, heartbeat_at = ?, updated_at = ? WHERE job_id = ?",
+                (owner, now, now, row["job_id"]),
+            )
+        logger.info(f"Worker {owner} claimed job {row['job_id']}")
+        return dict(row)
+
+    def pending_positions(self, job_id: str) -> List[int]:
+        """Upload positions of the resumes of a job that have no result yet."""
+        with self._connect() as conn:
+            rows = conn.execute("SELECT position FROM job_items WHERE job_id = ? AND status = 'pending' ORDER BY position", (job_id,)).fetchall()
+        return [row["position"] for row in rows]
+
+    def load_resumes(self, job_id: str, positions: List[int]) -> List[Tuple[int, str, bytes]]:
+        """(position, filename, PDF bytes) of the given resumes of a job, in position order."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT position, filename, content FROM job_items WHERE job_id = ? AND position IN ({', '.join('?' * len(positions))}) ORDER BY position",
+                (job_id, *positions),
+            ).fetchall()
+        return [(row["position"], row["filename"], bytes(row["content"])) for row in rows]
+
+    def save_results(self, job_id: str, owner: str, results: List[Tuple[int, Optional[Dict[str, Any]], Optional[str]]]) -> bool:
+        """Store (position, match result, error) for finished resumes and renew the worker's lease.
+
+        Returns:
+            False if the job is no longer held by this worker, whose results are then discarded
+        """
+        now = time.time()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            held = conn.execute(
+                "UPDATE jobs SET heartbeat_at = ?, updated_at = ? WHERE job_id = ? AND owner = ? AND status = 'running'",
+                (now, now, job_id, owner),
+            ).rowcount
+            if not held:
+                return False
+            conn.executemany(
+                "UPDATE job_items SET status = ?, overall_score = ?, result = ?, error = ? WHERE job_id = ? AND position = ?",
+                [
+                    ("failed" if error else "done",
+                     result["match_score"]["overall_score"] if result else None,
+                     json.dumps(result) if result else None,
+                     error, job_id, position)
+                    for position, result, error in results
+                ],
+            )
+        return True
+
+    def finish_job(self, job_id: str, owner: str, error: Optional[str] = None) -> None:
+        """Mark a job done (or failed with an error) and drop its stored resume files."""
+        now = time.time()
+        with self._connect() as conn:
+            finished = conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, owner = NULL, heartbeat_at = NULL, updated_at = ?, finished_at = ? "
+                "WHERE job_id = ? AND owner = ? AND status = 'running'",
+                ("failed" if error else "done", error, now, now, job_id, owner),
+            ).rowcount
+            if finished:
+                conn.execute("UPDATE job_items SET content = NULL WHERE job_id = ?", (job_id,))
+        if finished:
+            logger.info(f"Job {job_id} {'failed: ' + error if error else 'done'}")
+
+    def release_jobs(self, owner: str) -> int:
+        """Put the running jobs of a worker that is shutting down back in the queue. Returns how many."""
+        with self._connect() as conn:
+            released = conn.execute(
+                "UPDATE jobs SET status = 'queued', owner = NULL, heartbeat_at = NULL, updated_at = ? WHERE owner = ? AND status = 'running'",
+                (time.time(), owner),
+            ).rowcount
+        if released:
+            logger.info(f"Released {released} running jobs of worker {owner}")
+        return released
+
+    def get_job(self, job_id: str, preview: int = 0) -> Optional[Dict[str, Any]]:
+        """Status and progress of a job, with its `preview` best results so far."""
+        with self._connect() as conn:
+            job = conn.execute(
+                "SELECT job_id, status, jd_name, total, error, created_at, updated_at, finished_at FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+            if job is None:
+                return None
+            counts = dict(conn.execute("SELECT status, COUNT(*) FROM job_items WHERE job_id = ? GROUP BY status", (job_id,)).fetchall())
+        job = dict(job)
+        completed, failed = counts.get("done", 0), counts.get("failed", 0)
+        job.update(
+            completed=completed,
+            failed=failed,
+            pending=counts.get("pending", 0),
+            progress=round((completed + failed) / job["total"], 4) if job["total"] else 1.0,
+        )
+        if preview:
+            job["top_results"] = self.get_results(job_id, limit=preview)
+        return job
+
+    def get_results(self, job_id: str, offset: int = 0, limit: int = 50, order: str = "score") -> List[Dict[str, Any]]:
+        """One page of the finished results of a job, best score first or in upload order.
+
+        Failed resumes have an "error" entry instead of a result; by score they
+        come after every scored resume.
+        """
+        if order not in RESULT_ORDERS:
+            raise ValueError(f"Unknown result order: {order}. Expected one of {RESULT_ORDERS}")
+        order_by = "overall_score IS NULL, overall_score DESC, position" if order == "score" else "position"
+        with self._connect() as conn:
+            rows = conn.execute(
+                f"SELECT position, filename, result, error FROM job_items WHERE job_id = ? AND status != 'pending' ORDER BY {order_by} LIMIT ? OFFSET ?",
+                (job_id, limit, offset),
+            ).fetchall()
+        results = []
+        for row in rows:
+            entry = json.loads(row["result"]) if row["result"] else {"error": row["error"]}
+            results.append({"position": row["position"], "filename": row["filename"], **entry})
+        return results
+
+    def stats(self) -> Dict[str, int]:
+        """Number of jobs per status."""
+        with self._connect() as conn:
+            counts = dict(conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+        return {status: counts.get(status, 0) for status in JOB_STATUSES}
+
+_job_store: Optional[JobStore] = None
+_job_store_lock = threading.Lock()
+
+def get_job_store() -> JobStore:
+    """Return the process-wide job store, opening it on first use."""
+    global _job_store
+    with _job_store_lock:
+        if _job_store is None:
+            _job_store = JobStore()
+        return _job_store
@@ -1,12 +1,5 @@
 from typing import Dict, Any, List
-import spacy
-from transformers import pipeline
-
-# Initialize spaCy model
-nlp = spacy.load("en_core_web_sm")
-
-# Initialize NER pipeline
-ner_pipeline = pipeline("ner", model="dbmdz/bert-large-cased-finetuned-conll03-english")
+from utils.models import get_model_registry
 
 def extract_entities_with_llm(text: str) -> Dict[str, Any]:
     """
@@ -18,8 +11,9 @@ def extract_entities_with_llm(text: str) -> Dict[str, Any]:
     Returns:
         Dict[str, Any]: Extracted entities
     """
-    # Get NER predictions
-    ner_results = ner_pipeline(text)
+    # Get NER predictions; spaCy and the NER pipeline are loaded on first use
+    models = get_model_registry()
+    ner_results = models["llm_ner_pipeline"](text)
     
     # Process entities
     entities = {
@@ -65,7 +59,7 @@ def extract_entities_with_llm(text: str) -> Dict[str, Any]:
     del entities["location_parts"] # Remove the temporary list
 
     # Extract summary using spaCy
-    doc = nlp(text)
+    doc = models["spacy_nlp"](text)
     summary = ""
     for sent in doc.sents:
         if len(summary) < 200:  # Limit summary length
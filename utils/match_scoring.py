@@ -2,10 +2,16 @@
 
 import re
 import logging
-from typing import Dict, Any, List, Tuple
-from sentence_transformers import SentenceTransformer
-import torch
+from typing import TYPE_CHECKING, Callable, Dict, Any, List, Optional, Tuple
+import numpy as np
 from datetime import datetime
+from config.config import config
+from utils.embedding_cache import encode_texts
+from utils.chunking import chunked_document_embeddings
+from utils.skill_vocabulary import get_skill_vocabulary
+
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
 
 # Configure logging for this module
 logging.basicConfig(level=logging.DEBUG)
@@ -42,104 +48,136 @@ def calculate_total_experience(work_experience: List[Dict[str, Any]]) -> float:
     logger.debug(f"calculate_total_experience - Total calculated years: {total_years}")
     return total_years
 
-def _calculate_semantic_similarity(text1: str, text2: str, model: SentenceTransformer) -> float:
-    """Helper to calculate semantic similarity between two texts."""
-    try:
-        embedding1 = model.encode([text1], convert_to_tensor=True)
-        embedding2 = model.encode([text2], convert_to_tensor=True)
-        # Use PyTorch utilities for cosine similarity for robustness
-        cos_sim = torch.nn.functional.cosine_similarity(embedding1, embedding2)
-        return cos_sim.item()
-    except Exception as e:
-        logger.error(f"Error calculating semantic similarity: {e}")
-        return 0.0
+# Weights of the overall score components
+SCORE_WEIGHTS = {"skills": 0.5, "experience": 0.3, "education": 0.1, "semantic": 0.1}
+
+# Degree keywords that must appear in both the requirement and a resume study type
+EDUCATION_KEYWORDS = ["bachelor", "b.tech", "master", "m.tech", "phd"]
+
+# Candidates whose upper bound is within this of the k-th best score are still scored,
+# so float rounding can never prune a candidate that ties for the top-k
+PRUNING_TOLERANCE = 1e-6
 
-def calculate_match_score(resume_data: Dict[str, Any], jd_data: Dict[str, Any], embedding_model: SentenceTransformer) -> Dict[str, Any]:
+def resume_skill_names(resume_data: Dict[str, Any]) -> List[str]:
+    """Lowercased skill names of a parsed resume, in resume order."""
+    return [skill.get("name", "").lower() for skill in resume_data.get("skills", [])]
+
+def resume_document_text(resume_data: Dict[str, Any]) -> str:
+    """Text used for the document-level semantic score of a resume."""
+    return resume_data.get("summary", "") + " ".join(resume_skill_names(resume_data))
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-8)
+
+def _document_embeddings(texts: List[str], model: "SentenceTransformer") -> np.ndarray:
+    """L2-normalized document embeddings, one row per text.
+
+    Long documents are embedded chunk by chunk and pooled, so nothing is lost to
+    the model's sequence limit and an edited document only re-encodes the
+    chunks that changed.
     """
-    Calculates a comprehensive match score between a resume and a job description.
+    if config["embedding_chunk_config"]["enabled"]:
+        return _normalize_rows(chunked_document_embeddings(texts, model))
+    return _normalize_rows(encode_texts(model, texts))
 
-    This is the primary function that orchestrates the scoring by comparing skills,
-    experience, and education, and returns a structured dictionary with all details.
+def job_description_embedding(jd_data: Dict[str, Any], embedding_model: "SentenceTransformer") -> np.ndarray:
+    """L2-normalized document embedding of a parsed job description.
+
+    Pass it as ``jd_vector`` to score several batches of resumes against the
+    same job description without embedding it again for every batch.
     """
-    logger.debug(f"Starting match score calculation...")
+    return _document_embeddings([jd_data.get("match_text", "")], embedding_model)[0]
 
-    # --- 1. Skill Matching ---
-    resume_skills_list = resume_data.get("skills", [])
-    jd_skills = jd_data.get("required_skills", [])
-    resume_skill_names = [skill.get("name", "").lower() for skill in resume_skills_list]
-    
-    matched_skills = []
-    missing_skills = []
-    semantically_matched = []
-    
-    # Use a copy to safely remove items
-    unmatched_jd_skills = list(jd_skills)
-
-    # Exact matches first
-    for resume_skill in resume_skill_names:
-        for jd_skill in list(unmatched_jd_skills):
-            if resume_skill == jd_skill.lower():
-                matched_skills.append(jd_skill)
-                unmatched_jd_skills.remove(jd_skill)
+def _encode_skill_vectors(skills: List[str], model: "SentenceTransformer") -> Dict[str, np.ndarray]:
+    """
+    Normalized vectors keyed by skill for each unique skill string.
 
-    # Semantic matches for the remaining
-    for jd_skill in list(unmatched_jd_skills):
-        best_match = (None, 0.0)
-        for resume_skill in resume_skill_names:
-            similarity = _calculate_semantic_similarity(jd_skill, resume_skill, embedding_model)
-            if similarity > best_match[1]:
-                best_match = (resume_skill, similarity)
-        
-        # Use a threshold for semantic matching (e.g., > 0.7)
-        if best_match[1] > 0.7:
-            semantically_matched.append((jd_skill, best_match[0].title(), best_match[1]))
-            unmatched_jd_skills.remove(jd_skill)
-    
-    missing_skills = unmatched_jd_skills
-    
-    skill_score = (len(matched_skills) + len(semantically_matched)) / len(jd_skills) if jd_skills else 1.0
+    Vocabulary skills are looked up in the precomputed skill vocabulary; only
+    the remaining strings are encoded, once each.
+    """
+    unique_skills = list(dict.fromkeys(skills))
+    if not unique_skills:
+        return {}
+    vocabulary = get_skill_vocabulary(model)
+    vectors = vocabulary.lookup(unique_skills) if vocabulary is not None else [None] * len(unique_skills)
+    missing = [skill for skill, vector in zip(unique_skills, vectors) if vector is None]
+    if missing:
+        encoded = dict(zip(missing, encode_texts(model, missing)))
+        vectors = [vector if vector is not None else encoded[skill] for skill, vector in zip(unique_skills, vectors)]
+    return dict(zip(unique_skills, _normalize_rows(np.stack(vectors))))
 
-    # --- 2. Experience Matching ---
-    resume_experience_years = calculate_total_experience(resume_data.get("work", []))
-    required_experience_years = jd_data.get("required_experience_years", 0)
-    
-    experience_score = 1.0
-    if required_experience_years > 0:
-        experience_score = min(1.0, resume_experience_years / required_experience_years)
+def _exact_skill_matches(resume_skill_names: List[str], jd_skills: List[str]) -> Tuple[List[str], List[str]]:
+    """Case-insensitive exact matches. Returns (matched JD skills, unmatched JD skills)."""
+    # First position of each resume skill; matches are reported in resume skill order
+    first_position = {}
+    for position, resume_skill in enumerate(resume_skill_names):
+        first_position.setdefault(resume_skill, position)
+    matched = [(first_position[jd_skill.lower()], j) for j, jd_skill in enumerate(jd_skills) if jd_skill.lower() in first_position]
+    matched_skills = [jd_skills[j] for _, j in sorted(matched)]
+    unmatched_jd_skills = [jd_skill for jd_skill in jd_skills if jd_skill.lower() not in first_position]
+    return matched_skills, unmatched_jd_skills
 
-    # --- 3. Education Matching ---
-    required_education_str = jd_data.get("required_education", "")
-    education_score = 1.0  # Default to 1.0 if no education is required
-    if required_education_str:
-        education_score = 0.0 # Assume no match until found
-        # NOTE: This logic is simple. "B.Tech" does not contain "Bachelor".
-        # A robust solution needs a degree equivalency map (e.g., B.Tech -> Bachelor's)
-        keywords = ["bachelor", "b.tech", "master", "m.tech", "phd"]
-        req_edu_lower = required_education_str.lower()
-        
-        for edu in resume_data.get("education", []):
-            study_type_lower = edu.get("studyType", "").lower()
-            if any(keyword in req_edu_lower and keyword in study_type_lower for keyword in keywords):
-                education_score = 1.0
-                break
+def _semantic_skill_matches(jd_skills: List[str], resume_skill_names: List[str], skill_vectors: Dict[str, np.ndarray], threshold: float = 0.7) -> List[Tuple[str, str, float]]:
+    """
+    Finds the best semantically similar resume skill for each JD skill.
 
-    # --- 4. Semantic Document Score ---
-    resume_full_text = resume_data.get("summary", "") + " ".join(resume_skill_names)
-    jd_full_text = jd_data.get("match_text", "")
-    semantic_score = _calculate_semantic_similarity(resume_full_text, jd_full_text, embedding_model)
+    All best matches come from one cosine similarity matrix built from
+    precomputed normalized skill vectors. Returns (jd_skill, resume_skill,
+    similarity) for each JD skill whose best match exceeds the threshold,
+    in JD skill order.
+    """
+    if not jd_skills or not resume_skill_names:
+        return []
 
-    # --- 5. Final Weighted Score ---
-    weights = {"skills": 0.5, "experience": 0.3, "education": 0.1, "semantic": 0.1}
-    overall_score = (
-        skill_score * weights["skills"] +
-        experience_score * weights["experience"] +
-        education_score * weights["education"] +
-        semantic_score * weights["semantic"]
+    jd_vectors = np.stack([skill_vectors[s] for s in jd_skills])
+    resume_vectors = np.stack([skill_vectors[s] for s in resume_skill_names])
+    similarity_matrix = jd_vectors @ resume_vectors.T
+
+    # argmax returns the first maximum, matching the resume-order tie breaking of a sequential scan
+    best_indices = similarity_matrix.argmax(axis=1)
+    best_scores = similarity_matrix[np.arange(len(jd_skills)), best_indices]
+
+    return [
+        (jd_skill, resume_skill_names[best_index], float(best_score))
+        for jd_skill, best_index, best_score in zip(jd_skills, best_indices, best_scores)
+        if best_score > threshold
+    ]
+
+def _education_score(required_education_str: str, education_entries: List[Dict[str, Any]]) -> float:
+    """1.0 if any degree keyword appears in both the requirement and a resume study type."""
+    if not required_education_str:
+        return 1.0  # Default to 1.0 if no education is required
+    # NOTE: This logic is simple. "B.Tech" does not contain "Bachelor".
+    # A robust solution needs a degree equivalency map (e.g., B.Tech -> Bachelor's)
+    req_edu_lower = required_education_str.lower()
+    for edu in education_entries:
+        study_type_lower = edu.get("studyType", "").lower()
+        if any(keyword in req_edu_lower and keyword in study_type_lower for keyword in EDUCATION_KEYWORDS):
+            return 1.0
+    return 0.0
+
+def _experience_scores(experience_years: np.ndarray, required_experience_years: float) -> np.ndarray:
+    if required_experience_years > 0:
+        return np.minimum(1.0, experience_years / required_experience_years)
+    return np.ones_like(experience_years)
+
+def _overall_scores(skill_scores: np.ndarray, experience_scores: np.ndarray, education_scores: np.ndarray, semantic_scores: np.ndarray) -> np.ndarray:
+    return (
+        skill_scores * SCORE_WEIGHTS["skills"] +
+        experience_scores * SCORE_WEIGHTS["experience"] +
+        education_scores * SCORE_WEIGHTS["education"] +
+        semantic_scores * SCORE_WEIGHTS["semantic"]
     )
 
-    # --- 6. Construct Final Result Dictionary ---
-    # This structure matches what main.py expects
-    results = {
+def _build_match_result(overall_score: float, skill_score: float, experience_score: float, education_score: float,
+                        semantic_score: float, resume_experience_years: float, jd_data: Dict[str, Any],
+                        matched_skills: List[str], missing_skills: List[str],
+                        semantically_matched: List[Tuple[str, str, float]]) -> Dict[str, Any]:
+    """Construct the result dictionary main.py and the web API expect."""
+    required_education_str = jd_data.get("required_education", "")
+    required_experience_years = jd_data.get("required_experience_years", 0)
+    return {
         'overall_score': overall_score,
         'skill_score': skill_score,
         'experience_score': experience_score,
@@ -162,5 +200,179 @@ def calculate_match_score(resume_data: Dict[str, Any], jd_data: Dict[str, Any],
             }
         }
     }
+
+def calculate_match_scores_batch(resumes: List[Dict[str, Any]], jd_data: Dict[str, Any], embedding_model: "SentenceTransformer",
+                                 jd_vector: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+    """
+    Scores many parsed resumes against one job description in bulk.
+
+    Skill, experience, education and semantic components are computed as NumPy
+    arrays over the whole batch: every skill string and every resume document is
+    encoded in one pass, and document similarity is a single matmul against the
+    JD vector (from job_description_embedding, or embedded here when not given).
+    Returns one result per resume, in input order, with the same structure as
+    calculate_match_score.
+    """
+    logger.debug(f"Starting batch match score calculation for {len(resumes)} resumes...")
+    if not resumes:
+        return []
+
+    jd_skills = jd_data.get("required_skills", [])
+    skill_names = [resume_skill_names(resume) for resume in resumes]
+
+    # --- 1. Skill Matching ---
+    exact_matches = [_exact_skill_matches(names, jd_skills) for names in skill_names]
+
+    # Semantic matches for the remaining, from one encode over every skill string in the batch
+    semantic_texts = [skill for _, unmatched in exact_matches for skill in unmatched]
+    semantic_texts += [name for names, (_, unmatched) in zip(skill_names, exact_matches) if unmatched for name in names]
+    try:
+        skill_vectors = _encode_skill_vectors(semantic_texts, embedding_model)
+    except Exception as e:
+        logger.error(f"Error calculating semantic skill similarity: {e}")
+        skill_vectors = None
+
+    skill_results = []
+    for names, (matched_skills, unmatched_jd_skills) in zip(skill_names, exact_matches):
+        semantically_matched = []
+        if skill_vectors is not None:
+            for jd_skill, resume_skill, similarity in _semantic_skill_matches(unmatched_jd_skills, names, skill_vectors):
+                semantically_matched.append((jd_skill, resume_skill.title(), similarity))
+                unmatched_jd_skills.remove(jd_skill)
+        skill_results.append((matched_skills, unmatched_jd_skills, semantically_matched))
+
+    matched_counts = np.array([len(matched) + len(semantic) for matched, _, semantic in skill_results], dtype=np.float64)
+    skill_scores = matched_counts / len(jd_skills) if jd_skills else np.ones(len(resumes))
+
+    # --- 2. Experience Matching ---
+    experience_years = np.array([calculate_total_experience(resume.get("work", [])) for resume in resumes], dtype=np.float64)
+    experience_scores = _experience_scores(experience_years, jd_data.get("required_experience_years", 0))
+
+    # --- 3. Education Matching ---
+    required_education_str = jd_data.get("required_education", "")
+    education_scores = np.array([_education_score(required_education_str, resume.get("education", [])) for resume in resumes])
+
+    # --- 4. Semantic Document Score ---
+    try:
+        if jd_vector is None:
+            jd_vector = job_description_embedding(jd_data, embedding_model)
+        document_vectors = _document_embeddings([resume_document_text(resume) for resume in resumes], embedding_model)
+        semantic_scores = document_vectors @ jd_vector
+    except Exception as e:
+        logger.error(f"Error calculating semantic similarity: {e}")
+        semantic_scores = np.zeros(len(resumes))
+
+    # --- 5. Final Weighted Score ---
+    overall_scores = _overall_scores(skill_scores, experience_scores, education_scores, semantic_scores)
+
+    # --- 6. Construct Final Result Dictionaries ---
+    results = [
+        _build_match_result(
+            float(overall_scores[i]), float(skill_scores[i]), float(experience_scores[i]), float(education_scores[i]),
+            float(semantic_scores[i]), float(experience_years[i]), jd_data, *skill_results[i]
+        )
+        for i in range(len(resumes))
+    ]
+    logger.debug(f"Final batch match results: {len(results)} resumes scored")
+    return results
+
+def upper_bound_scores(skill_scores: np.ndarray, potential_skill_scores: np.ndarray, experience_scores: np.ndarray, education_scores: np.ndarray) -> np.ndarray:
+    """Best possible overall scores given the exact components.
+
+    Every JD skill left unmatched by exact matching may still match semantically
+    (if the resume has skills) and the document similarity is at most 1.0.
+    """
+    return _overall_scores(skill_scores + potential_skill_scores, experience_scores, education_scores, np.ones_like(skill_scores))
+
+def prune_top_k(upper_bounds: np.ndarray, top_k: int, score_rows: Callable[[np.ndarray], np.ndarray],
+                batch_size: int) -> Tuple[np.ndarray, np.ndarray, int]:
+    """Exact top-k over rows that skips full scoring for rows that cannot reach the k-th best.
+
+    Rows are fully scored with ``score_rows`` in batches, highest upper bound
+    first. Once k rows are scored, any row whose upper bound is below the k-th
+    best score so far is pruned.
+
+    Returns:
+        The top-k rows and their scores, best first (ties keep row order), and
+        the number of pruned rows
+    """
+    order = np.argsort(-upper_bounds, kind="stable")
+    scored_rows, scores = [], []
+    kth_best = -np.inf
+    start = 0
+    while start < len(order):
+        # The first batch is k rows so that a k-th best score exists as early as possible
+        size = max(top_k, 1) if start == 0 else batch_size
+        rows = order[start:start + size]
+        start += size
+        rows = rows[upper_bounds[rows] + PRUNING_TOLERANCE >= kth_best]
+        if not len(rows):
+            # Rows are in upper bound order, so no later row can reach the k-th best either
+            break
+        scored_rows.extend(rows)
+        scores.extend(score_rows(rows))
+        if len(scores) >= top_k:
+            kth_best = np.partition(np.asarray(scores), len(scores) - top_k)[len(scores) - top_k]
+
+    scored_rows, scores = np.asarray(scored_rows, dtype=np.int64), np.asarray(scores, dtype=np.float64)
+    best = np.lexsort((scored_rows, -scores))[:top_k]
+    return scored_rows[best], scores[best], len(upper_bounds) - len(scored_rows)
+
+def calculate_top_k_match_scores(resumes: List[Dict[str, Any]], jd_data: Dict[str, Any], embedding_model: "SentenceTransformer",
+                                 top_k: int, batch_size: Optional[int] = None, jd_vector: Optional[np.ndarray] = None) -> Dict[str, Any]:
+    """
+    Returns the k best matching resumes for a job description with upper-bound pruning.
+
+    The exact skill, experience and education components are computed for every
+    resume first. Semantic skill matching and document embedding then only run
+    for resumes whose best possible overall score can still reach the k-th best.
+    The returned results are identical to calculate_match_scores_batch for those
+    resumes.
+
+    Returns:
+        Dictionary with "results" as (input index, match result) pairs best
+        first, and the number of "scored" and "pruned" resumes
+    """
+    if not resumes or top_k <= 0:
+        return {"results": [], "scored": 0, "pruned": len(resumes)}
+    batch_size = batch_size or config["matching_config"]["pruning_batch_size"]
+
+    jd_skills = jd_data.get("required_skills", [])
+    skill_names = [resume_skill_names(resume) for resume in resumes]
+    exact_matches = [_exact_skill_matches(names, jd_skills) for names in skill_names]
+    if jd_skills:
+        skill_scores = np.array([len(matched) for matched, _ in exact_matches], dtype=np.float64) / len(jd_skills)
+        potential = np.array([len(unmatched) if names else 0 for names, (_, unmatched) in zip(skill_names, exact_matches)], dtype=np.float64) / len(jd_skills)
+    else:
+        skill_scores, potential = np.ones(len(resumes)), np.zeros(len(resumes))
+    experience_years = np.array([calculate_total_experience(resume.get("work", [])) for resume in resumes], dtype=np.float64)
+    experience_scores = _experience_scores(experience_years, jd_data.get("required_experience_years", 0))
+    required_education_str = jd_data.get("required_education", "")
+    education_scores = np.array([_education_score(required_education_str, resume.get("education", [])) for resume in resumes])
+
+    full_results: Dict[int, Dict[str, Any]] = {}
+    def score_rows(rows: np.ndarray) -> np.ndarray:
+        batch = calculate_match_scores_batch([resumes[row] for row in rows], jd_data, embedding_model, jd_vector)
+        full_results.update(zip(rows.tolist(), batch))
+        return np.array([result["overall_score"] for result in batch])
+
+    upper_bounds = upper_bound_scores(skill_scores, potential, experience_scores, education_scores)
+    top_rows, _, pruned = prune_top_k(upper_bounds, top_k, score_rows, batch_size)
+    logger.info(f"Top-{top_k} scoring: {len(full_results)} resumes scored, {pruned} pruned")
+    return {
+        "results": [(int(row), full_results[int(row)]) for row in top_rows],
+        "scored": len(full_results),
+        "pruned": pruned,
+    }
+
+def calculate_match_score(resume_data: Dict[str, Any], jd_data: Dict[str, Any], embedding_model: "SentenceTransformer") -> Dict[str, Any]:
+    """
+    Calculates a comprehensive match score between a resume and a job description.
+
+    This is the primary function that orchestrates the scoring by comparing skills,
+    experience, and education, and returns a structured dictionary with all details.
+    """
+    logger.debug(f"Starting match score calculation...")
+    results = calculate_match_scores_batch([resume_data], jd_data, embedding_model)[0]
     logger.debug(f"Final match results: {results}")
-    return results
\ No newline at end of file
+    return results
@@ -1,101 +1,154 @@
 import os
+import time
 import logging
-from typing import Dict, Any
-from sentence_transformers import SentenceTransformer
-from transformers import AutoModelForSequenceClassification, AutoTokenizer
-from flair.models import SequenceTagger
+import resource
+import threading
+from collections.abc import Mapping
+from typing import Callable, Dict, Any, Iterable, Iterator, Optional
 from config.config import config
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def load_models() -> Dict[str, Any]:
-    """Load all required models for the pipeline.
-    
+# Models of the matching pipeline, loaded by load_models() when no names are given
+PIPELINE_MODELS = ["embedding_model", "reranking_model", "reranking_tokenizer", "ner_model"]
+
+def current_rss_bytes() -> int:
+    """Resident set size of this process."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        # Peak RSS in KiB on Linux; the closest portable approximation
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def _load_embedding_model():
+    from utils.inference_backends import load_embedding_model
+    os.makedirs(config["models_dir"], exist_ok=True)
+    return load_embedding_model()
+
+def _load_reranking_model():
+    from utils.inference_backends import load_reranking_model
+    return load_reranking_model()
+
+def _load_reranking_tokenizer():
+    from transformers import AutoTokenizer
+    return AutoTokenizer.from_pretrained(config["model_config"]["reranking_model"]["model_name"])
+
+def _load_ner_model():
+    from flair.models import SequenceTagger
+    return SequenceTagger.load(config["model_config"]["ner_model"]["model_name"])
+
+def _load_spacy_nlp():
+    import spacy
+    return spacy.load("en_core_web_sm")
+
+def _load_llm_ner_pipeline():
+    from transformers import pipeline
+    return pipeline("ner", model="dbmdz/bert-large-cased-finetuned-conll03-english")
+
+MODEL_LOADERS: Dict[str, Callable[[], Any]] = {
+    "embedding_model": _load_embedding_model,
+    "reranking_model": _load_reranking_model,
+    "reranking_tokenizer": _load_reranking_tokenizer,
+    "ner_model": _load_ner_model,
+    "spacy_nlp": _load_spacy_nlp,
+    "llm_ner_pipeline": _load_llm_ner_pipeline,
+}
+
+class ModelRegistry(Mapping):
+    """Process-wide registry that loads each model on first use.
+
+    Every caller gets the same instance of a model. The registry is a read-only
+    mapping, so ``models["embedding_model"]`` works wherever the old dictionary
+    from load_models() was used; only the models actually accessed are loaded.
+    """
+
+    def __init__(self, loaders: Optional[Dict[str, Callable[[], Any]]] = None):
+        self._loaders = dict(loaders or MODEL_LOADERS)
+        self._models: Dict[str, Any] = {}
+        self._stats: Dict[str, Dict[str, Any]] = {}
+        self._locks = {name: threading.Lock() for name in self._loaders}
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._loaders)
+
+    def __len__(self) -> int:
+        return len(self._loaders)
+
+    def __contains__(self, name: object) -> bool:
+        # Membership must not trigger a load
+        return name in self._loaders
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self._models
+
+    def __getitem__(self, name: str) -> Any:
+        """Return the model, loading it first if no caller has used it yet."""
+        if name not in self._loaders:
+            raise KeyError(f"Unknown model: {name}. Expected one of {list(self._loaders)}")
+        if name in self._models:
+            return self._models[name]
+        with self._locks[name]:
+            if name not in self._models:
+                logger.info(f"Loading {name}...")
+                rss_before = current_rss_bytes()
+                start = time.perf_counter()
+                try:
+                    model = self._loaders[name]()
+                except Exception as e:
+                    logger.error(f"Error loading {name}: {str(e)}")
+                    raise
+                self._stats[name] = {
+                    "load_seconds": round(time.perf_counter() - start, 3),
+                    "rss_delta_mb": round((current_rss_bytes() - rss_before) / 2**20, 1),
+                }
+                self._models[name] = model
+                logger.info(f"Loaded {name} in {self._stats[name]['load_seconds']}s (+{self._stats[name]['rss_delta_mb']} MB RSS)")
+        return self._models[name]
+
+    def get(self, name: str, default: Any = None) -> Any:
+        """Return the model, loading it if needed, or default for an unknown name."""
+        if name not in self._loaders:
+            return default
+        return self[name]
+
+    def preload(self, names: Iterable[str]) -> None:
+        """Load the named models now instead of on first use."""
+        for name in names:
+            self[name]
+
+    def stats(self) -> Dict[str, Any]:
+        """Load time and RSS growth of every loaded model, plus current process RSS."""
+        return {
+            "loaded": {name: dict(self._stats[name]) for name in self._models},
+            "not_loaded": [name for name in self._loaders if name not in self._models],
+            "rss_mb": round(current_rss_bytes() / 2**20, 1),
+        }
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+def get_model_registry() -> ModelRegistry:
+    """Return the process-wide model registry."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry()
+        return _registry
+
+def load_models(names: Optional[Iterable[str]] = None) -> ModelRegistry:
+    """Load the models a run needs from the shared registry.
+
+    Args:
+        names: Models to load now; None loads every pipeline model. Models not
+            named here are still loaded on first access.
+
     Returns:
-        Dictionary containing loaded models
+        The shared model registry, usable like a dictionary of loaded models
     """
-    models = {}
-    
-    # Load sentence transformer model for embeddings
-    try:
-        logger.info("Loading sentence transformer model...")
-        model_name = config["model_config"]["sentence_transformer"]["model_name"]
-        logger.info(f"Using model: {model_name}")
-        
-        # Create models directory if it doesn't exist
-        os.makedirs(config["models_dir"], exist_ok=True)
-        
-        # Load the model
-        embedding_model = SentenceTransformer(model_name)
-        logger.info("Successfully loaded sentence transformer model")
-        
-        # Store the model
-        models["embedding_model"] = embedding_model
-        logger.info("Stored embedding model in models dictionary")
-        
-    except Exception as e:
-        logger.error(f"Error loading sentence transformer model: {str(e)}")
-        logger.error(f"Model name: {model_name}")
-        logger.error(f"Config: {config['model_config']['sentence_transformer']}")
-        raise
-    
-    # Load reranking model
-    try:
-        logger.info("Loading reranking model...")
-        model_name = config["model_config"]["reranking_model"]["model_name"]
-        logger.info(f"Using model: {model_name}")
-        
-        # Load model and tokenizer
-        reranking_model = AutoModelForSequenceClassification.from_pretrained(
-            model_name,
-            num_labels=1  # For regression task
-        )
-        reranking_tokenizer = AutoTokenizer.from_pretrained(model_name)
-        logger.info("Successfully loaded reranking model and tokenizer")
-        
-        # Store the models
-        models["reranking_model"] = reranking_model
-        models["reranking_tokenizer"] = reranking_tokenizer
-        logger.info("Stored reranking model and tokenizer in models dictionary")
-        
-    except Exception as e:
-        logger.error(f"Error loading reranking model: {str(e)}")
-        logger.error(f"Model name: {model_name}")
-        logger.error(f"Config: {config['model_config']['reranking_model']}")
-        raise
-    
-    # Load NER model
-    try:
-        logger.info("Loading NER model...")
-        model_name = config["model_config"]["ner_model"]["model_name"]
-        logger.info(f"Using model: {model_name}")
-        
-        # Load the model
-        ner_model = SequenceTagger.load(model_name)
-        logger.info("Successfully loaded NER model")
-        
-        # Store the model
-        models["ner_model"] = ner_model
-        logger.info("Stored NER model in models dictionary")
-        
-    except Exception as e:
-        logger.error(f"Error loading NER model: {str(e)}")
-        logger.error(f"Model name: {model_name}")
-        logger.error(f"Config: {config['model_config']['ner_model']}")
-        raise
-    
-    # Verify all required models are loaded
-    required_models = ["embedding_model", "reranking_model", "reranking_tokenizer", "ner_model"]
-    missing_models = [model for model in required_models if model not in models]
-    
-    if missing_models:
-        error_msg = f"Failed to load the following models: {', '.join(missing_models)}"
-        logger.error(error_msg)
-        logger.error(f"Available models: {list(models.keys())}")
-        raise RuntimeError(error_msg)
-    
-    logger.info("All models loaded successfully")
-    logger.info(f"Available models: {list(models.keys())}")
-    return models 
\ No newline at end of file
+    registry = get_model_registry()
+    registry.preload(PIPELINE_MODELS if names is None else names)
+    logger.info(f"Loaded models: {registry.stats()['loaded']}")
+    return registry
@@ -1,24 +1,30 @@
-import fitz  # PyMuPDF
-from typing import Optional
+import os
+from typing import BinaryIO, Optional, Union
 import logging
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def extract_text_from_pdf(pdf_path: str) -> Optional[str]:
+def extract_text_from_pdf(pdf_path: Union[str, bytes, bytearray, BinaryIO]) -> Optional[str]:
     """
     Extract text from a PDF file using PyMuPDF.
     
     Args:
-        pdf_path (str): Path to the PDF file
+        pdf_path: Path to the PDF file, or its content as bytes or a binary file object
+            (e.g. an upload), which is opened in memory without touching the disk
         
     Returns:
         Optional[str]: Extracted text if successful, None otherwise
     """
+    import fitz  # PyMuPDF
     try:
         # Open the PDF file
-        doc = fitz.open(pdf_path)
+        if isinstance(pdf_path, (str, os.PathLike)):
+            doc = fitz.open(pdf_path)
+        else:
+            content = pdf_path if isinstance(pdf_path, (bytes, bytearray)) else pdf_path.read()
+            doc = fitz.open(stream=content, filetype="pdf")
         
         # Extract text from each page
         text = ""
@@ -1,13 +1,11 @@
-from transformers import AutoModelForSequenceClassification, AutoTokenizer
 from config.config import config
-import torch
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
+from utils.models import get_model_registry
 
 def load_reranking_model():
-    model_name = "cross-encoder/ms-marco-MiniLM-L-6-v2"
-    model = AutoModelForSequenceClassification.from_pretrained(model_name, num_labels=1)
-    tokenizer = AutoTokenizer.from_pretrained(model_name)
-    return model, tokenizer
+    """The shared reranking model and tokenizer from the model registry."""
+    models = get_model_registry()
+    return models["reranking_model"], models["reranking_tokenizer"]
 
 def prepare_matches_for_reranking(resume_data: Dict[str, Any], jd_data: Dict[str, Any]) -> List[Dict[str, Any]]:
     """Prepare matches for reranking by combining relevant sections."""
@@ -57,13 +55,61 @@ def prepare_matches_for_reranking(resume_data: Dict[str, Any], jd_data: Dict[str
     
     return matches
 
-def rerank_matches(resume_data: Dict[str, Any], jd_data: Dict[str, Any], model) -> List[Dict[str, Any]]:
+def score_pairs(query: str, passages: List[str], model, tokenizer, batch_size: Optional[int] = None,
+                max_length: Optional[int] = None) -> List[float]:
+    """Score (query, passage) pairs with the cross-encoder in padded mini-batches.
+    
+    All pairs are tokenized once, sorted by token length so each mini-batch pads
+    to a similar length, and run under ``torch.inference_mode``.
+    
+    Args:
+        query: Query text, e.g. the job description
+        passages: Candidate passages to score against the query
+        model: Cross-encoder reranking model
+        tokenizer: Tokenizer matching the reranking model
+        batch_size: Pairs per forward pass, defaults to the reranking model config
+        max_length: Maximum pair length in tokens, defaults to the reranking model config
+        
+    Returns:
+        Sigmoid relevance score per passage, in input order
+    """
+    if not passages:
+        return []
+    
+    import torch
+    reranking_config = config["model_config"]["reranking_model"]
+    batch_size = batch_size or reranking_config["batch_size"]
+    max_length = max_length or reranking_config["max_seq_length"]
+    
+    encodings = tokenizer([query] * len(passages), passages, truncation=True, max_length=max_length)
+    features = [{key: encodings[key][i] for key in encodings.keys()} for i in range(len(passages))]
+    order = sorted(range(len(passages)), key=lambda i: len(features[i]["input_ids"]))
+    
+    scores = [0.0] * len(passages)
+    with torch.inference_mode():
+        for start in range(0, len(order), batch_size):
+            batch_indices = order[start:start + batch_size]
+            inputs = tokenizer.pad([features[i] for i in batch_indices], padding=True, return_tensors="pt")
+            logits = model(**inputs).logits
+            # Use sigmoid for regression scores
+            for i, score in zip(batch_indices, torch.sigmoid(logits[:, 0]).tolist()):
+                scores[i] = score
+    return scores
+
+def rerank_matches(resume_data: Dict[str, Any], jd_data: Dict[str, Any], model, tokenizer=None,
+                   batch_size: Optional[int] = None, max_length: Optional[int] = None) -> List[Dict[str, Any]]:
     """Rerank matches between resume and job description.
     
+    Each resume item is scored as a (job description, item) pair by the
+    cross-encoder, batched through score_pairs.
+    
     Args:
         resume_data: Parsed resume data
         jd_data: Parsed job description data
         model: Reranking model
+        tokenizer: Preloaded reranking tokenizer, loaded once and reused if omitted
+        batch_size: Pairs per forward pass, defaults to the reranking model config
+        max_length: Maximum pair length in tokens, defaults to the reranking model config
         
     Returns:
         List of reranked matches
@@ -74,20 +120,12 @@ def rerank_matches(resume_data: Dict[str, Any], jd_data: Dict[str, Any], model)
     if not matches:
         return []
     
-    # Get tokenizer from AutoTokenizer
-    tokenizer = AutoTokenizer.from_pretrained("cross-encoder/ms-marco-MiniLM-L-6-v2")
-    
-    # Prepare input for the model
-    inputs = [tokenizer(match["text"], return_tensors="pt") for match in matches]
+    if tokenizer is None:
+        tokenizer = get_model_registry()["reranking_tokenizer"]
     
-    # Get scores from the model
-    scores = []
-    for input in inputs:
-        with torch.no_grad():
-            outputs = model(**input)
-            # Use sigmoid for regression scores
-            score = torch.sigmoid(outputs.logits).item()
-            scores.append(score)
+    query = jd_data.get("match_text") or ", ".join(jd_data.get("required_skills", []))
+    scores = score_pairs(query, [match["text"] for match in matches], model, tokenizer,
+                         batch_size=batch_size, max_length=max_length)
     
     # Sort matches by score
     ranked_matches = sorted(
@@ -105,4 +143,4 @@ def rerank_matches(resume_data: Dict[str, Any], jd_data: Dict[str, Any], model)
             "text": match["text"]
         }
         for match, score in ranked_matches
-    ]
\ No newline at end of file
+    ]
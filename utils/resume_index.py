@@ -0,0 +1,411 @@
+import os
+import json
+import math
+import logging
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+from config.config import config
+from utils.embedding_matching import load_faiss_index, search_similar_texts
+from utils.match_scoring import _document_embeddings, resume_document_text, resume_skill_names
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+INDEX_MODES = ("auto", "flat", "ivf", "hnsw")
+
+# Storage of the vectors searched in the first pass; int8 and binary are rescored in float32
+QUANTIZATION_MODES = ("none", "int8", "binary")
+
+# Bytes per stored vector code for each quantization mode
+def code_size(quantization: str, dim: int) -> int:
+    return {"none": 4 * dim, "int8": dim, "binary": dim // 8}[quantization]
+
+def candidate_id_for(parsed_resume: Dict[str, Any], filename: str = "") -> str:
+    """Stable candidate ID: the resume email when present, otherwise the file name stem."""
+    email = parsed_resume.get("email", "").strip().lower()
+    if email:
+        return email
+    return os.path.splitext(os.path.basename(filename))[0]
+
+class ResumeIndex:
+    """Managed FAISS index of resume document vectors keyed by candidate ID.
+
+    Vectors are L2-normalized and searched by inner product, so search scores
+    are cosine similarities. Small corpora use an exact flat index; larger ones
+    switch to IVF (or HNSW when configured). HNSW cannot remove vectors, so its
+    deletes are tombstoned and dropped on the next rebuild.
+
+    With int8 or binary quantization the index holds only the quantized codes
+    (4x or 32x smaller) and the float32 vectors live in a memory-mapped file
+    next to it; search takes a shortlist from the codes and rescores it exactly
+    from the float vectors.
+
+    Candidate metadata and reranking passages are appended to a JSON-lines
+    record file keyed by faiss ID, so indexing or deleting a candidate never
+    rewrites the other candidates' records. Only names and skills are kept in
+    memory; passages are read back by file offset when reranking needs them.
+    """
+
+    def __init__(self, index_path: Optional[str] = None, mode: Optional[str] = None, quantization: Optional[str] = None):
+        index_config = config["resume_index_config"]
+        self.index_path = index_path or config["faiss_index_path"]
+        self.meta_path = self.index_path + ".meta.json"
+        self.vectors_path = self.index_path + ".f32"
+        self.records_path = self.index_path + ".records.jsonl"
+        self.mode = mode or index_config["mode"]
+        if self.mode not in INDEX_MODES:
+            raise ValueError(f"Unknown index mode: {self.mode}. Expected one of {INDEX_MODES}")
+        self.flat_max_vectors = index_config["flat_max_vectors"]
+        self.nprobe = index_config["nprobe"]
+        self.hnsw_m = index_config["hnsw_m"]
+        self.quantization = quantization or index_config["quantization"]
+        if self.quantization not in QUANTIZATION_MODES:
+            raise ValueError(f"Unknown quantization: {self.quantization}. Expected one of {QUANTIZATION_MODES}")
+        self.rescore_factor = index_config["rescore_factor"]
+
+        self._lock = threading.RLock()
+        self.index = None
+        self.index_mode: Optional[str] = None
+        self.index_quantization: Optional[str] = None
+        self._trained_on: Optional[int] = None
+        self.dim: Optional[int] = None
+        self._next_id = 0
+        self._ids: Dict[str, int] = {}
+        self._candidates: Dict[int, str] = {}
+        self._tombstones = 0
+        self.metadata: Dict[str, Dict[str, Any]] = {}
+        self._record_spans: Dict[int, Tuple[int, int]] = {}
+        self.load()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, candidate_id: str) -> bool:
+        return candidate_id in self._ids
+
+    def load(self) -> None:
+        """Load the index and its ID map from disk if both exist."""
+        import faiss
+        if not os.path.exists(self.meta_path):
+            return
+        with open(self.meta_path, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        index_quantization = meta.get("quantization", "none")
+        if index_quantization == "binary":
+            index = faiss.read_index_binary(self.index_path) if os.path.exists(self.index_path) else None
+        else:
+            index = load_faiss_index(self.index_path)
+        if index is None:
+            return
+        self.index = index
+        self.index_mode = meta["index_mode"]
+        self.index_quantization = index_quantization
+        self._trained_on = meta.get("trained_on")
+        self.dim = meta["dim"]
+        self._next_id = meta["next_id"]
+        self._ids = meta["ids"]
+        self._candidates = {faiss_id: candidate_id for candidate_id, faiss_id in self._ids.items()}
+        self._tombstones = meta.get("tombstones", 0)
+        self._load_records()
+        if self.index_mode == "ivf":
+            self.index.nprobe = self.nprobe
+        logger.info(f"Loaded {self.index_mode} ({self.index_quantization}) resume index with {len(self._ids)} candidates from {self.index_path}")
+
+    def _load_records(self) -> None:
+        """Scan the record file for the live candidates' metadata and passage offsets.
+
+        Records are appended, so the last record written for a faiss ID wins and
+        records of deleted or never-saved IDs are skipped.
+        """
+        self.metadata, self._record_spans = {}, {}
+        if not os.path.exists(self.records_path):
+            return
+        with open(self.records_path, "rb") as f:
+            offset = 0
+            for line in f:
+                record = json.loads(line)
+                candidate_id = self._candidates.get(record["id"])
+                if candidate_id is not None:
+                    self.metadata[candidate_id] = {"name": record.get("name", ""), "skills": record.get("skills", [])}
+                    self._record_spans[record["id"]] = (offset, len(line))
+                offset += len(line)
+
+    def _append_records(self, faiss_ids: List[int], metadata: List[Dict[str, Any]]) -> None:
+        """Append one metadata record per faiss ID to the record file."""
+        os.makedirs(os.path.dirname(self.records_path) or ".", exist_ok=True)
+        with open(self.records_path, "ab") as f:
+            offset = f.tell()
+            for faiss_id, record in zip(faiss_ids, metadata):
+                line = (json.dumps({"id": faiss_id, **record}) + "\n").encode("utf-8")
+                f.write(line)
+                self._record_spans[faiss_id] = (offset, len(line))
+                offset += len(line)
+
+    def _compact_records(self) -> None:
+        """Rewrite the record file with only the live candidates' records."""
+        if not os.path.exists(self.records_path):
+            return
+        spans = sorted((faiss_id, span) for faiss_id, span in self._record_spans.items() if faiss_id in self._candidates)
+        self._record_spans = {}
+        with open(self.records_path, "rb") as src, open(self.records_path + ".tmp", "wb") as dst:
+            for faiss_id, (offset, length) in spans:
+                src.seek(offset)
+                self._record_spans[faiss_id] = (dst.tell(), length)
+                dst.write(src.read(length))
+        os.replace(self.records_path + ".tmp", self.records_path)
+
+    def candidate_skills(self) -> Dict[str, List[str]]:
+        """Snapshot of every candidate's skill names, taken under the index lock."""
+        with self._lock:
+            return {candidate_id: metadata.get("skills", []) for candidate_id, metadata in self.metadata.items()}
+
+    def passages(self, candidate_ids: List[str]) -> List[str]:
+        """Stored resume text of each candidate, read from the record file; empty when unknown."""
+        with self._lock:
+            spans = [self._record_spans.get(self._ids.get(c, -1)) for c in candidate_ids]
+            if not any(spans):
+                return ["" for _ in candidate_ids]
+            passages = []
+            with open(self.records_path, "rb") as f:
+                for span in spans:
+                    if span is None:
+                        passages.append("")
+                        continue
+                    f.seek(span[0])
+                    passages.append(json.loads(f.read(span[1])).get("text", ""))
+            return passages
+
+    def save(self) -> None:
+        """Rebuild the index if the corpus outgrew its mode, then write it to disk atomically.
+
+        Metadata records are already on disk; only the index and its ID map are written.
+        """
+        import faiss
+        with self._lock:
+            if self.index is None:
+                return
+            if (self.index_mode != self._target_mode(len(self._ids)) or self.index_quantization != self.quantization
+                    or self._tombstones > len(self._ids) // 10
+                    or (self._trained_on is not None and self._trained_on * 2 < len(self._ids))):
+                self.rebuild()
+            os.makedirs(os.path.dirname(self.index_path) or ".", exist_ok=True)
+            if self.index_quantization == "binary":
+                faiss.write_index_binary(self.index, self.index_path + ".tmp")
+            else:
+                faiss.write_index(self.index, self.index_path + ".tmp")
+            os.replace(self.index_path + ".tmp", self.index_path)
+            meta = {
+                "index_mode": self.index_mode,
+                "quantization": self.index_quantization,
+                "trained_on": self._trained_on,
+                "dim": self.dim,
+                "next_id": self._next_id,
+                "ids": self._ids,
+                "tombstones": self._tombstones,
+            }
+            with open(self.meta_path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(meta, f)
+            os.replace(self.meta_path + ".tmp", self.meta_path)
+
+    def _target_mode(self, size: int) -> str:
+        mode = self.mode
+        if mode == "auto":
+            mode = "flat" if size <= self.flat_max_vectors else "ivf"
+        if mode == "ivf" and size < 39:
+            mode = "flat"  # Too few vectors to train IVF centroids
+        return mode
+
+    def _new_index(self, mode: str, vectors: np.ndarray):
+        """Create an empty index of the given mode and quantization, training it on vectors when needed."""
+        import faiss
+        self._trained_on = None
+        nlist = max(1, min(int(4 * math.sqrt(len(vectors))), len(vectors) // 39))
+        if self.quantization == "binary":
+            if mode == "flat":
+                return faiss.IndexBinaryIDMap2(faiss.IndexBinaryFlat(self.dim))
+            if mode == "hnsw":
+                return faiss.IndexBinaryIDMap2(faiss.IndexBinaryHNSW(self.dim, self.hnsw_m))
+            index = faiss.IndexBinaryIVF(faiss.IndexBinaryFlat(self.dim), self.dim, nlist)
+        elif self.quantization == "int8":
+            int8 = faiss.ScalarQuantizer.QT_8bit
+            if mode == "flat":
+                index = faiss.IndexIDMap2(faiss.IndexScalarQuantizer(self.dim, int8, faiss.METRIC_INNER_PRODUCT))
+            elif mode == "hnsw":
+                index = faiss.IndexIDMap2(faiss.IndexHNSWSQ(self.dim, int8, self.hnsw_m, faiss.METRIC_INNER_PRODUCT))
+            else:
+                index = faiss.IndexIVFScalarQuantizer(faiss.IndexFlatIP(self.dim), self.dim, nlist, int8, faiss.METRIC_INNER_PRODUCT)
+        else:
+            if mode == "flat":
+                return faiss.IndexIDMap2(faiss.IndexFlatIP(self.dim))
+            if mode == "hnsw":
+                return faiss.IndexIDMap2(faiss.IndexHNSWFlat(self.dim, self.hnsw_m, faiss.METRIC_INNER_PRODUCT))
+            index = faiss.IndexIVFFlat(faiss.IndexFlatIP(self.dim), self.dim, nlist, faiss.METRIC_INNER_PRODUCT)
+            # Unquantized vectors are reconstructed from the index itself on rebuild
+            index.set_direct_map_type(faiss.DirectMap.Hashtable)
+
+        # Scalar quantizer ranges and IVF centroids are learned from the vectors
+        index.train(self._codes(vectors))
+        self._trained_on = len(vectors)
+        if mode == "ivf":
+            index.nprobe = self.nprobe
+        return index
+
+    def _codes(self, vectors: np.ndarray) -> np.ndarray:
+        """What the index stores for normalized vectors: sign bits when binary, else the vectors."""
+        if self.quantization == "binary":
+            return np.packbits(vectors > 0, axis=1)
+        return vectors
+
+    def _write_float_vectors(self, faiss_ids: np.ndarray, vectors: np.ndarray) -> None:
+        """Store float32 vectors at their faiss ID rows for exact rescoring."""
+        os.makedirs(os.path.dirname(self.vectors_path) or ".", exist_ok=True)
+        fd = os.open(self.vectors_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            for faiss_id, vector in zip(faiss_ids, vectors):
+                os.pwrite(fd, np.ascontiguousarray(vector, dtype=np.float32).tobytes(), int(faiss_id) * self.dim * 4)
+        finally:
+            os.close(fd)
+
+    def _read_float_vectors(self, faiss_ids: np.ndarray) -> np.ndarray:
+        """Float32 vectors for faiss IDs; only the pages of these rows are read."""
+        rows = os.path.getsize(self.vectors_path) // (self.dim * 4)
+        vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dim))
+        return np.array(vectors[np.asarray(faiss_ids, dtype=np.int64)])
+
+    def _live_vectors(self) -> Tuple[np.ndarray, np.ndarray]:
+        """All (faiss ID, vector) pairs currently in the index, excluding tombstones."""
+        faiss_ids = np.array(sorted(self._candidates), dtype=np.int64)
+        if not len(faiss_ids):
+            return faiss_ids, np.zeros((0, self.dim), dtype=np.float32)
+        if self.index_quantization != "none":
+            return faiss_ids, self._read_float_vectors(faiss_ids)
+        vectors = np.stack([self.index.reconstruct(int(faiss_id)) for faiss_id in faiss_ids])
+        return faiss_ids, vectors
+
+    def rebuild(self, mode: Optional[str] = None) -> None:
+        """Rebuild the index from its own vectors, choosing the mode from the corpus size."""
+        with self._lock:
+            if self.index is None:
+                return
+            faiss_ids, vectors = self._live_vectors()
+            target = mode or self._target_mode(len(faiss_ids))
+            logger.info(f"Rebuilding resume index as {target} ({self.quantization}) with {len(faiss_ids)} vectors")
+            index = self._new_index(target, vectors)
+            if len(faiss_ids):
+                index.add_with_ids(self._codes(vectors), faiss_ids)
+                if self.quantization != "none" and self.index_quantization == "none":
+                    self._write_float_vectors(faiss_ids, vectors)
+            self.index, self.index_mode, self.index_quantization = index, target, self.quantization
+            self._tombstones = 0
+            self._compact_records()
+
+    def upsert(self, candidate_ids: List[str], vectors: np.ndarray, metadata: Optional[List[Dict[str, Any]]] = None) -> None:
+        """Add vectors under stable candidate IDs, replacing any existing vector for the same ID."""
+        import faiss
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        faiss.normalize_L2(vectors)
+        with self._lock:
+            if self.index is None:
+                self.dim = vectors.shape[1]
+                self.index_mode = "hnsw" if self.mode == "hnsw" else "flat"
+                self.index_quantization = self.quantization
+                self.index = self._new_index(self.index_mode, vectors)
+            self.delete([c for c in candidate_ids if c in self._ids])
+
+            new_ids = np.arange(self._next_id, self._next_id + len(candidate_ids), dtype=np.int64)
+            self._next_id += len(candidate_ids)
+            if self.index_quantization != "none":
+                self._write_float_vectors(new_ids, vectors)
+            self.index.add_with_ids(self._codes(vectors), new_ids)
+            for i, (candidate_id, faiss_id) in enumerate(zip(candidate_ids, new_ids)):
+                self._ids[candidate_id] = int(faiss_id)
+                self._candidates[int(faiss_id)] = candidate_id
+                if metadata is not None:
+                    self.metadata[candidate_id] = {"name": metadata[i].get("name", ""), "skills": metadata[i].get("skills", [])}
+            if metadata is not None:
+                self._append_records(new_ids.tolist(), metadata)
+
+    def delete(self, candidate_ids: List[str]) -> int:
+        """Remove candidates from the index. Returns the number removed."""
+        with self._lock:
+            faiss_ids = [self._ids.pop(c) for c in candidate_ids if c in self._ids]
+            for candidate_id in candidate_ids:
+                self.metadata.pop(candidate_id, None)
+            for faiss_id in faiss_ids:
+                self._candidates.pop(faiss_id, None)
+                self._record_spans.pop(faiss_id, None)
+            if not faiss_ids:
+                return 0
+            if self.index_mode == "hnsw":
+                self._tombstones += len(faiss_ids)
+            else:
+                self.index.remove_ids(np.array(faiss_ids, dtype=np.int64))
+            return len(faiss_ids)
+
+    def search(self, query_vector: np.ndarray, top_k: int = 10) -> List[Tuple[str, float]]:
+        """Top-k (candidate ID, cosine similarity) pairs for a query vector."""
+        import faiss
+        with self._lock:
+            if self.index is None or not self._ids:
+                return []
+            query = np.ascontiguousarray(query_vector, dtype=np.float32).reshape(1, -1)
+            faiss.normalize_L2(query)
+            shortlist_size = top_k if self.index_quantization == "none" else top_k * self.rescore_factor
+            scores, faiss_ids = search_similar_texts(self._codes(query), self.index, top_k=min(shortlist_size + self._tombstones, self.index.ntotal))
+            shortlist = [(int(faiss_id), float(score)) for score, faiss_id in zip(scores, faiss_ids)
+                         if faiss_id >= 0 and int(faiss_id) in self._candidates]
+            if self.index_quantization != "none" and shortlist:
+                # Exact cosine similarities from the float vectors of the shortlist only
+                shortlist_ids = np.array([faiss_id for faiss_id, _ in shortlist], dtype=np.int64)
+                exact_scores = self._read_float_vectors(shortlist_ids) @ query[0]
+                shortlist = sorted(zip(shortlist_ids.tolist(), exact_scores.tolist()), key=lambda item: item[1], reverse=True)
+            return [(self._candidates[faiss_id], score) for faiss_id, score in shortlist[:top_k]]
+
+    def stats(self) -> Dict[str, Any]:
+        """Index size and vector storage footprint."""
+        with self._lock:
+            quantization = self.index_quantization or self.quantization
+            bytes_per_vector = code_size(quantization, self.dim) if self.dim else 0
+            return {
+                "mode": self.index_mode,
+                "quantization": quantization,
+                "candidates": len(self._ids),
+                "bytes_per_vector": bytes_per_vector,
+                "code_bytes": bytes_per_vector * len(self._ids),
+            }
+
+    def index_resumes(self, resumes: Dict[str, Dict[str, Any]], embedding_model) -> List[str]:
+        """Embed parsed resumes and upsert them under their candidate IDs."""
+        if not resumes:
+            return []
+        candidate_ids = list(resumes.keys())
+        parsed = [resumes[c] for c in candidate_ids]
+        texts = [resume_document_text(resume) for resume in parsed]
+        vectors = _document_embeddings(texts, embedding_model)
+        metadata = [
+            {"name": resume.get("name", ""), "skills": resume_skill_names(resume), "text": text}
+            for resume, text in zip(parsed, texts)
+        ]
+        self.upsert(candidate_ids, vectors, metadata)
+        return candidate_ids
+
+    def search_jd(self, parsed_jd: Dict[str, Any], embedding_model, top_k: int = 10) -> List[Dict[str, Any]]:
+        """Top-k candidates for a parsed job description, with their stored metadata."""
+        query = _document_embeddings([parsed_jd.get("match_text", "")], embedding_model)[0]
+        return [
+            {"candidate_id": candidate_id, "score": score, "name": self.metadata.get(candidate_id, {}).get("name", "")}
+            for candidate_id, score in self.search(query, top_k)
+        ]
+
+_resume_index: Optional[ResumeIndex] = None
+_resume_index_lock = threading.Lock()
+
+def get_resume_index() -> ResumeIndex:
+    """Return the process-wide resume index, loading it on first use."""
+    global _resume_index
+    with _resume_index_lock:
+        if _resume_index is None:
+            _resume_index = ResumeIndex()
+        return _resume_index
@@ -1,4 +1,3 @@
-import fitz  # PyMuPDF
 from typing import Dict, Any, List
 from utils.section_entity_extraction import extract_section_entities
 from utils.skill_role_normalization import normalize_skills, normalize_roles
@@ -12,6 +11,7 @@ def extract_text_from_pdf(pdf_path: str) -> str:
     Returns:
         Extracted text as a string
     """
+    import fitz  # PyMuPDF
     try:
         # Open the PDF
         doc = fitz.open(pdf_path)
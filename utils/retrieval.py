@@ -0,0 +1,116 @@
+import time
+import logging
+from typing import Dict, Any, List, Optional, Tuple
+from config.config import config
+from utils.resume_index import ResumeIndex
+from utils.reranking import score_pairs
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+RETRIEVAL_STRATEGIES = ("vector", "lexical", "hybrid")
+
+# Rank constant of reciprocal rank fusion
+RRF_K = 60
+
+def lexical_scores(parsed_jd: Dict[str, Any], resume_index: ResumeIndex) -> List[Tuple[str, float]]:
+    """Fraction of the JD's required skills found in each indexed candidate's skills, best first."""
+    required = {skill.lower() for skill in parsed_jd.get("required_skills", [])}
+    if not required:
+        return []
+    scored = []
+    for candidate_id, skills in resume_index.candidate_skills().items():
+        overlap = len(required.intersection(skills))
+        if overlap:
+            scored.append((candidate_id, overlap / len(required)))
+    scored.sort(key=lambda item: item[1], reverse=True)
+    return scored
+
+def retrieve_candidates(parsed_jd: Dict[str, Any], resume_index: ResumeIndex, embedding_model,
+                        top_n: int, strategy: str = "hybrid") -> List[Tuple[str, float]]:
+    """First stage: narrow the indexed pool to the top-n candidates cheaply.
+
+    The vector strategy uses the FAISS index, the lexical strategy uses required
+    skill overlap, and the hybrid strategy fuses both rankings with reciprocal
+    rank fusion.
+    """
+    if strategy not in RETRIEVAL_STRATEGIES:
+        raise ValueError(f"Unknown retrieval strategy: {strategy}. Expected one of {RETRIEVAL_STRATEGIES}")
+
+    vector_ranked = []
+    if strategy in ("vector", "hybrid"):
+        vector_ranked = [(c["candidate_id"], c["score"]) for c in resume_index.search_jd(parsed_jd, embedding_model, top_k=top_n)]
+    lexical_ranked = []
+    if strategy in ("lexical", "hybrid"):
+        lexical_ranked = lexical_scores(parsed_jd, resume_index)[:top_n]
+
+    if strategy == "vector":
+        return vector_ranked
+    if strategy == "lexical":
+        return lexical_ranked
+
+    fused: Dict[str, float] = {}
+    for ranking in (vector_ranked, lexical_ranked):
+        for rank, (candidate_id, _) in enumerate(ranking):
+            fused[candidate_id] = fused.get(candidate_id, 0.0) + 1.0 / (RRF_K + rank + 1)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)[:top_n]
+
+def retrieve_and_rerank(parsed_jd: Dict[str, Any], resume_index: ResumeIndex, models: Dict[str, Any],
+                        top_k: Optional[int] = None, rerank_top_n: Optional[int] = None,
+                        strategy: Optional[str] = None) -> Dict[str, Any]:
+    """Two-stage search: cheap retrieval of the top-n, then cross-encoder reranking of only those n.
+
+    Args:
+        parsed_jd: Parsed job description
+        resume_index: Resume vector index holding the candidate pool
+        models: Loaded models (embedding, reranking model and tokenizer)
+        top_k: Number of candidates to return
+        rerank_top_n: Number of first-stage candidates to rerank; 0 skips reranking, negative raises ValueError
+        strategy: First-stage strategy, one of vector, lexical or hybrid
+
+    Returns:
+        Dictionary with the ranked candidates and per-stage latency and candidate counts
+    """
+    retrieval_config = config["retrieval_config"]
+    top_k = retrieval_config["top_k"] if top_k is None else top_k
+    rerank_top_n = retrieval_config["rerank_top_n"] if rerank_top_n is None else rerank_top_n
+    strategy = strategy or retrieval_config["strategy"]
+    if top_k < 1:
+        raise ValueError(f"top_k must be at least 1, got {top_k}")
+    if rerank_top_n < 0:
+        raise ValueError(f"rerank_top_n must not be negative, got {rerank_top_n}")
+
+    start = time.perf_counter()
+    retrieved = retrieve_candidates(parsed_jd, resume_index, models["embedding_model"], max(rerank_top_n, top_k), strategy)
+    retrieval_ms = (time.perf_counter() - start) * 1000
+
+    candidates = [
+        {
+            "candidate_id": candidate_id,
+            "name": resume_index.metadata.get(candidate_id, {}).get("name", ""),
+            "retrieval_score": score,
+        }
+        for candidate_id, score in retrieved
+    ]
+
+    rerank_ms = 0.0
+    reranked = candidates[:rerank_top_n]
+    if reranked:
+        start = time.perf_counter()
+        passages = resume_index.passages([c["candidate_id"] for c in reranked])
+        scores = score_pairs(parsed_jd.get("match_text", ""), passages, models["reranking_model"], models["reranking_tokenizer"])
+        for candidate, score in zip(reranked, scores):
+            candidate["rerank_score"] = score
+        reranked.sort(key=lambda c: c["rerank_score"], reverse=True)
+        rerank_ms = (time.perf_counter() - start) * 1000
+        candidates = reranked + candidates[rerank_top_n:]
+
+    stats = {
+        "pool_size": len(resume_index),
+        "strategy": strategy,
+        "retrieval": {"candidates": len(retrieved), "latency_ms": round(retrieval_ms, 2)},
+        "rerank": {"candidates": len(reranked), "latency_ms": round(rerank_ms, 2)},
+    }
+    logger.info(f"Retrieve-then-rerank stats: {stats}")
+    return {"candidates": candidates[:top_k], "stats": stats}
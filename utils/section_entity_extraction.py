@@ -1,23 +1,25 @@
 # In utils/section_entity_extraction.py
 
 import re
-import flair
 import os
 import logging
-from flair.data import Sentence
-from flair.models import SequenceTagger
-from dateparser import parse
+import threading
+from functools import lru_cache
 from config.config import config
-from utils.file_handler import load_skills_ontology, load_job_title_mapping
+from utils.file_handler import load_skills_ontology, load_job_title_mapping, load_location_gazetteer
 from utils.preprocessing import preprocess_text
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import TYPE_CHECKING, Dict, List, Any, Optional, Tuple
+
+if TYPE_CHECKING:
+    from flair.models import SequenceTagger
 
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
 def load_ner_model():
+    from flair.models import SequenceTagger
     model_path = config['ner_model_path']
     if not os.path.exists(model_path):
         os.makedirs(os.path.dirname(model_path), exist_ok=True)
@@ -27,6 +29,7 @@ def load_ner_model():
     return SequenceTagger.load(model_path)
 
 def extract_dates(text):
+    from dateparser import parse
     dates = []
     lines = text.split('\n')
     for line in lines:
@@ -67,7 +70,7 @@ def extract_roles(text):
             roles.append(job_title_mapping[role])
     return roles
 
-def extract_section_entities(text: str, ner_model: SequenceTagger) -> Dict[str, Any]:
+def extract_section_entities(text: str, ner_model: "SequenceTagger") -> Dict[str, Any]:
     """Extract entities from resume text using NER model.
     
     Args:
@@ -77,6 +80,29 @@ def extract_section_entities(text: str, ner_model: SequenceTagger) -> Dict[str,
     Returns:
         Dictionary containing extracted entities
     """
+    return extract_section_entities_batch([text], ner_model)[0]
+
+def extract_section_entities_batch(texts: List[str], ner_model: "SequenceTagger",
+                                   mini_batch_size: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Extract entities from many resume texts, running contact NER in one batched predict.
+    
+    Args:
+        texts: Resume texts
+        ner_model: NER model for entity extraction
+        mini_batch_size: Sentences per NER forward pass, defaults to the NER model config
+        
+    Returns:
+        One entities dictionary per resume text, in input order
+    """
+    all_entities = [_extract_sections(text) for text in texts]
+    contact_infos = extract_contact_info_batch([contact_header(text) for text in texts], ner_model, mini_batch_size)
+    for entities, contact_info in zip(all_entities, contact_infos):
+        logger.info(f"Extracted contact info: {contact_info}")
+        entities.update(contact_info)
+    return all_entities
+
+def _extract_sections(text: str) -> Dict[str, Any]:
+    """Extract every section entity except the contact information."""
     # Split text into sections
     sections = split_into_sections(text)
     logger.info(f"Split text into sections: {list(sections.keys())}")
@@ -122,7 +148,10 @@ def extract_section_entities(text: str, ner_model: SequenceTagger) -> Dict[str,
         elif section_name == 'projects':
             entities['projects'] = extract_projects(section_text)
     
-    # Extract contact information from the very top of the resume, before any sections
+    return entities
+
+def contact_header(text: str) -> str:
+    """Return the top of the resume, before any sections, where contact information lives."""
     first_section_start_index = len(text) # Default to end of text if no sections
     # Find the start of the very first recognized section to get the header part
     first_header_match = re.search(r'(?i)(?:summary|profile|objective|skills|experience|work|education|certifications|languages|projects)[\s:–-]*\n', text)
@@ -130,13 +159,8 @@ def extract_section_entities(text: str, ner_model: SequenceTagger) -> Dict[str,
         first_section_start_index = first_header_match.start()
     
     text_for_contact_info = text[:first_section_start_index].strip()
-    logger.debug(f"extract_section_entities - Text for contact info: {text_for_contact_info[:200]}...")
-
-    contact_info = extract_contact_info(text_for_contact_info, ner_model) # Pass ner_model here
-    logger.info(f"Extracted contact info: {contact_info}")
-    entities.update(contact_info)
-    
-    return entities
+    logger.debug(f"contact_header - Text for contact info: {text_for_contact_info[:200]}...")
+    return text_for_contact_info
 
 def split_into_sections(text: str) -> Dict[str, str]:
     """Split resume text into sections using more robust regex."""
@@ -174,68 +198,238 @@ def extract_location(text: str) -> str:
             return loc
     return ""
 
-def extract_contact_info(text: str, ner_model: SequenceTagger) -> Dict[str, str]:
-    """Extract contact information from resume text using Flair NER with fallback logic."""
-    logger.debug(f"extract_contact_info - Processing text: {text[:100]}...")
+# Contact fields and the cascade stages that can resolve them, cheapest first
+CONTACT_FIELDS = ("name", "email", "phone", "location")
+CONTACT_STAGES = ("regex", "heuristic", "gazetteer", "ner", "none")
+
+# Header lines are often "Name | email | phone | City, Country"
+CONTACT_SEGMENT_SEPARATORS = re.compile(r'\s*[|•·]\s*')
+URL_PATTERN = re.compile(r'(?:https?://|www\.)\S+|\b[\w.-]+\.(?:com|io|org|net|dev|me)/\S*', re.IGNORECASE)
+NAME_TOKEN = re.compile(r"^[A-Z][A-Za-z.'-]*$")
+# State and country codes and postal codes that may follow a gazetteer place name
+LOCATION_CODE = re.compile(r'^(?:[A-Z]{2,3}|\d{5,6}(?:-\d{4})?)$')
+
+class ContactCascadeStats:
+    """Counts which cascade stage resolved each contact field, and how often Flair ran."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.resumes = 0
+        self.ner_resumes = 0
+        self.counts = {field: {stage: 0 for stage in CONTACT_STAGES} for field in CONTACT_FIELDS}
+
+    def record(self, fields: Dict[str, Dict[str, Any]], used_ner: bool) -> None:
+        with self._lock:
+            self.resumes += 1
+            self.ner_resumes += int(used_ner)
+            for field in CONTACT_FIELDS:
+                self.counts[field][fields[field]["stage"]] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Per-field resolution counts and rates of every stage."""
+        with self._lock:
+            total = max(self.resumes, 1)
+            return {
+                "resumes": self.resumes,
+                "ner_invocations": self.ner_resumes,
+                "ner_rate": round(self.ner_resumes / total, 4),
+                "fields": {
+                    field: {stage: {"count": count, "rate": round(count / total, 4)} for stage, count in stages.items()}
+                    for field, stages in self.counts.items()
+                },
+            }
+
+_cascade_stats = ContactCascadeStats()
+
+def contact_cascade_stats() -> Dict[str, Any]:
+    """Stage resolution rates of the contact extraction cascade in this process."""
+    return _cascade_stats.snapshot()
+
+@lru_cache(maxsize=1)
+def _location_gazetteer() -> Optional[re.Pattern]:
+    """Whole-word pattern matching any gazetteer place name, as written or in upper case."""
+    names = {variant for name in load_location_gazetteer() for variant in (name, name.upper())}
+    if not names:
+        return None
+    return re.compile(r'(?<!\w)(?:' + '|'.join(re.escape(name) for name in sorted(names, key=len, reverse=True)) + r')(?!\w)')
+
+def _contact_field(value: str, stage: str, confidence: float) -> Dict[str, Any]:
+    return {"value": value, "stage": stage if value else "none", "confidence": round(confidence, 3) if value else 0.0}
+
+def _heuristic_name(lines: List[str], gazetteer: Optional[re.Pattern], segmented: bool = True) -> Dict[str, Any]:
+    """Name from the first capitalized 2-3 word segment, most confident on the first header line.
+
+    Args:
+        lines: Non-empty, stripped contact header lines
+        gazetteer: Known place names, or None
+        segmented: Look at the first separator segment of each line rather than
+            the whole line; only the contact cascade uses segments
+
+    Returns:
+        Name contact field
+    """
+    for position, line in enumerate(lines):
+        if segmented:
+            segment = CONTACT_SEGMENT_SEPARATORS.split(line)[0].strip()
+            if not segment or '@' in segment or any(char.isdigit() for char in segment):
+                continue
+        else:
+            segment = line
+            if '@' in segment:
+                continue
+        parts = segment.split()
+        if 1 < len(parts) <= 3 and all(part and part[0].isupper() for part in parts):
+            confidence = 0.9 if position == 0 and all(NAME_TOKEN.match(part) for part in parts) else 0.6
+            if gazetteer is not None and gazetteer.search(segment):
+                # Name and place name disagree, e.g. "Austin Green"; let NER decide
+                confidence = 0.5
+            logger.debug(f"Heuristic set name via capitalization: '{segment}' ({confidence})")
+            return _contact_field(segment, "heuristic", confidence)
+    return _contact_field("", "none", 0.0)
+
+def _gazetteer_location(lines: List[str], gazetteer: Optional[re.Pattern], name: str) -> Dict[str, Any]:
+    """Location from the first header segment naming a known place.
+
+    Confidence is high only if the segment holds nothing but place names and
+    codes, and no other segment names a different place.
+    """
+    if gazetteer is None:
+        return _contact_field("", "none", 0.0)
+    candidates = []
+    for line in lines:
+        for segment in CONTACT_SEGMENT_SEPARATORS.split(line):
+            segment = segment.strip().rstrip(',')
+            if not segment or segment == name or '@' in segment or not gazetteer.search(segment):
+                continue
+            residual = gazetteer.sub(' ', segment).replace(',', ' ').split()
+            candidates.append((segment, all(LOCATION_CODE.match(token) for token in residual)))
+    if not candidates:
+        return _contact_field("", "none", 0.0)
+    segment, explained = candidates[0]
+    agreed = len({candidate for candidate, _ in candidates}) == 1
+    return _contact_field(segment, "gazetteer", 0.9 if explained and agreed else 0.6)
+
+def _cheap_contact_fields(text: str) -> Tuple[Dict[str, Dict[str, Any]], List[str], str]:
+    """Run the regex, capitalization and gazetteer stages over a contact header.
+
+    Returns:
+        The contact fields found so far, the fields NER should still resolve, and
+        the header lines to run NER on ("" when NER is not needed)
+    """
+    cascade_config = config["contact_cascade_config"]
+    gazetteer = _location_gazetteer()
+    lines = [line.strip() for line in text.split('\n') if line.strip()]
+
+    fields = {
+        "email": _contact_field(extract_email(text), "regex", 1.0),
+        "phone": _contact_field(extract_phone(text), "regex", 0.95),
+        "name": _contact_field("", "none", 0.0),
+        "location": _contact_field(extract_location(text), "regex", 0.95),
+    }
+    # Try to extract name using "Name:" prefix
+    for line in lines:
+        name_match = re.match(r'Name:\s*(.+)', line, re.IGNORECASE)
+        if name_match and len(name_match.group(1).split()) <= 3:
+            fields["name"] = _contact_field(name_match.group(1).strip(), "regex", 0.95)
+            break
+    if not fields["name"]["value"]:
+        fields["name"] = _heuristic_name(lines, gazetteer, segmented=cascade_config["enabled"])
+    if not fields["location"]["value"]:
+        fields["location"] = _gazetteer_location(lines, gazetteer, fields["name"]["value"])
+
+    if not cascade_config["enabled"]:
+        # NER sees the whole header and overrides the cheap stages, as before the cascade
+        return fields, ["name", "location"], text
+
+    min_confidence = cascade_config["min_confidence"]
+    pending = [field for field in ("name", "location") if fields[field]["confidence"] < min_confidence]
+    if not pending:
+        return fields, [], ""
+    # Only lines with text no confident stage explains go to NER
+    resolved = [field["value"] for field in fields.values() if field["value"] and field["confidence"] >= min_confidence]
+    ner_lines = []
+    for line in lines:
+        residual = URL_PATTERN.sub(' ', line)
+        for value in resolved:
+            residual = residual.replace(value, ' ')
+        residual = re.sub(r'(?i)\b(?:name|email|e-mail|phone|mobile|tel|location|address)\s*:', ' ', residual)
+        if re.search(r'[A-Za-z]{2,}', residual):
+            ner_lines.append(line)
+    return fields, pending, "\n".join(ner_lines)
+
+def _resolve_contact_fields(fields: Dict[str, Dict[str, Any]], pending: List[str],
+                            spans: List[Tuple[str, str, float]]) -> Dict[str, Any]:
+    """Let NER spans settle the pending fields and shape the contact information."""
+    person_spans = [(text, score) for text, tag, score in spans if tag == 'PER']
+    location_spans = [(text, score) for text, tag, score in spans if tag == 'LOC' and text.upper() != 'N/A']
+    if "name" in pending and person_spans:
+        fields["name"] = _contact_field(person_spans[0][0], "ner", person_spans[0][1])
+    if "location" in pending and location_spans:
+        fields["location"] = _contact_field(", ".join(text for text, _ in location_spans), "ner",
+                                            min(score for _, score in location_spans))
+    if not fields["name"]["value"]:
+        logger.warning("Contact cascade did not identify a person's name.")
 
-    name = ""
-    location_parts = []
+    contact_info: Dict[str, Any] = {field: fields[field]["value"] for field in CONTACT_FIELDS}
+    contact_info["contact_confidence"] = {
+        field: {"stage": fields[field]["stage"], "confidence": fields[field]["confidence"]} for field in CONTACT_FIELDS
+    }
+    return contact_info
 
-    # Regex-based extraction first
-    email = extract_email(text)
-    phone = extract_phone(text)
-    location = extract_location(text)
+def extract_contact_info(text: str, ner_model: "SequenceTagger") -> Dict[str, Any]:
+    """Extract contact information from resume text, running Flair NER only where cheaper stages fall short."""
+    return extract_contact_info_batch([text], ner_model)[0]
 
+def _predict_spans(texts: List[str], ner_model: "SequenceTagger", mini_batch_size: int) -> List[List[Tuple[str, str, float]]]:
+    """Run NER over all texts in one batched predict and return the (text, tag, score) spans per text."""
+    from flair.data import Sentence
+    spans: List[List[Tuple[str, str, float]]] = [[] for _ in texts]
+    rows = [i for i, text in enumerate(texts) if text.strip()]
+    sentences = [Sentence(texts[i]) for i in rows]
+    if not sentences:
+        return spans
     try:
-        sentence = Sentence(text)
-        ner_model.predict(sentence)
+        ner_model.predict(sentences, mini_batch_size=mini_batch_size)
+    except Exception as e:
+        # Retry one by one so a single bad header does not cost the whole batch its NER
+        logger.error(f"Error in batched NER model prediction, retrying per resume: {e}")
+        sentences = [Sentence(texts[i]) for i in rows]
+        for sentence in sentences:
+            try:
+                ner_model.predict(sentence)
+            except Exception as e:
+                logger.error(f"Error in NER model prediction: {e}")
+    for i, sentence in zip(rows, sentences):
         for entity in sentence.get_spans('ner'):
             logger.debug(f"extract_contact_info - Found entity: {entity.text} (Tag: {entity.tag}, Score: {entity.score:.2f})")
-            if entity.tag == 'PER':
-                if not name:
-                    name = entity.text
-            elif entity.tag == 'LOC':
-                if entity.text.upper() != 'N/A':
-                    location_parts.append(entity.text)
-    except Exception as e:
-        logger.error(f"Error in NER model prediction: {e}")
-
-    # Fallback logic for name
-    if not name:
-        logger.warning("NER did not identify a person's name. Applying heuristic fallbacks.")
-        lines = text.split('\n')
-        # Heuristic A: Try to extract name using "Name:" prefix
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-            name_match = re.match(r'Name:\s*(.+)', line, re.IGNORECASE)
-            if name_match:
-                potential_name = name_match.group(1).strip()
-                if len(potential_name.split()) <= 3:
-                    name = potential_name
-                    logger.debug(f"Heuristic fallback set name via 'Name:' prefix: '{name}'")
-                    break
-        # Heuristic B: Try to extract name based on capitalization
-        if not name:
-            for line in lines:
-                line = line.strip()
-                if not line or '@' in line:
-                    continue
-                parts = line.split()
-                if 1 < len(parts) <= 3 and all(part and part[0].isupper() for part in parts):
-                    name = line
-                    logger.debug(f"Heuristic fallback set name via capitalization: '{name}'")
-                    break
-
-    final_location = ", ".join([loc for loc in location_parts if loc.upper() != 'N/A'])
-
-    return {
-        'name': name,
-        'email': email,
-        'phone': phone,
-        'location': final_location or location
-    }
+            spans[i].append((entity.text, entity.tag, float(entity.score)))
+    return spans
+
+def extract_contact_info_batch(texts: List[str], ner_model: "SequenceTagger",
+                               mini_batch_size: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Extract contact information from many resume headers.
+    
+    Regexes, the capitalization heuristic and the location gazetteer run first.
+    Only headers with a name or location below the cascade's min_confidence go
+    to Flair, restricted to their unexplained lines, in one batched predict.
+    
+    Args:
+        texts: Contact header text of each resume
+        ner_model: NER model for entity extraction
+        mini_batch_size: Sentences per NER forward pass, defaults to the NER model config
+        
+    Returns:
+        One contact information dictionary per text, in input order, with the
+        stage and confidence of every field under "contact_confidence"
+    """
+    mini_batch_size = mini_batch_size or config["model_config"]["ner_model"]["batch_size"]
+    drafts = [_cheap_contact_fields(text) for text in texts]
+    spans = _predict_spans([ner_text for _, _, ner_text in drafts], ner_model, mini_batch_size)
+    contact_infos = []
+    for (fields, pending, ner_text), text_spans in zip(drafts, spans):
+        contact_infos.append(_resolve_contact_fields(fields, pending, text_spans))
+        _cascade_stats.record(fields, used_ner=bool(ner_text.strip()))
+    return contact_infos
 
 def extract_work_experience(text: str) -> List[Dict[str, Any]]:
     """Extract work experience entries with improved parsing."""
@@ -0,0 +1,70 @@
+import logging
+from typing import Dict, List, Tuple
+import numpy as np
+from utils.file_handler import load_skills_ontology
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Number of set bits in every byte value
+POPCOUNT_TABLE = np.array([bin(value).count("1") for value in range(256)], dtype=np.uint8)
+
+def ontology_skill_names() -> List[str]:
+    """Lowercased ontology skill names in ontology order; their positions are the base skill IDs."""
+    ontology_skills = load_skills_ontology().get("skills", [])
+    names = ontology_skills.keys() if isinstance(ontology_skills, dict) else ontology_skills
+    return list(dict.fromkeys(name.lower() for name in names))
+
+def bitset_width(n_skills: int) -> int:
+    """Bytes per packed row for a vocabulary of n_skills IDs."""
+    return (n_skills + 7) // 8
+
+def pack_skill_ids(indptr: np.ndarray, indices: np.ndarray, n_skills: int) -> np.ndarray:
+    """Pack CSR skill ID lists into one bitset row per candidate.
+
+    Bits use the ``np.packbits`` layout: ID ``i`` is bit ``7 - i % 8`` of byte ``i // 8``.
+    """
+    n_rows = len(indptr) - 1
+    bitsets = np.zeros((n_rows, bitset_width(n_skills)), dtype=np.uint8)
+    if len(indices):
+        rows = np.repeat(np.arange(n_rows), np.diff(indptr))
+        indices = np.asarray(indices, dtype=np.int64)
+        np.bitwise_or.at(bitsets, (rows, indices >> 3), (np.uint8(0x80) >> (indices & 7)).astype(np.uint8))
+    return bitsets
+
+def pack_query(skill_ids: List[int], n_skills: int) -> np.ndarray:
+    """Packed bitset of one set of skill IDs, ignoring -1 (unknown skill)."""
+    bits = np.zeros(bitset_width(n_skills) * 8, dtype=bool)
+    bits[[i for i in skill_ids if i >= 0]] = True
+    return np.packbits(bits)
+
+def popcount(bitsets: np.ndarray) -> np.ndarray:
+    """Number of set bits per row."""
+    return POPCOUNT_TABLE[bitsets].sum(axis=1, dtype=np.int64)
+
+def skill_overlap_counts(bitsets: np.ndarray, skill_ids: List[int]) -> np.ndarray:
+    """Number of distinct query skill IDs held by every candidate (intersection + popcount)."""
+    if not len(bitsets):
+        return np.zeros(0, dtype=np.int64)
+    return popcount(bitsets & pack_query(skill_ids, bitsets.shape[1] * 8))
+
+def skill_membership(bitsets: np.ndarray, skill_ids: List[int]) -> np.ndarray:
+    """(candidates x query skills) boolean matrix of which candidates hold each query skill ID."""
+    ids = np.asarray(skill_ids, dtype=np.int64)
+    known = ids >= 0
+    membership = np.zeros((len(bitsets), len(ids)), dtype=bool)
+    if known.any():
+        columns = bitsets[:, ids[known] >> 3]
+        membership[:, known] = (columns & (np.uint8(0x80) >> (ids[known] & 7)).astype(np.uint8)) > 0
+    return membership
+
+def matched_and_missing(membership: np.ndarray, skill_ids: List[int], row: int) -> Tuple[List[int], List[int]]:
+    """Matched and missing query skill IDs for one candidate row of a membership matrix."""
+    matched = [skill_id for skill_id, held in zip(skill_ids, membership[row]) if held]
+    missing = [skill_id for skill_id, held in zip(skill_ids, membership[row]) if not held]
+    return matched, missing
+
+def lookup_skill_ids(skill_names: List[str], positions: Dict[str, int], default: int = -1) -> List[int]:
+    """Skill IDs of names (case-insensitive), default for names outside the vocabulary."""
+    return [positions.get(name.lower(), default) for name in skill_names]
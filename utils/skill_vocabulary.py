@@ -0,0 +1,176 @@
+import os
+import fcntl
+import hashlib
+import json
+import logging
+import threading
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+from config.config import config
+from utils.embedding_cache import model_identity, normalize_cache_text
+from utils.file_handler import load_skills_ontology, load_job_title_mapping
+from utils.job_description_parser import TECH_KEYWORDS as JD_TECH_KEYWORDS
+from utils.enhanced_parsing import TECH_KEYWORDS as RESUME_TECH_KEYWORDS
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def _term_variants(term: str) -> List[str]:
+    """Surface forms the scoring code produces for a term: as written, lowercased and capitalized."""
+    return [term, term.lower(), term.capitalize()]
+
+def vocabulary_terms() -> List[str]:
+    """All fixed vocabulary strings: ontology skills and aliases, keyword lists and job titles."""
+    terms: List[str] = []
+    ontology_skills = load_skills_ontology().get("skills", [])
+    if isinstance(ontology_skills, dict):
+        for name, data in ontology_skills.items():
+            terms.append(name)
+            if isinstance(data, dict):
+                terms.extend(data.get("aliases", []))
+            elif isinstance(data, str):
+                terms.append(data)
+    else:
+        terms.extend(ontology_skills)
+    terms.extend(JD_TECH_KEYWORDS)
+    terms.extend(RESUME_TECH_KEYWORDS)
+    for title, normalized in load_job_title_mapping().items():
+        terms.extend([title, normalized])
+
+    variants = (normalize_cache_text(variant) for term in terms for variant in _term_variants(term))
+    return sorted({variant for variant in variants if variant})
+
+def _file_digest(path: str) -> str:
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except OSError:
+        return ""
+
+def vocabulary_fingerprint(terms: List[str], model) -> str:
+    """Fingerprint of the vocabulary sources and the embedding model, used to detect stale builds."""
+    digest = hashlib.sha256()
+    digest.update(json.dumps(list(model_identity(model))).encode("utf-8"))
+    digest.update(_file_digest(config["skills_ontology_path"]).encode("utf-8"))
+    digest.update(_file_digest(config["job_title_mapping_path"]).encode("utf-8"))
+    digest.update("\n".join(terms).encode("utf-8"))
+    return digest.hexdigest()
+
+class SkillVocabulary:
+    """Read-only view of precomputed vocabulary embeddings backed by ``np.memmap``.
+
+    The vector file is mapped read-only, so every process that loads it shares
+    the same page cache pages instead of holding a private copy.
+    """
+
+    def __init__(self, vectors: np.ndarray, terms: List[str]):
+        self.vectors = vectors
+        self.terms = terms
+        self._rows = {term: row for row, term in enumerate(terms)}
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def __contains__(self, text: str) -> bool:
+        return normalize_cache_text(text) in self._rows
+
+    def lookup(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """Raw embeddings for texts in the vocabulary, None for texts outside it."""
+        rows = [self._rows.get(normalize_cache_text(text)) for text in texts]
+        return [np.array(self.vectors[row]) if row is not None else None for row in rows]
+
+def _vocabulary_dir(model) -> str:
+    model_key = hashlib.sha1(json.dumps(list(model_identity(model))).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(config["skill_vocabulary_dir"], model_key)
+
+def build_skill_vocabulary(model, vocab_dir: Optional[str] = None) -> Tuple[str, int]:
+    """Embed every vocabulary term once and write the matrix, term list and manifest.
+
+    Returns:
+        The vocabulary directory and the number of terms embedded
+    """
+    vocab_dir = vocab_dir or _vocabulary_dir(model)
+    os.makedirs(vocab_dir, exist_ok=True)
+    terms = vocabulary_terms()
+    logger.info(f"Embedding {len(terms)} vocabulary terms into {vocab_dir}")
+    vectors = np.ascontiguousarray(model.encode(terms), dtype=np.float32)
+
+    vectors_path = os.path.join(vocab_dir, "vectors.f32")
+    vectors.tofile(vectors_path + ".tmp")
+    os.replace(vectors_path + ".tmp", vectors_path)
+
+    terms_path = os.path.join(vocab_dir, "terms.json")
+    with open(terms_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(terms, f)
+    os.replace(terms_path + ".tmp", terms_path)
+
+    # The manifest is written last so a partial build is never considered current
+    manifest = {
+        "fingerprint": vocabulary_fingerprint(terms, model),
+        "model_identity": list(model_identity(model)),
+        "count": len(terms),
+        "dim": int(vectors.shape[1]),
+    }
+    manifest_path = os.path.join(vocab_dir, "manifest.json")
+    with open(manifest_path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(manifest_path + ".tmp", manifest_path)
+    return vocab_dir, len(terms)
+
+def _read_manifest(vocab_dir: str) -> Dict[str, Any]:
+    try:
+        with open(os.path.join(vocab_dir, "manifest.json"), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return {}
+
+def load_skill_vocabulary(model) -> SkillVocabulary:
+    """Memory-map the vocabulary embeddings for a model, rebuilding them first if stale."""
+    vocab_dir = _vocabulary_dir(model)
+    os.makedirs(vocab_dir, exist_ok=True)
+    fingerprint = vocabulary_fingerprint(vocabulary_terms(), model)
+
+    if _read_manifest(vocab_dir).get("fingerprint") != fingerprint:
+        # Serialize rebuilds so concurrently starting workers only build once
+        with open(os.path.join(vocab_dir, ".lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                if _read_manifest(vocab_dir).get("fingerprint") != fingerprint:
+                    logger.info("Skill vocabulary embeddings are missing or stale, rebuilding")
+                    build_skill_vocabulary(model, vocab_dir)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    manifest = _read_manifest(vocab_dir)
+    with open(os.path.join(vocab_dir, "terms.json"), "r", encoding="utf-8") as f:
+        terms = json.load(f)
+    vectors = np.memmap(os.path.join(vocab_dir, "vectors.f32"), dtype=np.float32, mode="r",
+                        shape=(manifest["count"], manifest["dim"]))
+    logger.info(f"Loaded {len(terms)} skill vocabulary embeddings from {vocab_dir}")
+    return SkillVocabulary(vectors, terms)
+
+_vocabularies: Dict[Tuple[str, str], Optional[SkillVocabulary]] = {}
+_vocabularies_lock = threading.Lock()
+
+def get_skill_vocabulary(model) -> Optional[SkillVocabulary]:
+    """Return the shared vocabulary for a model, loading it on first use.
+
+    Returns None if the vocabulary cannot be loaded or built, in which case
+    callers fall back to encoding.
+    """
+    identity = model_identity(model)
+    with _vocabularies_lock:
+        if identity not in _vocabularies:
+            try:
+                _vocabularies[identity] = load_skill_vocabulary(model)
+            except Exception as e:
+                logger.error(f"Could not load skill vocabulary embeddings: {e}")
+                _vocabularies[identity] = None
+        return _vocabularies[identity]
+
+if __name__ == "__main__":
+    from sentence_transformers import SentenceTransformer
+    embedding_model = SentenceTransformer(config["model_config"]["sentence_transformer"]["model_name"])
+    vocab_dir, count = build_skill_vocabulary(embedding_model)
+    print(f"Embedded {count} vocabulary terms into {vocab_dir}")
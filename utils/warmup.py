@@ -0,0 +1,53 @@
+import time
+import logging
+from typing import Dict, List, Optional
+from config.config import config
+from utils.models import load_models
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Text for the dummy inference that triggers lazy kernel and tokenizer initialization
+WARMUP_TEXT = "John Smith is a Python developer based in Berlin."
+
+def warm_up_models(names: Optional[List[str]] = None) -> Dict[str, float]:
+    """Load models and run one dummy encode, NER and rerank so the first real request is not slow.
+
+    Args:
+        names: Models to warm up; defaults to SERVING_CONFIG["warmup_models"]
+
+    Returns:
+        Seconds spent on each warm-up step
+    """
+    names = names or config["serving_config"]["warmup_models"]
+    timings: Dict[str, float] = {}
+
+    start = time.perf_counter()
+    models = load_models(names)
+    timings["load"] = time.perf_counter() - start
+
+    if "embedding_model" in names:
+        from utils.skill_vocabulary import get_skill_vocabulary
+        start = time.perf_counter()
+        # Bypass the embedding cache so the model itself runs
+        models["embedding_model"].encode([WARMUP_TEXT])
+        # Memory-map the precomputed skill vocabulary embeddings so workers share the pages
+        get_skill_vocabulary(models["embedding_model"])
+        timings["encode"] = time.perf_counter() - start
+
+    if "ner_model" in names:
+        from flair.data import Sentence
+        start = time.perf_counter()
+        models["ner_model"].predict(Sentence(WARMUP_TEXT))
+        timings["ner"] = time.perf_counter() - start
+
+    if "reranking_model" in names:
+        from utils.reranking import score_pairs
+        start = time.perf_counter()
+        score_pairs(WARMUP_TEXT, [WARMUP_TEXT], models["reranking_model"], models["reranking_tokenizer"])
+        timings["rerank"] = time.perf_counter() - start
+
+    timings = {step: round(seconds, 3) for step, seconds in timings.items()}
+    logger.info(f"Model warm-up finished: {timings}")
+    return timings
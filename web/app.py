@@ -1,14 +1,20 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, UploadFile, File, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+import io
 import os
-import shutil
-from typing import Optional
+import logging
+import socket
+from typing import Optional, Tuple
 import sys
 import json
 from dotenv import load_dotenv
 
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
 # Load environment variables from .env
 load_dotenv()
 
@@ -20,11 +26,20 @@ PORT = int(os.getenv("PORT", 8000))
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from utils.pdf_processor import extract_text_from_pdf
-from utils.section_entity_extraction import extract_section_entities
+from utils.section_entity_extraction import extract_section_entities_batch, contact_cascade_stats
 from utils.job_description_parser import parse_job_description
-from utils.match_scoring import calculate_match_score
-from utils.models import load_models
+from utils.match_scoring import calculate_match_scores_batch, calculate_top_k_match_scores, job_description_embedding
+from utils.models import get_model_registry
+from utils.warmup import warm_up_models
+from config.config import config
 from utils.file_handler import load_job_description
+from utils.embedding_cache import embedding_cache_stats
+from utils.jd_catalog import get_jd_catalog
+from utils.resume_index import get_resume_index, candidate_id_for
+from utils.retrieval import retrieve_and_rerank, RETRIEVAL_STRATEGIES
+from utils.feature_store import get_feature_store
+from utils.inference_executor import inference_settings, run_inference, get_replica_pool, inference_stats
+from utils.job_store import get_job_store, JobStore, RESULT_ORDERS
 
 app = FastAPI()
 
@@ -38,152 +53,350 @@ app.add_middleware(
 )
 
 # Create necessary directories
-UPLOAD_DIR = "uploads"
 OUTPUT_DIR = "output"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 
 # Mount static files
 app.mount("/static", StaticFiles(directory="web/static"), name="static")
 
-# Load models once at startup
+from typing import List
+
+import asyncio
+import time
+
+# Models are loaded by a background warm-up task after startup
 models = None
+warmup_status = {"state": "starting", "error": None, "timings": {}, "started_at": None, "finished_at": None}
 
-@app.on_event("startup")
-async def startup_event():
+async def warm_up():
     global models
-    models = load_models()
+    warmup_status.update(state="warming_up", started_at=time.time())
+    try:
+        warmup_status["timings"] = await asyncio.to_thread(warm_up_models)
+        models = get_model_registry()
+        warmup_status["state"] = "ready"
+        # Jobs can be submitted at any time but only run once the models are ready
+        app.state.job_worker_task = asyncio.create_task(run_jobs(app.state.job_worker_id))
+    except Exception as e:
+        warmup_status.update(state="failed", error=str(e))
+        logger.exception(f"Model warm-up failed: {e}")
+    finally:
+        warmup_status["finished_at"] = time.time()
 
-from typing import List
+@app.on_event("startup")
+async def startup_event():
+    # Size the inference executor and torch threads (already done per worker under gunicorn)
+    inference_settings()
+    # Identifies this process's job worker; set here because gunicorn imports the app before forking
+    app.state.job_worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    # Set when a job is submitted to this process, so its worker does not wait for the next poll
+    app.state.job_wakeup = asyncio.Event()
+    # Keep a reference so the task is not garbage collected while it runs
+    app.state.warmup_task = asyncio.create_task(warm_up())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    task = getattr(app.state, "job_worker_task", None)
+    if task is None:
+        return
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    # Hand the unfinished job back to the queue instead of waiting for its lease to expire
+    store = await asyncio.to_thread(get_job_store)
+    await asyncio.to_thread(store.release_jobs, app.state.job_worker_id)
+
+def require_ready():
+    """Reject model-backed requests with 503 until the warm-up has finished."""
+    if warmup_status["state"] != "ready":
+        raise HTTPException(
+            status_code=503,
+            detail=f"Models are not ready yet ({warmup_status['state']}). Retry shortly.",
+            headers={"Retry-After": str(config["serving_config"]["retry_after_seconds"])},
+        )
+
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the process is up and serving requests."""
+    return {"status": "ok"}
+
+@app.get("/readyz")
+async def readyz():
+    """Readiness: every model has been loaded and warmed up."""
+    if warmup_status["state"] != "ready":
+        return JSONResponse(
+            status_code=503,
+            content={"status": warmup_status["state"], "error": warmup_status["error"]},
+            headers={"Retry-After": str(config["serving_config"]["retry_after_seconds"])},
+        )
+    return {"status": "ready", "timings": warmup_status["timings"]}
+
+def extract_uploaded_resume(resume: UploadFile) -> str:
+    """Extract the text of an uploaded resume straight from the upload, without writing it to disk."""
+    try:
+        resume_text = extract_text_from_pdf(resume.file)
+    except Exception as pdf_err:
+        raise HTTPException(status_code=400, detail=f"PDF extraction failed for {resume.filename}: {pdf_err}")
+    if not resume_text:
+        raise HTTPException(status_code=400, detail=f"Could not extract text from resume: {resume.filename}")
+    return resume_text
+
+def parse_resume_texts(resume_texts: List[str]) -> List[dict]:
+    """Parse resume texts with a NER replica checked out for exclusive use."""
+    with get_replica_pool("ner_model").acquire() as ner_model:
+        return extract_section_entities_batch(resume_texts, ner_model)
+
+def parse_resume_chunk(resumes: List[UploadFile]) -> List[dict]:
+    """Extract and parse a chunk of uploaded resumes, in chunk order.
+
+    A resume that fails only fails itself: its entry becomes an error dict and
+    the rest of the chunk carries on.
+    """
+    parsed_resumes = []
+    resume_texts = {}
+    for i, resume in enumerate(resumes):
+        try:
+            resume_texts[i] = extract_uploaded_resume(resume)
+            parsed_resumes.append(None)
+        except HTTPException as he:
+            parsed_resumes.append({"error": he.detail, "filename": resume.filename})
+        except Exception as e:
+            parsed_resumes.append({"error": str(e), "filename": resume.filename})
+
+    # Parse the extracted resumes, with contact NER batched across them
+    try:
+        for i, parsed in zip(resume_texts, parse_resume_texts(list(resume_texts.values()))):
+            parsed_resumes[i] = parsed
+    except Exception as e:
+        for i in resume_texts:
+            parsed_resumes[i] = {"error": str(e), "filename": resumes[i].filename}
+    return parsed_resumes
+
+def score_parsed_resumes(parsed_resumes: List[dict], resumes: List[UploadFile], parsed_jd: dict, jd_vector) -> dict:
+    """Score every parsed resume against the JD, returning match results keyed by position.
+
+    If batch scoring fails, the resumes are scored one at a time and a resume
+    that still fails has its entry in parsed_resumes replaced by an error dict.
+    """
+    scorable = [i for i, parsed in enumerate(parsed_resumes) if "error" not in parsed]
+    embedding_model = models["embedding_model"]
+    try:
+        batch_scores = calculate_match_scores_batch([parsed_resumes[i] for i in scorable], parsed_jd, embedding_model, jd_vector)
+        return dict(zip(scorable, batch_scores))
+    except Exception:
+        # Score the resumes one at a time so the failure stays with the resume that caused it
+        match_scores = {}
+        for i in scorable:
+            try:
+                match_scores[i] = calculate_match_scores_batch([parsed_resumes[i]], parsed_jd, embedding_model, jd_vector)[0]
+            except Exception as e:
+                parsed_resumes[i] = {"error": str(e), "filename": resumes[i].filename}
+        return match_scores
+
+def rank_parsed_resumes(parsed_resumes: List[dict], resumes: List[UploadFile], parsed_jd: dict, jd_vector, top_k: int) -> dict:
+    """Score only the k best of a request's parsed resumes, pruning the rest by their score upper bound.
+
+    Returns:
+        Dictionary with "scores" (match results keyed by position) and the
+        number of "pruned" resumes
+    """
+    scorable = [i for i, parsed in enumerate(parsed_resumes) if "error" not in parsed]
+    try:
+        ranked = calculate_top_k_match_scores([parsed_resumes[i] for i in scorable], parsed_jd, models["embedding_model"], top_k, jd_vector=jd_vector)
+    except Exception:
+        return {"scores": score_parsed_resumes(parsed_resumes, resumes, parsed_jd, jd_vector), "pruned": 0}
+    return {"scores": {scorable[i]: result for i, result in ranked["results"]}, "pruned": ranked["pruned"]}
+
+def match_resume_chunk(resumes: List[UploadFile], parsed_jd: dict, jd_vector) -> dict:
+    """Extract, parse and score a chunk of uploaded resumes against an already parsed and embedded JD.
+
+    Returns:
+        Dictionary with "parsed" (one parsed resume or error per resume, in
+        chunk order) and "scores" (match results keyed by chunk position)
+    """
+    parsed_resumes = parse_resume_chunk(resumes)
+    return {"parsed": parsed_resumes, "scores": score_parsed_resumes(parsed_resumes, resumes, parsed_jd, jd_vector)}
+
+def build_match_response(parsed_resume: dict, parsed_jd: dict, match_results: dict) -> dict:
+    """Shape one resume's parse and score into the response the frontend renders."""
+    # Flatten match_results.details into match_results for frontend compatibility
+    if "details" in match_results:
+        match_results.update(match_results.pop("details"))
+    # Ensure resume fields are always present
+    resume_response = dict(parsed_resume)
+    for field in ["name", "email", "phone", "location"]:
+        if field not in resume_response:
+            resume_response[field] = ""
+    return {
+        "resume": resume_response,
+        "job_description": {
+            "title": parsed_jd.get("title", ""),
+            "required_skills": parsed_jd.get("required_skills", []),
+            "required_experience_years": parsed_jd.get("required_experience_years", 0),
+            "required_education": parsed_jd.get("required_education", ""),
+            "name": "",
+            "email": "",
+            "phone": "",
+            "location": "",
+            "summary": "",
+            "skills": [],
+            "work": [],
+            "education": [],
+            "certifications": [],
+            "languages": [],
+            "projects": []
+        },
+        "match_score": match_results
+    }
+
+def match_resume_results(resumes: List[UploadFile], parsed_jd: dict, jd_vector) -> List[dict]:
+    """Match a chunk of uploaded resumes, returning each resume's response entry (its match or an error) in chunk order."""
+    chunk = match_resume_chunk(resumes, parsed_jd, jd_vector)
+    return [
+        parsed_resume if "error" in parsed_resume else build_match_response(parsed_resume, parsed_jd, chunk["scores"][i])
+        for i, parsed_resume in enumerate(chunk["parsed"])
+    ]
+
+def save_match_output(results: dict, resume_filename: str, jd_name: str) -> None:
+    """Write one resume's match response to OUTPUT_DIR."""
+    resume_name = os.path.splitext(os.path.basename(resume_filename))[0]
+    output_file = os.path.join(OUTPUT_DIR, f"{resume_name}_vs_{jd_name}_match.json")
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2)
+
+def chunk_positions(positions: List[int], first_chunk_size: Optional[int] = None) -> List[List[int]]:
+    """Split resume positions into chunks of MATCHING_CONFIG["resumes_per_task"], optionally starting with a smaller chunk."""
+    chunk_size = max(1, config["matching_config"]["resumes_per_task"])
+    first = min(first_chunk_size or chunk_size, chunk_size)
+    chunks = [positions[:first]] if positions else []
+    chunks += [positions[start:start + chunk_size] for start in range(first, len(positions), chunk_size)]
+    return chunks
+
+def chunk_limit() -> asyncio.Semaphore:
+    """Limit on the chunks of one request or job processed at the same time."""
+    return asyncio.Semaphore(config["matching_config"]["max_concurrent_tasks"] or inference_settings()["max_workers"])
+
+async def embed_job_description(parsed_jd: dict):
+    """Embed a parsed job description once for all chunks; None makes each chunk embed it itself."""
+    try:
+        return await run_inference(job_description_embedding, parsed_jd, models["embedding_model"])
+    except Exception as e:
+        logger.warning(f"Job description embedding failed, chunks will retry it: {e}")
+        return None
 
-import asyncio
 
 MAX_FILE_SIZE_MB = 10
 ALLOWED_RESUME_EXT = {'.pdf'}
 ALLOWED_JD_EXT = {'.txt'}
 TIMEOUT_SECONDS = 60
 
-@app.post("/api/match")
+def validate_resume_upload(resume: UploadFile) -> None:
+    """Reject a resume that is not a PDF or larger than MAX_FILE_SIZE_MB."""
+    ext = os.path.splitext(resume.filename)[1].lower()
+    if ext not in ALLOWED_RESUME_EXT:
+        raise HTTPException(status_code=400, detail=f"Invalid resume file type: {resume.filename}. Only PDF allowed.")
+    resume.file.seek(0, 2)
+    size_mb = resume.file.tell() / (1024 * 1024)
+    resume.file.seek(0)
+    if size_mb > MAX_FILE_SIZE_MB:
+        raise HTTPException(status_code=400, detail=f"Resume file too large: {resume.filename}. Max {MAX_FILE_SIZE_MB}MB allowed.")
+
+def read_uploaded_job_description(job_description: Optional[UploadFile], jd_text: Optional[str]) -> str:
+    """Return the job description text from an uploaded TXT file of at most MAX_FILE_SIZE_MB or the raw text field."""
+    if job_description:
+        ext = os.path.splitext(job_description.filename)[1].lower()
+        if ext not in ALLOWED_JD_EXT:
+            raise HTTPException(status_code=400, detail=f"Invalid job description file type: {job_description.filename}. Only TXT allowed.")
+        job_description.file.seek(0, 2)
+        size_mb = job_description.file.tell() / (1024 * 1024)
+        job_description.file.seek(0)
+        if size_mb > MAX_FILE_SIZE_MB:
+            raise HTTPException(status_code=400, detail=f"Job description file too large: {job_description.filename}. Max {MAX_FILE_SIZE_MB}MB allowed.")
+        jd_text_val = load_job_description(job_description.file)
+        if not jd_text_val:
+            raise HTTPException(status_code=400, detail=f"Could not read job description: {job_description.filename}")
+        return jd_text_val
+    if not jd_text:
+        raise HTTPException(status_code=400, detail="Either job description file or text must be provided")
+    return jd_text
+
+@app.post("/api/match", dependencies=[Depends(require_ready)])
 async def match_resume(
     resumes: List[UploadFile] = File(...),
     job_description: Optional[UploadFile] = File(None),
-    jd_text: Optional[str] = None
+    jd_text: Optional[str] = None,
+    top_k: Optional[int] = None
 ):
+    if top_k is not None and top_k < 1:
+        raise HTTPException(status_code=400, detail=f"top_k must be at least 1, got {top_k}")
     results_list = []
-    jd_path = None
     try:
         async def process():
             # Validate resumes
             for resume in resumes:
-                ext = os.path.splitext(resume.filename)[1].lower()
-                if ext not in ALLOWED_RESUME_EXT:
-                    raise HTTPException(status_code=400, detail=f"Invalid resume file type: {resume.filename}. Only PDF allowed.")
-                resume.file.seek(0, 2)
-                size_mb = resume.file.tell() / (1024 * 1024)
-                resume.file.seek(0)
-                if size_mb > MAX_FILE_SIZE_MB:
-                    raise HTTPException(status_code=400, detail=f"Resume file too large: {resume.filename}. Max {MAX_FILE_SIZE_MB}MB allowed.")
-
-            # Validate job description file
-            if job_description:
-                ext = os.path.splitext(job_description.filename)[1].lower()
-                if ext not in ALLOWED_JD_EXT:
-                    raise HTTPException(status_code=400, detail=f"Invalid job description file type: {job_description.filename}. Only TXT allowed.")
-                job_description.file.seek(0, 2)
-                size_mb = job_description.file.tell() / (1024 * 1024)
-                job_description.file.seek(0)
-                if size_mb > MAX_FILE_SIZE_MB:
-                    raise HTTPException(status_code=400, detail=f"Job description file too large: {job_description.filename}. Max {MAX_FILE_SIZE_MB}MB allowed.")
-
-            # Process job description
-            if job_description:
-                nonlocal jd_path
-                jd_path = os.path.join(UPLOAD_DIR, job_description.filename)
-                with open(jd_path, "wb") as buffer:
-                    shutil.copyfileobj(job_description.file, buffer)
-                jd_text_val = load_job_description(jd_path)
-            elif not jd_text:
-                raise HTTPException(status_code=400, detail="Either job description file or text must be provided")
-            else:
-                jd_text_val = jd_text
+                validate_resume_upload(resume)
+
+            # Validate and read the job description
+            jd_text_val = read_uploaded_job_description(job_description, jd_text)
 
             # Parse job description once
-            parsed_jd = parse_job_description(jd_text_val)
+            parsed_jd = await run_inference(parse_job_description, jd_text_val)
+            jd_name = "job_description" if not job_description else os.path.splitext(os.path.basename(job_description.filename))[0]
+
+            # Embed the job description once; every chunk scores against the same vector
+            jd_vector = await embed_job_description(parsed_jd)
+
+            # Fan the resumes out in chunks, so a large upload waits for the slowest chunk rather than for all of them in turn
+            chunks = chunk_positions(list(range(len(resumes))))
+            limit = chunk_limit()
+
+            # With top_k the chunks only parse, and the request's resumes are ranked together below
+            chunk_task = parse_resume_chunk if top_k else match_resume_chunk
+            chunk_args = () if top_k else (parsed_jd, jd_vector)
+
+            async def process_chunk(indices: List[int]):
+                async with limit:
+                    return await run_inference(chunk_task, [resumes[i] for i in indices], *chunk_args)
+
+            # A failing chunk must not cancel the others
+            chunk_results = await asyncio.gather(*(process_chunk(indices) for indices in chunks), return_exceptions=True)
+            parsed_resumes, match_scores, pruned = [], {}, 0
+            for indices, chunk in zip(chunks, chunk_results):
+                if isinstance(chunk, BaseException):
+                    parsed_resumes.extend({"error": str(chunk), "filename": resumes[i].filename} for i in indices)
+                elif top_k:
+                    parsed_resumes.extend(chunk)
+                else:
+                    parsed_resumes.extend(chunk["parsed"])
+                    match_scores.update((indices[i], result) for i, result in chunk["scores"].items())
+
+            if top_k:
+                # Upper-bound pruning only pays off across the whole request, not within a chunk
+                ranked = await run_inference(rank_parsed_resumes, parsed_resumes, resumes, parsed_jd, jd_vector, top_k)
+                match_scores, pruned = ranked["scores"], ranked["pruned"]
+                # Ties keep upload order
+                ranked_order = sorted(match_scores, key=lambda i: (-match_scores[i]["overall_score"], i))[:top_k]
+                response_order = ranked_order + [i for i, parsed in enumerate(parsed_resumes) if "error" in parsed]
+            else:
+                response_order = list(range(len(resumes)))
 
-            for resume in resumes:
+            for i in response_order:
+                resume, parsed_resume = resumes[i], parsed_resumes[i]
+                if "error" in parsed_resume:
+                    results_list.append(parsed_resume)
+                    continue
                 try:
-                    # Save uploaded resume
-                    resume_path = os.path.join(UPLOAD_DIR, resume.filename)
-                    with open(resume_path, "wb") as buffer:
-                        shutil.copyfileobj(resume.file, buffer)
-
-                    # Extract text from resume
-                    try:
-                        resume_text = extract_text_from_pdf(resume_path)
-                    except Exception as pdf_err:
-                        raise HTTPException(status_code=400, detail=f"PDF extraction failed for {resume.filename}: {pdf_err}")
-                    if not resume_text:
-                        raise HTTPException(status_code=400, detail=f"Could not extract text from resume: {resume.filename}")
-
-                    # Parse resume
-                    parsed_resume = extract_section_entities(resume_text, models["ner_model"])
-
-                    # Calculate match scores
-                    match_results = calculate_match_score(parsed_resume, parsed_jd, models["embedding_model"])
-
-                    # Flatten match_results.details into match_results for frontend compatibility
-                    if "details" in match_results:
-                        match_results.update(match_results.pop("details"))
-                    # Ensure resume fields are always present
-                    resume_response = dict(parsed_resume)
-                    for field in ["name", "email", "phone", "location"]:
-                        if field not in resume_response:
-                            resume_response[field] = ""
-                    results = {
-                        "resume": resume_response,
-                        "job_description": {
-                            "title": parsed_jd.get("title", ""),
-                            "required_skills": parsed_jd.get("required_skills", []),
-                            "required_experience_years": parsed_jd.get("required_experience_years", 0),
-                            "required_education": parsed_jd.get("required_education", ""),
-                            "name": "",
-                            "email": "",
-                            "phone": "",
-                            "location": "",
-                            "summary": "",
-                            "skills": [],
-                            "work": [],
-                            "education": [],
-                            "certifications": [],
-                            "languages": [],
-                            "projects": []
-                        },
-                        "match_score": match_results
-                    }
-
-                    # Save results
-                    resume_name = os.path.splitext(os.path.basename(resume_path))[0]
-                    jd_name = "job_description" if not job_description else os.path.splitext(os.path.basename(jd_path))[0]
-                    output_file = os.path.join(OUTPUT_DIR, f"{resume_name}_vs_{jd_name}_match.json")
-
-                    with open(output_file, 'w', encoding='utf-8') as f:
-                        json.dump(results, f, indent=2)
-
+                    results = build_match_response(parsed_resume, parsed_jd, match_scores[i])
+                    await asyncio.to_thread(save_match_output, results, resume.filename, jd_name)
                     results_list.append(results)
 
-                except HTTPException as he:
-                    results_list.append({"error": he.detail, "filename": resume.filename})
                 except Exception as e:
                     results_list.append({"error": str(e), "filename": resume.filename})
-                finally:
-                    # Cleanup uploaded resume file
-                    if os.path.exists(resume_path):
-                        os.remove(resume_path)
-
-            # Cleanup job description file
-            if job_description and jd_path and os.path.exists(jd_path):
-                os.remove(jd_path)
 
+            if top_k:
+                return {"results": results_list, "pruned": pruned}
             return {"results": results_list}
 
         return await asyncio.wait_for(process(), timeout=TIMEOUT_SECONDS)
@@ -195,6 +408,333 @@ async def match_resume(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+async def stream_match_events(resumes: List[UploadFile], parsed_jd: dict, jd_vector, jd_name: str):
+    """Yield an NDJSON "result" event for every resume as soon as its chunk is scored, then a "summary" event."""
+    started = time.time()
+    # A first chunk of one resume gets the first result to the client as early as possible
+    chunks = chunk_positions(list(range(len(resumes))), first_chunk_size=1)
+    limit = chunk_limit()
+
+    async def process_chunk(indices: List[int]) -> Tuple[List[int], List[dict]]:
+        async with limit:
+            try:
+                return indices, await run_inference(match_resume_results, [resumes[i] for i in indices], parsed_jd, jd_vector)
+            except Exception as e:
+                return indices, [{"error": str(e), "filename": resumes[i].filename} for i in indices]
+
+    tasks = [asyncio.create_task(process_chunk(indices)) for indices in chunks]
+    scores = {}
+    try:
+        for next_chunk in asyncio.as_completed(tasks):
+            indices, results = await next_chunk
+            for i, result in zip(indices, results):
+                if "error" not in result:
+                    try:
+                        await asyncio.to_thread(save_match_output, result, resumes[i].filename, jd_name)
+                        scores[i] = result["match_score"]["overall_score"]
+                    except Exception as e:
+                        result = {"error": str(e), "filename": resumes[i].filename}
+                yield json.dumps({"event": "result", "index": i, "result": result}) + "\n"
+        yield json.dumps({
+            "event": "summary",
+            "total": len(resumes),
+            "scored": len(scores),
+            "failed": len(resumes) - len(scores),
+            "ranking": sorted(scores, key=lambda i: (-scores[i], i)),
+            "elapsed_seconds": round(time.time() - started, 3),
+        }) + "\n"
+    finally:
+        # The client may have gone away; do not start the remaining chunks
+        for task in tasks:
+            task.cancel()
+
+@app.post("/api/match/stream", dependencies=[Depends(require_ready)])
+async def match_resume_stream(
+    resumes: List[UploadFile] = File(...),
+    job_description: Optional[UploadFile] = File(None),
+    jd_text: Optional[str] = None
+):
+    """Streaming /api/match: one NDJSON line per resume, in completion order, and a summary line at the end."""
+    for resume in resumes:
+        validate_resume_upload(resume)
+    jd_text_val = read_uploaded_job_description(job_description, jd_text)
+    jd_name = os.path.splitext(os.path.basename(job_description.filename))[0] if job_description else "job_description"
+    # Read the uploads before streaming, since the request's files are closed once this handler returns
+    uploads = [UploadFile(io.BytesIO(await resume.read()), filename=resume.filename) for resume in resumes]
+    try:
+        parsed_jd = await run_inference(parse_job_description, jd_text_val)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    jd_vector = await embed_job_description(parsed_jd)
+    return StreamingResponse(stream_match_events(uploads, parsed_jd, jd_vector, jd_name), media_type="application/x-ndjson")
+
+@app.post("/api/catalog/jobs", dependencies=[Depends(require_ready)])
+async def add_catalog_jobs(job_descriptions: List[UploadFile] = File(...)):
+    job_texts = {}
+    for job_description in job_descriptions:
+        ext = os.path.splitext(job_description.filename)[1].lower()
+        if ext not in ALLOWED_JD_EXT:
+            raise HTTPException(status_code=400, detail=f"Invalid job description file type: {job_description.filename}. Only TXT allowed.")
+        jd_text_val = load_job_description(job_description.file)
+        if not jd_text_val:
+            raise HTTPException(status_code=400, detail=f"Could not read job description: {job_description.filename}")
+        job_texts[os.path.splitext(job_description.filename)[0]] = jd_text_val
+
+    catalog = await asyncio.to_thread(get_jd_catalog)
+    try:
+        added = await run_inference(catalog.add_jobs, job_texts, models["embedding_model"])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to add jobs to catalog: {str(e)}")
+    return {"added": added, "total_jobs": len(catalog)}
+
+@app.post("/api/catalog/match", dependencies=[Depends(require_ready)])
+async def match_catalog(resume: UploadFile = File(...), top_k: int = 10):
+    ext = os.path.splitext(resume.filename)[1].lower()
+    if ext not in ALLOWED_RESUME_EXT:
+        raise HTTPException(status_code=400, detail=f"Invalid resume file type: {resume.filename}. Only PDF allowed.")
+    catalog = await asyncio.to_thread(get_jd_catalog)
+    if not len(catalog):
+        raise HTTPException(status_code=404, detail="The JD catalog is empty")
+
+    resume_text = await run_inference(extract_uploaded_resume, resume)
+
+    try:
+        parsed_resume = (await run_inference(parse_resume_texts, [resume_text]))[0]
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    try:
+        ranked_jobs = await run_inference(catalog.match, parsed_resume, models["embedding_model"], top_k=top_k)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    return {"resume": parsed_resume, "total_jobs": len(catalog), "jobs": ranked_jobs}
+
+@app.post("/api/index/resumes", dependencies=[Depends(require_ready)])
+async def index_resumes(resumes: List[UploadFile] = File(...)):
+    resume_texts = {}
+    errors = []
+    for resume in resumes:
+        ext = os.path.splitext(resume.filename)[1].lower()
+        if ext not in ALLOWED_RESUME_EXT:
+            errors.append({"error": "Only PDF allowed.", "filename": resume.filename})
+            continue
+        try:
+            resume_texts[resume.filename] = await run_inference(extract_uploaded_resume, resume)
+        except HTTPException as he:
+            errors.append({"error": he.detail, "filename": resume.filename})
+        except Exception as e:
+            errors.append({"error": str(e), "filename": resume.filename})
+
+    parsed_resumes = {}
+    try:
+        for filename, parsed_resume in zip(resume_texts, await run_inference(parse_resume_texts, list(resume_texts.values()))):
+            parsed_resumes[candidate_id_for(parsed_resume, filename)] = parsed_resume
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to parse resumes: {str(e)}")
+
+    resume_index = await asyncio.to_thread(get_resume_index)
+    try:
+        indexed = await run_inference(resume_index.index_resumes, parsed_resumes, models["embedding_model"])
+        await run_inference(resume_index.save)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to index resumes: {str(e)}")
+    return {"indexed": indexed, "errors": errors, "total_candidates": len(resume_index)}
+
+@app.delete("/api/index/resumes/{candidate_id}", dependencies=[Depends(require_ready)])
+async def delete_indexed_resume(candidate_id: str):
+    resume_index = await asyncio.to_thread(get_resume_index)
+    if not await run_inference(resume_index.delete, [candidate_id]):
+        raise HTTPException(status_code=404, detail=f"Candidate not found in index: {candidate_id}")
+    try:
+        await run_inference(resume_index.save)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to save index: {str(e)}")
+    return {"deleted": candidate_id, "total_candidates": len(resume_index)}
+
+@app.post("/api/index/search", dependencies=[Depends(require_ready)])
+async def search_index(
+    job_description: Optional[UploadFile] = File(None),
+    jd_text: Optional[str] = None,
+    top_k: int = 10,
+    rerank_top_n: Optional[int] = None,
+    strategy: Optional[str] = None
+):
+    jd_text_val = read_uploaded_job_description(job_description, jd_text)
+    if strategy and strategy not in RETRIEVAL_STRATEGIES:
+        raise HTTPException(status_code=400, detail=f"Invalid strategy: {strategy}. Expected one of {', '.join(RETRIEVAL_STRATEGIES)}")
+    try:
+        parsed_jd = await run_inference(parse_job_description, jd_text_val)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    resume_index = await asyncio.to_thread(get_resume_index)
+    try:
+        search_results = await run_inference(retrieve_and_rerank, parsed_jd, resume_index, models, top_k=top_k, rerank_top_n=rerank_top_n, strategy=strategy)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    return {**search_results, "total_candidates": len(resume_index)}
+
+def ingest_resume_pdfs(feature_store, resumes: List[Tuple[str, bytes]]) -> dict:
+    """Ingest uploaded (filename, PDF bytes) resumes into the feature store with a NER replica checked out for exclusive use."""
+    with get_replica_pool("ner_model").acquire() as ner_model:
+        return feature_store.ingest_pdf_contents(resumes, ner_model, models["embedding_model"])
+
+@app.post("/api/store/resumes", dependencies=[Depends(require_ready)])
+async def store_resumes(resumes: List[UploadFile] = File(...)):
+    contents = []
+    errors = []
+    for resume in resumes:
+        ext = os.path.splitext(resume.filename)[1].lower()
+        if ext not in ALLOWED_RESUME_EXT:
+            errors.append({"error": "Only PDF allowed.", "filename": resume.filename})
+            continue
+        contents.append((resume.filename, await resume.read()))
+
+    feature_store = await asyncio.to_thread(get_feature_store)
+    try:
+        ingested = await run_inference(ingest_resume_pdfs, feature_store, contents)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to store resumes: {str(e)}")
+    errors.extend({"error": "Could not extract text from resume", "filename": os.path.basename(path)} for path in ingested["failed"])
+    return {
+        "stored": ingested["stored"],
+        "skipped": [os.path.basename(path) for path in ingested["skipped"]],
+        "errors": errors,
+        "total_candidates": len(feature_store),
+    }
+
+@app.post("/api/store/rank", dependencies=[Depends(require_ready)])
+async def rank_store(
+    job_description: Optional[UploadFile] = File(None),
+    jd_text: Optional[str] = None,
+    top_k: int = 10
+):
+    jd_text_val = read_uploaded_job_description(job_description, jd_text)
+    try:
+        parsed_jd = await run_inference(parse_job_description, jd_text_val)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    feature_store = await asyncio.to_thread(get_feature_store)
+    try:
+        ranked = await run_inference(feature_store.rank_jd, parsed_jd, models["embedding_model"], top_k=top_k)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    return {"job_description": parsed_jd, **ranked, "total_candidates": len(feature_store)}
+
+def score_job_chunk(resumes: List[Tuple[int, str, bytes]], parsed_jd: dict, jd_vector) -> List[Tuple[int, Optional[dict], Optional[str]]]:
+    """Match a chunk of a job's stored resumes, returning (position, match response, error) per resume."""
+    uploads = [UploadFile(io.BytesIO(content), filename=filename) for _, filename, content in resumes]
+    return [
+        (position, None, result["error"]) if "error" in result else (position, result, None)
+        for (position, _, _), result in zip(resumes, match_resume_results(uploads, parsed_jd, jd_vector))
+    ]
+
+async def run_job(store: JobStore, job: dict, worker_id: str) -> None:
+    """Match the pending resumes of a claimed job chunk by chunk, saving results as each chunk finishes."""
+    job_id = job["job_id"]
+    try:
+        parsed_jd = await run_inference(parse_job_description, job["jd_text"])
+        jd_vector = await embed_job_description(parsed_jd)
+
+        chunks = chunk_positions(await asyncio.to_thread(store.pending_positions, job_id))
+        limit = chunk_limit()
+        held = True
+
+        async def process_chunk(chunk: List[int]) -> None:
+            nonlocal held
+            async with limit:
+                if not held:
+                    return
+                try:
+                    resumes = await asyncio.to_thread(store.load_resumes, job_id, chunk)
+                    results = await run_inference(score_job_chunk, resumes, parsed_jd, jd_vector)
+                except Exception as e:
+                    # A failing chunk fails its own resumes, not the job
+                    results = [(position, None, str(e)) for position in chunk]
+                held = await asyncio.to_thread(store.save_results, job_id, worker_id, results) and held
+
+        await asyncio.gather(*(process_chunk(chunk) for chunk in chunks))
+        if not held:
+            logger.warning(f"Job {job_id} was taken over by another worker after its lease expired")
+            return
+        await asyncio.to_thread(store.finish_job, job_id, worker_id)
+    except Exception as e:
+        logger.exception(f"Job {job_id} failed: {e}")
+        await asyncio.to_thread(store.finish_job, job_id, worker_id, str(e))
+
+async def run_jobs(worker_id: str) -> None:
+    """Background worker running queued jobs one at a time, including jobs queued by other processes."""
+    store = await asyncio.to_thread(get_job_store)
+    while True:
+        app.state.job_wakeup.clear()
+        try:
+            job = await asyncio.to_thread(store.claim_next_job, worker_id)
+        except Exception as e:
+            logger.error(f"Could not claim a job: {e}")
+            job = None
+        if job is not None:
+            await run_job(store, job, worker_id)
+            continue
+        try:
+            await asyncio.wait_for(app.state.job_wakeup.wait(), timeout=config["jobs_config"]["poll_seconds"])
+        except asyncio.TimeoutError:
+            pass
+
+@app.post("/api/jobs", status_code=202)
+async def submit_job(
+    resumes: List[UploadFile] = File(...),
+    job_description: Optional[UploadFile] = File(None),
+    jd_text: Optional[str] = None
+):
+    for resume in resumes:
+        validate_resume_upload(resume)
+    jd_text_val = read_uploaded_job_description(job_description, jd_text)
+    jd_name = os.path.splitext(os.path.basename(job_description.filename))[0] if job_description else "job_description"
+    contents = [(resume.filename, await resume.read()) for resume in resumes]
+    try:
+        store = await asyncio.to_thread(get_job_store)
+        job_id = await asyncio.to_thread(store.create_job, jd_text_val, jd_name, contents)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to queue job: {str(e)}")
+    app.state.job_wakeup.set()
+    return {"job_id": job_id, "status": "queued", "total": len(contents)}
+
+@app.get("/api/jobs/{job_id}")
+async def get_job(job_id: str):
+    store = await asyncio.to_thread(get_job_store)
+    job = await asyncio.to_thread(store.get_job, job_id, config["jobs_config"]["preview_size"])
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    return job
+
+@app.get("/api/jobs/{job_id}/results")
+async def get_job_results(job_id: str, offset: int = 0, limit: Optional[int] = None, order: str = "score"):
+    if order not in RESULT_ORDERS:
+        raise HTTPException(status_code=400, detail=f"Invalid order: {order}. Expected one of {', '.join(RESULT_ORDERS)}")
+    jobs_config = config["jobs_config"]
+    offset = max(0, offset)
+    limit = min(max(1, limit or jobs_config["page_size"]), jobs_config["max_page_size"])
+    store = await asyncio.to_thread(get_job_store)
+    job = await asyncio.to_thread(store.get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job not found: {job_id}")
+    results = await asyncio.to_thread(store.get_results, job_id, offset, limit, order)
+    finished = job["completed"] + job["failed"]
+    return {
+        "job_id": job_id,
+        "status": job["status"],
+        "total": job["total"],
+        "finished": finished,
+        "offset": offset,
+        "limit": limit,
+        "results": results,
+        "next_offset": offset + len(results) if offset + len(results) < finished else None,
+    }
+
 @app.post("/api/feedback")
 async def submit_feedback(feedback: dict):
     feedback_text = feedback.get("feedback_text")
@@ -209,6 +749,21 @@ async def submit_feedback(feedback: dict):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to save feedback: {str(e)}")
 
+def collect_metrics() -> dict:
+    """Stats of the caches, stores, models and executors; loads the stores on first use."""
+    return {
+        "embedding_cache": embedding_cache_stats(),
+        "resume_index": get_resume_index().stats(),
+        "models": get_model_registry().stats(),
+        "contact_cascade": contact_cascade_stats(),
+        "inference": inference_stats(),
+        "jobs": get_job_store().stats(),
+    }
+
+@app.get("/api/metrics")
+async def get_metrics():
+    return await asyncio.to_thread(collect_metrics)
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=PORT, log_level="debug") 
\ No newline at end of file
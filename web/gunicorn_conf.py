@@ -0,0 +1,65 @@
+"""Gunicorn configuration for pre-fork serving with shared model weights.
+
+The app is imported and the models are loaded and warmed up once in the master
+process. The workers are then forked from it and share the model weights
+copy-on-write instead of each loading its own copy. The garbage collector is
+disabled while the master allocates and everything is frozen before the fork,
+so collections in the workers do not write to, and thereby unshare, the pages
+of the preloaded objects.
+
+Usage:
+    gunicorn -c web/gunicorn_conf.py web.app:app
+    WEB_CONCURRENCY=4 PORT=8080 gunicorn -c web/gunicorn_conf.py web.app:app
+"""
+import gc
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Gunicorn reads every module-level name matching a setting, including "config"
+from config.config import config as app_config
+
+serving_config = app_config["serving_config"]
+
+bind = f"0.0.0.0:{int(os.getenv('PORT', 8000))}"
+workers = int(os.getenv("WEB_CONCURRENCY", serving_config["workers"]))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+# Model-backed requests may run up to the app's own 60 second timeout
+timeout = 120
+graceful_timeout = 30
+
+if serving_config["preload_models"]:
+    # Allocations made while importing the app and loading the models are never
+    # collected in the master, so no freed holes are left between shared objects
+    gc.disable()
+
+def _set_torch_threads(count: int) -> None:
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(count)
+
+def when_ready(server):
+    """Load and warm up the models in the master, right before the workers are forked."""
+    if not serving_config["preload_models"]:
+        return
+    # Fork-safety: keep thread pools from starting in the master, since a forked
+    # OpenMP or tokenizers pool can deadlock the workers
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+    _set_torch_threads(1)
+
+    from utils.warmup import warm_up_models
+    timings = warm_up_models()
+    server.log.info(f"Preloaded models in the master process: {timings}")
+
+    gc.freeze()
+
+def post_fork(server, worker):
+    """Re-enable the garbage collector and give this worker its share of the CPU budget."""
+    if serving_config["preload_models"]:
+        gc.enable()
+    from utils.inference_executor import configure_inference
+    configure_inference(processes=server.cfg.workers)
@@ -40,7 +40,8 @@ document.addEventListener('DOMContentLoaded', () => {
                 throw new Error('Please provide either a job description file or text');
             }
 
-            const response = await fetch(`${config.API_URL}/api/match`, {
+            // Results are streamed as NDJSON, one line per resume as soon as it is scored
+            const response = await fetch(`${config.API_URL}/api/match/stream`, {
                 method: 'POST',
                 body: formData
             });
@@ -50,8 +51,26 @@ document.addEventListener('DOMContentLoaded', () => {
                 throw new Error(error.detail || 'An error occurred while processing your request');
             }
 
-            const results = await response.json();
-            displayResults(results);
+            startResults();
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+            while (true) {
+                const { done, value } = await reader.read();
+                buffer += decoder.decode(value || new Uint8Array(), { stream: !done });
+                const lines = buffer.split('\n');
+                buffer = lines.pop();
+                for (const line of lines) {
+                    if (!line.trim()) continue;
+                    const event = JSON.parse(line);
+                    if (event.event === 'result') {
+                        appendResult(event.result, event.index);
+                    } else if (event.event === 'summary') {
+                        finishResults(event);
+                    }
+                }
+                if (done) break;
+            }
 
         } catch (error) {
             errorElement.textContent = error.message;
@@ -63,78 +82,84 @@ document.addEventListener('DOMContentLoaded', () => {
     });
 
     let globalResultsArray = [];
+    let detailsShown = false;
 
-    function displayResults(results) {
-        // If multiple results, show a summary for each
-        if (results.results && Array.isArray(results.results)) {
-            let summaryHtml = '';
-            let firstValidResult = null;
-            globalResultsArray = results.results;
-            // Populate dropdown
-            const resumeSelect = document.getElementById('resumeSelect');
-            if (resumeSelect) {
-                resumeSelect.innerHTML = '';
-                results.results.forEach((res, idx) => {
-                    let label = res.resume && (res.resume.name || res.resume.email) ? `${res.resume.name || res.resume.email}` : `Resume ${idx + 1}`;
-                    if (res.error) label = `Error: ${res.filename || 'Resume ' + (idx + 1)}`;
-                    const option = document.createElement('option');
-                    option.value = idx;
-                    option.textContent = label;
-                    resumeSelect.appendChild(option);
-                });
-                resumeSelect.onchange = function() {
-                    const idx = parseInt(this.value);
-                    if (!isNaN(idx) && globalResultsArray[idx] && !globalResultsArray[idx].error) {
-                        displaySingleResult(globalResultsArray[idx]);
-                    } else {
-                        document.getElementById('resumeDetails').style.display = 'none';
-                        document.getElementById('jdDetails').style.display = 'none';
-                    }
-                };
-            }
-            results.results.forEach((res, idx) => {
-                if (res.error) {
-                    summaryHtml += `<div class="score-card error"><h3>Resume ${idx + 1}: Error</h3><div style="color:red;">${res.filename ? res.filename + ': ' : ''}${res.error}</div></div>`;
+    function hideDetails() {
+        document.getElementById('resumeDetails').style.display = 'none';
+        document.getElementById('jdDetails').style.display = 'none';
+    }
+
+    function startResults() {
+        globalResultsArray = [];
+        detailsShown = false;
+        resultsSection.innerHTML = '<h2>Match Results</h2><div id="resultsSummary"></div><div id="scoreCards"></div>';
+        resultsSection.classList.add('active');
+        const resumeSelect = document.getElementById('resumeSelect');
+        if (resumeSelect) {
+            resumeSelect.innerHTML = '';
+            resumeSelect.onchange = function() {
+                const idx = parseInt(this.value);
+                if (!isNaN(idx) && globalResultsArray[idx] && !globalResultsArray[idx].error) {
+                    displaySingleResult(globalResultsArray[idx]);
                 } else {
-                    const matchScore = res.match_score;
-                    summaryHtml += `<div class="score-card"><h3>Resume ${idx + 1}: ${res.resume.name || res.resume.email || 'N/A'}</h3>`;
-                    summaryHtml += `<div>Overall Score: <strong>${(matchScore.overall_score * 100).toFixed(1)}%</strong></div>`;
-                    summaryHtml += `<div>Skill Score: ${(matchScore.skill_score * 100).toFixed(1)}%</div>`;
-                    summaryHtml += `<div>Experience Score: ${(matchScore.experience_score * 100).toFixed(1)}%</div>`;
-                    summaryHtml += `<div>Education Score: ${(matchScore.education_score * 100).toFixed(1)}%</div>`;
-                    summaryHtml += `<div>Semantic Score: ${(matchScore.semantic_score * 100).toFixed(1)}%</div>`;
-                    summaryHtml += `<div>Matched Skills: ${matchScore.skill_matches.matched.join(', ')}</div>`;
-                    summaryHtml += `</div>`;
-                    if (!firstValidResult) firstValidResult = res;
+                    hideDetails();
                 }
-            });
-            resultsSection.innerHTML = `<h2>Match Results</h2>${summaryHtml}`;
-            resultsSection.classList.add('active');
-            // Show details for the first valid result
-            if (firstValidResult) {
-                if (resumeSelect) resumeSelect.value = results.results.findIndex(r => r === firstValidResult);
-                displaySingleResult(firstValidResult);
-            } else {
-                // Hide details if all errored
-                document.getElementById('resumeDetails').style.display = 'none';
-                document.getElementById('jdDetails').style.display = 'none';
-            }
+            };
+        }
+        hideDetails();
+    }
+
+    // Insert before the first sibling with a higher upload index, so rows stay in upload order as they arrive
+    function insertInOrder(container, element, idx) {
+        const next = Array.from(container.children).find(child => parseInt(child.dataset.index) > idx);
+        container.insertBefore(element, next || null);
+    }
+
+    function appendResult(res, idx) {
+        globalResultsArray[idx] = res;
+
+        const resumeSelect = document.getElementById('resumeSelect');
+        if (resumeSelect) {
+            let label = res.resume && (res.resume.name || res.resume.email) ? `${res.resume.name || res.resume.email}` : `Resume ${idx + 1}`;
+            if (res.error) label = `Error: ${res.filename || 'Resume ' + (idx + 1)}`;
+            const option = document.createElement('option');
+            option.value = idx;
+            option.dataset.index = idx;
+            option.textContent = label;
+            insertInOrder(resumeSelect, option, idx);
+        }
+
+        const card = document.createElement('div');
+        card.dataset.index = idx;
+        if (res.error) {
+            card.className = 'score-card error';
+            card.innerHTML = `<h3>Resume ${idx + 1}: Error</h3><div style="color:red;">${res.filename ? res.filename + ': ' : ''}${res.error}</div>`;
         } else {
-            // Single result fallback
-            globalResultsArray = [results];
-            const resumeSelect = document.getElementById('resumeSelect');
-            if (resumeSelect) {
-                resumeSelect.innerHTML = '';
-                const option = document.createElement('option');
-                option.value = 0;
-                option.textContent = results.resume && (results.resume.name || results.resume.email) ? `${results.resume.name || results.resume.email}` : `Resume 1`;
-                resumeSelect.appendChild(option);
-                resumeSelect.onchange = null;
-            }
-            displaySingleResult(results);
+            const matchScore = res.match_score;
+            card.className = 'score-card';
+            card.innerHTML = `<h3>Resume ${idx + 1}: ${res.resume.name || res.resume.email || 'N/A'}</h3>`
+                + `<div>Overall Score: <strong>${(matchScore.overall_score * 100).toFixed(1)}%</strong></div>`
+                + `<div>Skill Score: ${(matchScore.skill_score * 100).toFixed(1)}%</div>`
+                + `<div>Experience Score: ${(matchScore.experience_score * 100).toFixed(1)}%</div>`
+                + `<div>Education Score: ${(matchScore.education_score * 100).toFixed(1)}%</div>`
+                + `<div>Semantic Score: ${(matchScore.semantic_score * 100).toFixed(1)}%</div>`
+                + `<div>Matched Skills: ${matchScore.skill_matches.matched.join(', ')}</div>`;
+        }
+        insertInOrder(document.getElementById('scoreCards'), card, idx);
+
+        // Show details for the first valid result that arrives
+        if (!res.error && !detailsShown) {
+            detailsShown = true;
+            if (resumeSelect) resumeSelect.value = idx;
+            displaySingleResult(res);
         }
     }
 
+    function finishResults(summary) {
+        const failed = summary.failed ? `, ${summary.failed} failed` : '';
+        document.getElementById('resultsSummary').textContent = `${summary.scored} of ${summary.total} resumes scored${failed} in ${summary.elapsed_seconds.toFixed(1)}s`;
+    }
+
     function displaySingleResult(results) {
         const matchScore = results.match_score;
         // Update overall score